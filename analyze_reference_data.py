@@ -5,7 +5,9 @@
 import json
 import re
 from pathlib import Path
-from collections import Counter, defaultdict
+from collections import Counter
+
+from services.template_library import TemplateLibrary
 
 def parse_js_object(file_path):
     """解析JS文件中的对象数据"""
@@ -25,84 +27,64 @@ def parse_js_object(file_path):
     return items
 
 def analyze_moves(moves_file):
-    """分析技能数据"""
+    """分析技能数据（基于模板库的列式视图，统计均为向量化计算）"""
     print("\n" + "="*70)
     print("  技能数据分析 (moves.js)")
     print("="*70)
     
-    content = Path(moves_file).read_text(encoding='utf-8')
+    moves_file = Path(moves_file)
+    library = TemplateLibrary(str(moves_file.parent))
+    library.reference_files["moves"] = moves_file
+    table = library.get_move_table()
     
     # 统计数量
-    items = re.findall(r'^\s+(\w+): {', content, re.MULTILINE)
-    print(f"\n总技能数量: {len(items)}")
+    print(f"\n总技能数量: {len(table)}")
     
     # 统计分类
-    categories = re.findall(r'category: "(\w+)"', content)
-    category_count = Counter(categories)
     print(f"\n分类统计:")
-    for cat, count in category_count.most_common():
+    for cat, count in table.value_counts("category").items():
         print(f"  - {cat}: {count}")
     
     # 统计属性
-    types = re.findall(r'type: "(\w+)"', content)
-    type_count = Counter(types)
     print(f"\n属性统计 (Top 10):")
-    for typ, count in type_count.most_common(10):
+    for typ, count in list(table.value_counts("type").items())[:10]:
         print(f"  - {typ}: {count}")
     
     # 统计优先度
-    priorities = re.findall(r'priority: (-?\d+)', content)
-    priority_count = Counter(priorities)
     print(f"\n优先度统计:")
-    for pri, count in sorted(priority_count.items(), key=lambda x: int(x[0])):
+    for pri, count in sorted(table.value_counts("priority").items()):
         print(f"  - {pri}: {count}")
     
     # 统计追加效果
-    secondary_exists = len(re.findall(r'secondary: {', content))
-    secondary_null = len(re.findall(r'secondary: null', content))
+    secondary_exists = int(table.has_secondary.sum())
     print(f"\n追加效果:")
     print(f"  - 有追加效果: {secondary_exists}")
-    print(f"  - 无追加效果: {secondary_null}")
+    print(f"  - 无追加效果: {len(table) - secondary_exists}")
     
     # 统计常见标志
-    flags_pattern = r'flags: {([^}]+)}'
-    all_flags = []
-    for flags_match in re.finditer(flags_pattern, content):
-        flags_str = flags_match.group(1)
-        flag_names = re.findall(r'(\w+): 1', flags_str)
-        all_flags.extend(flag_names)
-    
-    flag_count = Counter(all_flags)
     print(f"\n常见标志 (Top 10):")
-    for flag, count in flag_count.most_common(10):
+    for flag, count in list(table.flag_counts().items())[:10]:
         print(f"  - {flag}: {count}")
     
     # 威力分布
-    powers = re.findall(r'basePower: (\d+)', content)
-    power_ints = [int(p) for p in powers if int(p) > 0]
-    if power_ints:
+    stats = table.power_stats()
+    if stats["count"]:
         print(f"\n威力统计:")
-        print(f"  - 最小: {min(power_ints)}")
-        print(f"  - 最大: {max(power_ints)}")
-        print(f"  - 平均: {sum(power_ints) // len(power_ints)}")
-        
-        # 威力档位
-        power_ranges = defaultdict(int)
-        for p in power_ints:
-            if p < 50:
-                power_ranges["<50"] += 1
-            elif p < 80:
-                power_ranges["50-79"] += 1
-            elif p < 100:
-                power_ranges["80-99"] += 1
-            elif p < 120:
-                power_ranges["100-119"] += 1
-            else:
-                power_ranges[">=120"] += 1
+        print(f"  - 最小: {stats['min']:g}")
+        print(f"  - 最大: {stats['max']:g}")
+        print(f"  - 平均: {stats['mean']:g}")
+        print(f"  - 分位数: " + ", ".join(f"{k}={v:g}" for k, v in stats["percentiles"].items()))
         
         print(f"\n威力档位:")
-        for range_name, count in sorted(power_ranges.items()):
+        for range_name, count in stats["bins"].items():
             print(f"  - {range_name}: {count}")
+        
+        # 各分类的威力中位数（平衡参考）
+        print(f"\n各分类威力中位数:")
+        for cat in table.category_labels:
+            cat_stats = table.power_stats(table.mask(category=cat), percentiles=[50])
+            if cat_stats["count"]:
+                print(f"  - {cat}: {cat_stats['percentiles']['p50']:g}（{cat_stats['count']}个）")
 
 def analyze_abilities(abilities_file):
     """分析特性数据"""
@@ -125,26 +107,18 @@ def analyze_abilities(abilities_file):
         for rating, count in sorted(rating_count.items()):
             print(f"  - {rating}星: {count}")
     
-    # 统计事件处理器类型
-    event_handlers = re.findall(r'(on[A-Z]\w+)\(', content)
-    handler_count = Counter(event_handlers)
+    # 统计事件处理器类型（模板库的处理器倒排索引，与生成特性时取代码片段用的是同一份）
+    abilities_file = Path(abilities_file)
+    library = TemplateLibrary(str(abilities_file.parent))
+    library.reference_files["abilities"] = abilities_file
+    handler_index = library.get_handler_index("abilities")
     print(f"\n常见事件处理器 (Top 15):")
-    for handler, count in handler_count.most_common(15):
+    for handler, count in list(handler_index.handler_counts().items())[:15]:
         print(f"  - {handler}: {count}")
     
-    # 统计简单特性（只有基础字段，无函数）
-    simple_abilities = 0
-    complex_abilities = 0
-    
-    # 简单统计：如果有on开头的方法，就是复杂特性
-    for item in items:
-        ability_match = re.search(rf'{item}: {{([^}}]+?)}}', content, re.DOTALL)
-        if ability_match:
-            ability_content = ability_match.group(1)
-            if 'on' in ability_content.lower() and '(' in ability_content:
-                complex_abilities += 1
-            else:
-                simple_abilities += 1
+    # 有顶层函数的是复杂特性，其余为纯数据
+    complex_abilities = len(handler_index)
+    simple_abilities = len(items) - complex_abilities
     
     print(f"\n复杂度分析:")
     print(f"  - 简单特性（纯数据）: {simple_abilities}")
@@ -0,0 +1,142 @@
+"""
+嵌入后端对比（PyTorch vs ONNX int8）
+
+1. 精度一致性：同一批技能/特性描述在两个后端下的余弦相似度，以及Top-K检索结果重合率
+2. 性能：在独立子进程中测量模型加载耗时、单条/批量编码延迟、RSS增量
+
+用法：
+    python export_onnx_model.py   # 先导出ONNX模型
+    python benchmark_embeddings.py [--onnx data/onnx/all-MiniLM-L6-v2] [--runs 50]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmark_vector_store import read_rss_mb
+
+TORCH_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+SAMPLE_TEXTS = [
+    "Flamethrower | Fire Special | 威力90 命中100 PP15 10% chance to burn the target",
+    "Surf | Water Special | 威力90 命中100 PP15 hits all adjacent Pokemon",
+    "Quick Attack | Normal Physical | 威力40 命中100 PP30 优先度1",
+    "Swords Dance | Normal Status | raises the user's Attack by 2 stages",
+    "Thunder Wave | Electric Status | paralyzes the target",
+    "Earthquake | Ground Physical | 威力100 hits all adjacent Pokemon",
+    "Blaze | 评级2 powers up Fire-type moves when HP is low",
+    "Intimidate | 评级3.5 lowers the foe's Attack on switch-in",
+    "Levitate | 评级3.5 immune to Ground-type moves",
+    "一个火属性的特殊攻击技能，有30%几率使对手烧伤",
+    "提升自身速度两级的变化技能",
+    "受到攻击时有几率使对手麻痹的特性",
+]
+
+QUERIES = ["火系特殊攻击 烧伤", "speed boost status move", "ground immunity ability", "paralysis"]
+
+
+def load_model(backend: str, onnx_dir: str):
+    from services.embeddings import ONNX_PREFIX, create_embedding_model
+    
+    return create_embedding_model(TORCH_MODEL if backend == "torch" else ONNX_PREFIX + onnx_dir)
+
+
+def measure(backend: str, onnx_dir: str, runs: int) -> dict:
+    """子进程中测量加载、编码延迟和内存"""
+    rss_before = read_rss_mb()
+    
+    start = time.perf_counter()
+    model = load_model(backend, onnx_dir)
+    load_ms = (time.perf_counter() - start) * 1000
+    
+    model.encode(SAMPLE_TEXTS[:2])  # 预热
+    
+    start = time.perf_counter()
+    for i in range(runs):
+        model.encode([QUERIES[i % len(QUERIES)]])
+    single_ms = (time.perf_counter() - start) * 1000 / runs
+    
+    start = time.perf_counter()
+    embeddings = np.asarray(model.encode(SAMPLE_TEXTS), dtype=np.float32)
+    batch_ms = (time.perf_counter() - start) * 1000
+    
+    return {
+        "backend": backend,
+        "load_ms": round(load_ms, 1),
+        "query_ms": round(single_ms, 2),
+        "batch_ms": round(batch_ms, 2),
+        "rss_mb": round(read_rss_mb() - rss_before, 1),
+        "embeddings": embeddings.tolist(),
+        "query_embeddings": np.asarray(model.encode(QUERIES), dtype=np.float32).tolist()
+    }
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+
+def parity(reference: dict, candidate: dict, top_k: int = 3) -> dict:
+    """对比两个后端的向量和检索结果"""
+    a = normalize(np.array(reference["embeddings"]))
+    b = normalize(np.array(candidate["embeddings"]))
+    cosines = (a * b).sum(axis=1)
+    
+    qa = normalize(np.array(reference["query_embeddings"]))
+    qb = normalize(np.array(candidate["query_embeddings"]))
+    top_a = np.argsort(-(qa @ a.T), axis=1)[:, :top_k]
+    top_b = np.argsort(-(qb @ b.T), axis=1)[:, :top_k]
+    overlap = np.mean([len(set(x) & set(y)) / top_k for x, y in zip(top_a, top_b)])
+    
+    return {
+        "cosine_min": round(float(cosines.min()), 4),
+        "cosine_mean": round(float(cosines.mean()), 4),
+        f"top{top_k}_overlap": round(float(overlap), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="嵌入后端对比")
+    parser.add_argument("--onnx", default="data/onnx/all-MiniLM-L6-v2", help="ONNX模型目录")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--child", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        print(json.dumps(measure(args.child, args.onnx, args.runs)))
+        return
+    
+    print("=" * 70)
+    print(f"  嵌入后端对比：{TORCH_MODEL} vs ONNX（{args.onnx}）")
+    print("=" * 70)
+    
+    results = {}
+    for backend in ["torch", "onnx"]:
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", backend, "--onnx", args.onnx, "--runs", str(args.runs)],
+            capture_output=True, text=True
+        )
+        if output.returncode != 0:
+            print(f"  跳过 {backend}：{output.stderr.strip().splitlines()[-1] if output.stderr.strip() else '运行失败'}")
+            continue
+        results[backend] = json.loads(output.stdout.strip().splitlines()[-1])
+    
+    print(f"\n  {'后端':<8}{'加载(ms)':>12}{'单条(ms)':>12}{'批量(ms)':>12}{'RSS增量(MB)':>14}")
+    for r in results.values():
+        print(f"  {r['backend']:<8}{r['load_ms']:>12}{r['query_ms']:>12}{r['batch_ms']:>12}{r['rss_mb']:>14}")
+    
+    if len(results) == 2:
+        report = parity(results["torch"], results["onnx"])
+        print(f"\n  精度一致性：{report}")
+        if report["cosine_min"] < 0.98:
+            print("  ⚠️  最低余弦相似度低于0.98，建议使用FP32模型（--no-quantize）或重新导出")
+    print()
+
+
+if __name__ == "__main__":
+    main()
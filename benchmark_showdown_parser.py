@@ -0,0 +1,148 @@
+"""
+Showdown JS 解析器对比（旧版逐行正则 vs 单遍词法扫描）
+
+1. 耗时：多次解析同一文件取中位数
+2. 结果：条目数，以及旧版提取的基础字段在新版中是否一致
+
+默认使用 config.yaml 中配置的 moves.js / abilities.js；文件不存在时生成合成数据
+（包含函数、字符串中的括号和注释）。
+
+用法：
+    python benchmark_showdown_parser.py [--file path/to/moves.js] [--runs 5] [--synthetic 1000]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from loguru import logger
+
+from services.template_library import TemplateLibrary
+
+SYNTHETIC_ENTRY = '''	move{i}: {{
+		num: {i},
+		accuracy: {accuracy},
+		basePower: {power},
+		basePowerCallback(pokemon, target, move) {{
+			// 威力随剩余HP变化 {{ 注释里的括号 }}
+			const ratio = Math.max(1, Math.floor(pokemon.hp * 48 / pokemon.maxhp));
+			this.debug(`BP ${{ratio}}`);
+			return ratio <= 1 ? 200 : {power};
+		}},
+		category: "{category}",
+		name: "Move {i}",
+		desc: "Deals damage. Text with braces {{ and }} inside.",
+		pp: {pp},
+		priority: 0,
+		flags: {{protect: 1, mirror: 1, metronome: 1}},
+		secondary: {{
+			chance: 10,
+			status: "brn",
+		}},
+		target: "normal",
+		type: "{type}",
+	}},
+'''
+
+
+def build_synthetic(count: int) -> str:
+    types = ["Fire", "Water", "Grass", "Electric", "Normal"]
+    entries = [
+        SYNTHETIC_ENTRY.format(
+            i=i,
+            accuracy="true" if i % 7 == 0 else 100,
+            power=40 + i % 120,
+            category="Physical" if i % 2 else "Special",
+            pp=5 + i % 30,
+            type=types[i % len(types)]
+        )
+        for i in range(count)
+    ]
+    return "export const Moves = {\n" + "".join(entries) + "};\n"
+
+
+def default_files() -> list:
+    """config.yaml 中 rag.reference_paths 指向的 moves.js / abilities.js（存在的）"""
+    try:
+        import yaml
+        with open(Path(__file__).parent / "config.yaml", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+    except Exception:
+        return []
+    library = TemplateLibrary.from_config(config)
+    files = [library.get_reference_file(name) for name in ("moves", "abilities")]
+    return [path for path in files if path.exists()]
+
+
+def time_parse(parse, path: Path, runs: int) -> tuple:
+    durations = []
+    items = {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        items = parse(path)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations), items
+
+
+def compare(legacy: dict, current: dict) -> dict:
+    """旧版字段在新版中的一致率"""
+    fields = mismatched = 0
+    for item_id, item in legacy.items():
+        for field, value in item.items():
+            fields += 1
+            if current.get(item_id, {}).get(field) != value:
+                mismatched += 1
+    return {
+        "missing_items": len(set(legacy) - set(current)),
+        "extra_items": len(set(current) - set(legacy)),
+        "field_agreement": round(1 - mismatched / fields, 4) if fields else 1.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Showdown JS 解析器对比")
+    parser.add_argument("--file", action="append", help="要解析的JS文件（可重复）")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--synthetic", type=int, default=1000, help="无参考文件时生成的条目数")
+    args = parser.parse_args()
+    
+    logger.remove()
+    
+    files = [Path(f) for f in args.file] if args.file else default_files()
+    temp_dir = None
+    if not files:
+        temp_dir = tempfile.TemporaryDirectory()
+        path = Path(temp_dir.name) / "moves.js"
+        path.write_text(build_synthetic(args.synthetic), encoding="utf-8")
+        files = [path]
+    
+    library = TemplateLibrary(str(files[0].parent))
+    
+    print("=" * 70)
+    print("  Showdown JS 解析器对比")
+    print("=" * 70)
+    print(f"\n  {'文件':<16}{'大小(KB)':>10}{'旧版(ms)':>12}{'单遍(ms)':>12}{'加速':>8}{'条目(旧/新)':>14}")
+    
+    for path in files:
+        legacy_ms, legacy = time_parse(library.parse_showdown_js_legacy, path, args.runs)
+        current_ms, current = time_parse(library.parse_showdown_js, path, args.runs)
+        speedup = legacy_ms / current_ms if current_ms else float("inf")
+        size_kb = path.stat().st_size / 1024
+        print(
+            f"  {path.name:<16}{size_kb:>10.1f}{legacy_ms:>12.1f}{current_ms:>12.1f}"
+            f"{speedup:>7.1f}x{f'{len(legacy)}/{len(current)}':>14}"
+        )
+        print(f"    一致性：{compare(legacy, current)}")
+    
+    if temp_dir:
+        print("\n  （未找到参考文件，使用合成数据）")
+        temp_dir.cleanup()
+    print()
+
+
+if __name__ == "__main__":
+    main()
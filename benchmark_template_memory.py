@@ -0,0 +1,83 @@
+"""
+技能 / 特性条目内存占用对比（普通字典 vs __slots__ 紧凑记录）
+
+用 tracemalloc 统计解析结果常驻的内存：先保留解析出的普通字典，再原地转为紧凑记录。
+两种表示共用同一批字段值对象（字符串、数字），差值即容器结构本身节省的内存。
+
+默认使用 config.yaml 中配置的 moves.js / abilities.js；文件不存在时生成合成数据。
+
+用法：
+    python benchmark_template_memory.py [--file path/to/moves.js] [--synthetic 1000]
+"""
+import argparse
+import functools
+import gc
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from loguru import logger
+
+from benchmark_showdown_parser import build_synthetic, default_files
+from services.showdown_parser import parse_showdown_source
+from services.template_records import compact_items
+
+
+def retained(measure) -> tuple:
+    """执行 measure 并返回 (结果, 执行后常驻增量字节数)"""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = measure()
+    gc.collect()
+    return result, tracemalloc.get_traced_memory()[0] - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="技能 / 特性条目内存占用对比")
+    parser.add_argument("--file", action="append", help="要解析的JS文件（可重复，文件名以 abilities 开头按特性处理）")
+    parser.add_argument("--synthetic", type=int, default=1000, help="无参考文件时生成的条目数")
+    args = parser.parse_args()
+    
+    logger.remove()
+    
+    files = [Path(f) for f in args.file] if args.file else default_files()
+    temp_dir = None
+    if not files:
+        temp_dir = tempfile.TemporaryDirectory()
+        path = Path(temp_dir.name) / "moves.js"
+        path.write_text(build_synthetic(args.synthetic), encoding="utf-8")
+        files = [path]
+    
+    print("=" * 70)
+    print("  条目内存占用对比")
+    print("=" * 70)
+    print(f"\n  {'文件':<16}{'条目':>8}{'字典(KB)':>12}{'记录(KB)':>12}{'节省':>8}{'每条(B)':>14}")
+    
+    tracemalloc.start()
+    for path in files:
+        name = "abilities" if path.name.startswith("abilities") else "moves"
+        text = path.read_text(encoding="utf-8")
+        items, dict_bytes = retained(lambda: parse_showdown_source(text)[1])
+        # 原地转换：旧字典释放后的常驻量即紧凑记录的占用
+        _, delta = retained(functools.partial(compact_items, name, items))
+        record_bytes = dict_bytes + delta
+        
+        count = len(items) or 1
+        saved = 1 - record_bytes / dict_bytes if dict_bytes else 0
+        print(
+            f"  {path.name:<16}{len(items):>8}{dict_bytes / 1024:>12.1f}{record_bytes / 1024:>12.1f}"
+            f"{saved:>7.0%} {f'{dict_bytes // count}->{record_bytes // count}':>13}"
+        )
+    tracemalloc.stop()
+    
+    if temp_dir:
+        print("\n  （未找到参考文件，使用合成数据）")
+        temp_dir.cleanup()
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+向量存储后端性能对比（Chroma vs NumPy）
+
+对每个后端：
+1. 写入相同的随机向量数据集（模拟技能/特性参考库）
+2. 在独立子进程中测量：加载耗时、单条查询延迟、批量查询延迟、RSS增量
+
+用法：
+    python benchmark_vector_store.py [--size 3000] [--dim 384] [--queries 200]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+BACKENDS = ["numpy", "chroma"]
+COLLECTION = "benchmark_reference"
+
+
+def read_rss_mb() -> float:
+    """当前进程常驻内存（MB）"""
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def open_store(backend: str, data_dir: Path):
+    from services.vector_store import ChromaVectorStore, NumpyVectorStore
+    
+    if backend == "numpy":
+        return NumpyVectorStore(COLLECTION, data_dir=data_dir)
+    return ChromaVectorStore(COLLECTION, data_dir=data_dir)
+
+
+def make_dataset(size: int, dim: int):
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((size, dim)).astype(np.float32)
+    types = ["move" if i % 3 else "ability" for i in range(size)]
+    ids = [f"{t}_{i}" for i, t in enumerate(types)]
+    documents = [f"reference item {i}" for i in range(size)]
+    metadatas = [{"type": t, "name": f"item{i}", "basePower": int(i % 150)} for i, t in enumerate(types)]
+    return ids, vectors, documents, metadatas
+
+
+def populate(backend: str, data_dir: Path, size: int, dim: int):
+    """写入数据集（分批，模拟增量索引）"""
+    store = open_store(backend, data_dir)
+    ids, vectors, documents, metadatas = make_dataset(size, dim)
+    for start in range(0, size, 500):
+        end = start + 500
+        store.upsert(ids[start:end], vectors[start:end].tolist(), documents[start:end], metadatas[start:end])
+
+
+def measure(backend: str, data_dir: Path, dim: int, queries: int) -> dict:
+    """子进程中测量加载、查询和内存"""
+    rss_before = read_rss_mb()
+    
+    start = time.perf_counter()
+    store = open_store(backend, data_dir)
+    store.count()
+    load_ms = (time.perf_counter() - start) * 1000
+    
+    rng = np.random.default_rng(7)
+    query_vectors = rng.standard_normal((queries, dim)).astype(np.float32)
+    
+    # 预热
+    store.query(query_embeddings=[query_vectors[0].tolist()], n_results=5, where={"type": "move"})
+    
+    start = time.perf_counter()
+    for vector in query_vectors:
+        store.query(query_embeddings=[vector.tolist()], n_results=5, where={"type": "move"})
+    single_ms = (time.perf_counter() - start) * 1000 / queries
+    
+    start = time.perf_counter()
+    store.query(query_embeddings=query_vectors[:50].tolist(), n_results=5, where={"type": "move"})
+    batch_ms = (time.perf_counter() - start) * 1000
+    
+    return {
+        "backend": backend,
+        "load_ms": round(load_ms, 2),
+        "query_ms": round(single_ms, 3),
+        "batch50_ms": round(batch_ms, 3),
+        "rss_mb": round(read_rss_mb() - rss_before, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量存储后端性能对比")
+    parser.add_argument("--size", type=int, default=3000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        print(json.dumps(measure(args.child, Path(args.data_dir), args.dim, args.queries)))
+        return
+    
+    print("=" * 70)
+    print(f"  向量存储对比：{args.size}条 × {args.dim}维，{args.queries}次查询")
+    print("=" * 70)
+    
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in BACKENDS:
+            data_dir = Path(tmp) / backend
+            try:
+                populate(backend, data_dir, args.size, args.dim)
+            except ImportError as e:
+                print(f"  跳过 {backend}：依赖未安装（{e}）")
+                continue
+            
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", backend, "--data-dir", str(data_dir),
+                 "--dim", str(args.dim), "--queries", str(args.queries)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    
+    print(f"\n  {'后端':<8}{'加载(ms)':>12}{'单查询(ms)':>14}{'批量50(ms)':>14}{'RSS增量(MB)':>14}")
+    for r in results:
+        print(f"  {r['backend']:<8}{r['load_ms']:>12}{r['query_ms']:>14}{r['batch50_ms']:>14}{r['rss_mb']:>14}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+导出嵌入模型为 ONNX（可选int8动态量化）
+
+生成的目录可直接用于 config.yaml：
+    rag:
+      embedding_model: "onnx:data/onnx/all-MiniLM-L6-v2"
+
+用法：
+    python export_onnx_model.py [--model sentence-transformers/all-MiniLM-L6-v2]
+                                [--output data/onnx/all-MiniLM-L6-v2] [--no-quantize]
+
+依赖（仅导出时需要）：torch、transformers、onnx、onnxruntime
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+DEFAULT_OUTPUT = "data/onnx/all-MiniLM-L6-v2"
+
+
+def export(model_name: str, output_dir: Path, quantize: bool = True, opset: int = 14):
+    """导出 transformer 主干（token embeddings），池化和归一化在推理端完成"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(output_dir)  # 写出 tokenizer.json
+    
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+    
+    model_path = output_dir / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(model_path),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    print(f"✅ 已导出：{model_path}（{model_path.stat().st_size / 1024 / 1024:.1f} MB）")
+    
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        
+        quantized_path = output_dir / "model_int8.onnx"
+        quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+        print(f"✅ 已量化：{quantized_path}（{quantized_path.stat().st_size / 1024 / 1024:.1f} MB）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出嵌入模型为ONNX")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--no-quantize", action="store_true", help="只导出FP32模型")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+    
+    export(args.model, Path(args.output), quantize=not args.no_quantize, opset=args.opset)
+    print(f"\n在 config.yaml 中设置：embedding_model: \"onnx:{args.output}\"")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ CobbleSeer MCP Server - 主入口
 
 import sys
 import asyncio
+import threading
 from pathlib import Path
 from typing import Optional, List
 import yaml
@@ -30,6 +31,9 @@ from services.rag_service import RAGService
 from services.builder import Builder
 from services.validator import Validator
 from services.move_generator import MoveGenerator
+from services.reference_search import ReferenceSearch
+from services.reference_watcher import ReferenceWatcher
+from services.template_library import TemplateLibrary
 
 # ==================== 初始化 ====================
 
@@ -92,10 +96,12 @@ config = load_config()
 # 初始化服务
 logger.info("初始化服务...")
 rag_service = RAGService(config)
-ai_generator = AIGenerator(config, rag_service=rag_service)
-builder = Builder(config)
-validator = Validator(config)
-move_generator = MoveGenerator()  # 规则引擎（无需配置）
+template_library = TemplateLibrary.from_config(config)
+ai_generator = AIGenerator(config, rag_service=rag_service, template_library=template_library)
+reference_search = ReferenceSearch(config, rag_service=rag_service, template_library=template_library)
+builder = Builder(config, template_library=template_library)
+validator = Validator(config, template_library=template_library)
+move_generator = MoveGenerator(template_library=template_library)  # 规则引擎（无需配置，模板库仅用于平衡参考）
 logger.info("服务初始化完成")
 
 # ==================== 数据模型 ====================
@@ -224,7 +230,7 @@ async def create_pokemon(
     try:
         from services.builder import Builder
         
-        builder = Builder(config)
+        builder = Builder(config, template_library=template_library)
         
         # 转换为字典
         data_dict = {
@@ -238,8 +244,8 @@ async def create_pokemon(
             "base_friendship": form_data.base_friendship
         }
         
-        # 构建所有文件
-        files = builder.build_all(data_dict)
+        # 构建所有文件（首次使用时要建立学习表/名称索引，放到工作线程中）
+        files = await asyncio.to_thread(builder.build_all, data_dict)
         
         logger.info("✅ 基础文件生成完成")
         
@@ -296,45 +302,40 @@ async def generate_moves(
     
     results = []
     
-    for i, desc in enumerate(descriptions, 1):
-        logger.info(f"  [{i}/{len(descriptions)}] {desc[:50]}...")
-        
-        try:
-            # 使用 AI Generator 生成技能
-            move_data = await ai_generator.generate_move(
-                description=desc,
-                auto_reference=auto_reference
-            )
-            
-            if move_data.get("success"):
-                results.append({
-                    "description": desc,
-                    "code": move_data.get("code", ""),
-                    "name": move_data.get("name", "Unknown"),
-                    "type": move_data.get("type", "Normal"),
-                    "category": move_data.get("category", "Physical"),
-                    "basePower": move_data.get("basePower", 0),
-                    "valid": True,
-                    "errors": []
-                })
-                logger.info(f"    ✅ 完成：{move_data.get('name', 'Unknown')}")
-            else:
-                results.append({
-                    "description": desc,
-                    "code": "",
-                    "valid": False,
-                    "errors": [move_data.get("error", "未知错误")]
-                })
-                logger.error(f"    ❌ 失败：{move_data.get('error')}")
-            
-        except Exception as e:
-            logger.error(f"    ❌ 生成失败：{e}")
+    try:
+        # 参考技能通过一次批量检索获取
+        move_results = await ai_generator.generate_moves_batch(
+            descriptions=descriptions,
+            auto_reference=auto_reference
+        )
+    except Exception as e:
+        logger.error(f"    ❌ 生成失败：{e}")
+        return [
+            {"description": desc, "code": "", "valid": False, "errors": [str(e)]}
+            for desc in descriptions
+        ]
+    
+    for desc, move_data in zip(descriptions, move_results):
+        if move_data.get("success"):
+            results.append({
+                "description": desc,
+                "code": move_data.get("code", ""),
+                "name": move_data.get("name", "Unknown"),
+                "type": move_data.get("type", "Normal"),
+                "category": move_data.get("category", "Physical"),
+                "basePower": move_data.get("basePower", 0),
+                "valid": True,
+                "errors": []
+            })
+            logger.info(f"    ✅ 完成：{move_data.get('name', 'Unknown')}")
+        else:
             results.append({
                 "description": desc,
                 "code": "",
                 "valid": False,
-                "errors": [str(e)]
+                "errors": [move_data.get("error", "未知错误")]
             })
+            logger.error(f"    ❌ 失败：{move_data.get('error')}")
     
     return results
 
@@ -358,43 +359,38 @@ async def generate_abilities(
     
     results = []
     
-    for i, desc in enumerate(descriptions, 1):
-        logger.info(f"  [{i}/{len(descriptions)}] {desc[:50]}...")
-        
-        try:
-            # 使用 AI Generator 生成特性
-            ability_data = await ai_generator.generate_ability(
-                description=desc,
-                auto_reference=auto_reference
-            )
-            
-            if ability_data.get("success"):
-                results.append({
-                    "description": desc,
-                    "code": ability_data.get("code", ""),
-                    "name": ability_data.get("name", "Unknown"),
-                    "rating": ability_data.get("rating", 0),
-                    "valid": True,
-                    "errors": []
-                })
-                logger.info(f"    ✅ 完成：{ability_data.get('name', 'Unknown')}")
-            else:
-                results.append({
-                    "description": desc,
-                    "code": "",
-                    "valid": False,
-                    "errors": [ability_data.get("error", "未知错误")]
-                })
-                logger.error(f"    ❌ 失败：{ability_data.get('error')}")
-            
-        except Exception as e:
-            logger.error(f"    ❌ 生成失败：{e}")
+    try:
+        # 参考特性通过一次批量检索获取
+        ability_results = await ai_generator.generate_abilities_batch(
+            descriptions=descriptions,
+            auto_reference=auto_reference
+        )
+    except Exception as e:
+        logger.error(f"    ❌ 生成失败：{e}")
+        return [
+            {"description": desc, "code": "", "valid": False, "errors": [str(e)]}
+            for desc in descriptions
+        ]
+    
+    for desc, ability_data in zip(descriptions, ability_results):
+        if ability_data.get("success"):
+            results.append({
+                "description": desc,
+                "code": ability_data.get("code", ""),
+                "name": ability_data.get("name", "Unknown"),
+                "rating": ability_data.get("rating", 0),
+                "valid": True,
+                "errors": []
+            })
+            logger.info(f"    ✅ 完成：{ability_data.get('name', 'Unknown')}")
+        else:
             results.append({
                 "description": desc,
                 "code": "",
                 "valid": False,
-                "errors": [str(e)]
+                "errors": [ability_data.get("error", "未知错误")]
             })
+            logger.error(f"    ❌ 失败：{ability_data.get('error')}")
     
     return results
 
@@ -403,32 +399,212 @@ async def generate_abilities(
 async def search_reference(
     query: str,
     type: str = "moves",
-    limit: int = 5
-) -> List[dict]:
+    limit: int = 5,
+    move_type: str = None,
+    category: str = None,
+    power_min: int = None,
+    power_max: int = None,
+    min_similarity: float = None,
+    cursor: str = None,
+    fields: List[str] = None,
+    include_content: bool = False
+) -> dict:
     """
     从参考库搜索相似数据
     
+    RAG启用时使用混合检索并按相似度阈值截断，否则在本地参考文件中做关键词检索。
+    默认只返回精简字段和摘要，需要完整文档时设置 include_content。
+    
     Args:
         query: 搜索关键词
         type: 搜索类型（moves/abilities/pokemon）
-        limit: 返回结果数量
+        limit: 每页结果数量（最多50）
+        move_type: 技能属性过滤（如 Fire）
+        category: 技能分类过滤（Physical/Special/Status）
+        power_min: 最低威力
+        power_max: 最高威力
+        min_similarity: 相似度下限（默认 rag.similarity_threshold）
+        cursor: 分页游标（上一页返回的 next_cursor）
+        fields: 返回的字段列表（默认精简字段）
+        include_content: 是否返回完整文档
     
     Returns:
-        相似内容列表
+        {"results": [...], "next_cursor": "...", "source": "rag" | "templates"}
     """
     logger.info(f"🔍 搜索参考：{query} (类型: {type}, 限制: {limit})")
     
-    # TODO: 实现RAG检索
+    try:
+        return await reference_search.search(
+            query,
+            data_type=type,
+            limit=limit,
+            move_type=move_type,
+            category=category,
+            power_min=power_min,
+            power_max=power_max,
+            min_similarity=min_similarity,
+            cursor=cursor,
+            fields=fields,
+            include_content=include_content
+        )
     
-    return [
-        {
-            "name": "示例技能1",
-            "basePower": 90,
-            "accuracy": 100,
-            "type": "Fire",
-            "similarity": 0.85
+    except Exception as e:
+        logger.error(f"❌ 参考检索失败：{e}")
+        return {
+            "success": False,
+            "error": str(e)
         }
-    ]
+
+
+@mcp.tool()
+async def query_templates(
+    move_type: str = None,
+    category: str = None,
+    power_min: int = None,
+    power_max: int = None,
+    has_priority: bool = None,
+    has_secondary: bool = None,
+    effect: str = None,
+    flags: List[str] = None,
+    sort: str = None,
+    fields: List[str] = None,
+    limit: int = 20,
+    cursor: str = None
+) -> dict:
+    """
+    结构化查询技能模板（在服务器端的模板库索引上过滤、排序、分页）
+    
+    与 search_reference 不同，不做文本相似度检索，只按条件精确筛选参考技能。
+    
+    Args:
+        move_type: 技能属性（如 Fire）
+        category: 技能分类（Physical/Special/Status）
+        power_min: 最低威力
+        power_max: 最高威力
+        has_priority: 是否有优先度
+        has_secondary: 是否有追加效果
+        effect: 效果类型（burn/paralyze/poison/sleep/freeze/drain/recoil/boost_*/lower_*）
+        flags: 必须具备的标志（如 ["contact", "punch"]）
+        sort: 排序列（num/basePower/accuracy/pp/priority/id），前缀 "-" 表示降序（如 "-basePower"）
+        fields: 返回的技能字段（默认 id/name/type/category/basePower/accuracy/pp/priority）
+        limit: 每页结果数量（最多50）
+        cursor: 分页游标（上一页返回的 next_cursor）
+    
+    Returns:
+        {"type": "move", "total": 总数, "results": [...], "next_cursor": "..."}
+    """
+    logger.info(f"🔍 查询技能模板（属性: {move_type}, 分类: {category}, 效果: {effect}, 排序: {sort}）")
+    
+    try:
+        return reference_search.query_templates(
+            move_type=move_type,
+            category=category,
+            power_min=power_min,
+            power_max=power_max,
+            has_priority=has_priority,
+            has_secondary=has_secondary,
+            effect=effect,
+            flags=flags,
+            sort=sort,
+            fields=fields,
+            limit=limit,
+            cursor=cursor
+        )
+    
+    except Exception as e:
+        logger.error(f"❌ 模板查询失败：{e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
+@mcp.tool()
+async def resolve_name(
+    query: str,
+    kind: str = None,
+    limit: int = 5,
+    autocomplete: bool = False
+) -> dict:
+    """
+    解析技能 / 特性名称（容忍拼写错误、部分输入和中文名）
+    
+    例如 "thundr" -> thunder，"flamethrow" -> flamethrower，"十万伏特" -> thunderbolt。
+    在内存中的名称索引上查询，不做嵌入检索。
+    
+    Args:
+        query: 名称（ID、英文名或语言文件中的翻译名）
+        kind: 类型（move / ability，默认两者都查）
+        limit: 最多返回数量（最多50）
+        autocomplete: True 时只返回以输入开头的名称（补全）
+    
+    Returns:
+        {"query": 输入, "results": [{"id", "kind", "name", "matched", "score", "match"}, ...]}
+    """
+    logger.info(f"🔤 解析名称：{query}（类型: {kind}, 补全: {autocomplete}）")
+    
+    try:
+        return reference_search.resolve_name(query, kind=kind, limit=limit, autocomplete=autocomplete)
+    
+    except Exception as e:
+        logger.error(f"❌ 名称解析失败：{e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
+@mcp.tool()
+async def ingest_reference(
+    types: List[str] = None,
+    force: bool = False
+) -> dict:
+    """
+    管理工具：将参考库导入RAG向量库
+    
+    读取 rag.reference_paths 中的技能/特性/宝可梦参考数据，
+    多进程批量向量化后增量写入（内容未变化的条目自动跳过，参考库中已删除的条目同步移除）。
+    
+    Args:
+        types: 导入的数据类型（move/ability/pokemon，默认全部）
+        force: 是否强制重新索引全部条目
+    
+    Returns:
+        导入报告（各阶段耗时与数量）
+    """
+    logger.info(f"📚 导入参考库：{types or '全部'}")
+    
+    if not rag_service.enabled:
+        return {
+            "success": False,
+            "error": "RAG服务已禁用（rag.enabled = false）"
+        }
+    
+    try:
+        from services.ingest import ReferenceIngestor
+        
+        ingestor = ReferenceIngestor(config, rag_service, template_library=template_library)
+        return await asyncio.to_thread(ingestor.run, types=types, force=force)
+        
+    except Exception as e:
+        logger.error(f"❌ 导入失败：{e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
+@mcp.tool()
+async def cache_stats() -> dict:
+    """
+    管理工具：查看语义缓存命中率
+    
+    Returns:
+        命中/未命中/防误命中拒绝次数、条目数和命中率
+    """
+    stats = ai_generator.semantic_cache.get_stats()
+    logger.info(f"♻️  语义缓存：命中率 {stats['hit_rate']:.1%}（{stats['entries']}条）")
+    return stats
 
 
 @mcp.tool()
@@ -456,27 +632,29 @@ async def validate_package(files: dict) -> dict:
 @mcp.tool()
 async def build_package(
     project_name: str,
-    files: dict
+    files: dict,
+    output_format: str = "folder"
 ) -> dict:
     """
-    构建资源包（文件夹格式，无需压缩）
+    构建资源包
     
     Args:
         project_name: 项目名称
         files: 文件内容字典
+        output_format: 输出格式（folder: 文件夹，zip: 压缩包，diff: 只与已生成的文件夹比较、不写入）
     
     Returns:
-        构建结果（包含依赖信息）
+        构建结果（包含依赖信息；diff 格式附带 added/changed/unchanged/removed 文件列表）
     """
     logger.info(f"📦 构建资源包：{project_name}")
     
     try:
         from services.builder import Builder
         
-        builder = Builder(config)
-        result = builder.build_package(project_name, files)
+        builder = Builder(config, template_library=template_library)
+        result = await builder.build_package_async(project_name, files, output_format)
         
-        logger.info(f"✅ 资源包构建完成：{result['output_path']}")
+        logger.info(f"✅ 资源包构建完成：{result.get('output_path')}")
         return result
         
     except Exception as e:
@@ -600,7 +778,8 @@ async def create_move(
             "name": "技能名称",
             "type": "属性",
             "category": "分类",
-            "basePower": 威力
+            "basePower": 威力,
+            "balance_hints": [数值最接近的同属性同分类真实技能...]（有参考技能数据时）
         }
     """
     logger.info(f"🔧 创建技能：{name} ({type} {category})")
@@ -844,6 +1023,32 @@ def print_banner():
     ))
 
 
+def start_reference_watcher():
+    """参考文件热重载（rag.reference_watch.enabled）"""
+    reference_watcher = ReferenceWatcher.from_config(config, template_library)
+    if reference_watcher:
+        reference_watcher.start()
+
+
+def preload_templates():
+    """后台线程预加载参考文件（解析结果进入模板库和磁盘缓存，首个请求不再等待解析）"""
+    def run():
+        try:
+            report = template_library.preload()
+        except Exception as e:
+            logger.warning(f"⚠️ 参考文件预加载失败：{e}")
+            return
+        for name, entry in report.items():
+            if "error" in entry:
+                logger.warning(f"⚠️ 预加载 {name}：{entry['error']}")
+            elif entry["items"] is None:
+                logger.info(f"📚 {name} 文件较大，推迟到首次使用时加载")
+            else:
+                logger.info(f"📚 预加载 {name}：{entry['items']}项（{entry['source']}，{entry['seconds']}s）")
+    
+    threading.Thread(target=run, name="template-preload", daemon=True).start()
+
+
 def main():
     """主函数"""
     # 检查命令行参数
@@ -854,6 +1059,8 @@ def main():
         setup_logging()
         print_banner()
         logger.info("🌐 启动 HTTP 模式...")
+        start_reference_watcher()
+        preload_templates()
         # HTTP模式（用于Web UI）
         import uvicorn
         uvicorn.run(
@@ -866,6 +1073,8 @@ def main():
         # stdio模式（Cursor）- 不能有任何额外输出
         # 禁用所有日志输出到 stderr
         logger.remove()
+        start_reference_watcher()
+        preload_templates()
         # 直接运行MCP服务器
         mcp.run()
 
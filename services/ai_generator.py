@@ -15,6 +15,8 @@ CobbleSeer - AI生成服务
 from typing import List, Optional, Dict, Any
 from loguru import logger
 
+from services.semantic_cache import SemanticCache
+
 
 class AIGenerator:
     """
@@ -26,17 +28,22 @@ class AIGenerator:
     3. 混合模式（智能切换）
     """
     
-    def __init__(self, config: dict, rag_service=None):
+    def __init__(self, config: dict, rag_service=None, template_library=None):
         """
         初始化AI生成器
         
         Args:
             config: 配置字典
             rag_service: RAG服务实例（可选）
+            template_library: 模板库（可选，特性提示词从中取相关的事件处理器代码片段）
         """
         self.config = config
         self.mode = config.get("ai", {}).get("mode", "local")
         self.rag_service = rag_service
+        self.template_library = template_library
+        
+        # 语义缓存：改写过的相同描述直接复用历史生成结果
+        self.semantic_cache = SemanticCache(config)
         
         # 初始化云端客户端
         if self.mode in ["cloud", "hybrid"]:
@@ -102,6 +109,8 @@ class AIGenerator:
         - 复杂描述（≥50字）→ 使用云端AI
         - 本地失败 → 自动降级云端
         
+        语义缓存中有改写前的相同需求时直接返回历史结果（结果中带 cache 字段）。
+        
         Args:
             description: 技能描述
             auto_reference: 是否自动RAG检索参考
@@ -109,14 +118,92 @@ class AIGenerator:
         Returns:
             包含生成结果的字典
         """
-        # 获取参考技能
-        references = []
-        if auto_reference and self.rag_service:
+        return (await self.generate_moves_batch([description], auto_reference))[0]
+    
+    async def generate_moves_batch(
+        self,
+        descriptions: List[str],
+        auto_reference: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        批量生成技能代码
+        
+        描述一次向量化：先查语义缓存，未命中的描述通过一次批量RAG检索
+        获取参考技能（复用同一组向量），再逐个生成并写入缓存。
+        单个描述生成出错时只影响该描述的结果（success=False），其余描述照常生成。
+        
+        Args:
+            descriptions: 技能描述列表
+            auto_reference: 是否自动RAG检索参考
+        
+        Returns:
+            与 descriptions 顺序一致的生成结果列表
+        """
+        embeddings = self._embed_descriptions(descriptions)
+        results: List[Optional[Dict[str, Any]]] = [
+            self.semantic_cache.lookup(description, embedding)
+            for description, embedding in zip(descriptions, embeddings)
+        ]
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        references_list = await self._search_references_batch(
+            "move",
+            [descriptions[i] for i in pending],
+            auto_reference,
+            [embeddings[i] for i in pending] if all(embeddings[i] is not None for i in pending) else None
+        )
+        
+        for n, (i, references) in enumerate(zip(pending, references_list), 1):
+            if len(descriptions) > 1:
+                logger.info(f"  [{n}/{len(pending)}] {descriptions[i][:50]}...")
             try:
-                references = await self.rag_service.search_moves(description, top_k=3)
+                results[i] = await self._generate_move_with_references(descriptions[i], references)
             except Exception as e:
-                logger.warning(f"RAG检索失败：{e}")
+                logger.error(f"生成技能失败：{e}")
+                results[i] = {"success": False, "error": str(e), "code": ""}
+            self.semantic_cache.store(descriptions[i], embeddings[i], results[i])
+        
+        if self.semantic_cache.enabled and embeddings and embeddings[0] is not None:
+            logger.debug(f"语义缓存：{self.semantic_cache.get_stats()}")
+        return results
+    
+    def _embed_descriptions(self, descriptions: List[str]) -> List[Optional[List[float]]]:
+        """用RAG的嵌入模型向量化描述（不可用时返回 None 列表，语义缓存随之跳过）"""
+        if not self.semantic_cache.enabled or not self.rag_service:
+            return [None for _ in descriptions]
+        
+        try:
+            embeddings = self.rag_service.encode(descriptions)
+        except Exception as e:
+            logger.warning(f"描述向量化失败：{e}")
+            embeddings = None
+        return embeddings if embeddings else [None for _ in descriptions]
+    
+    async def _search_references_batch(
+        self,
+        data_type: str,
+        descriptions: List[str],
+        auto_reference: bool,
+        embeddings: Optional[List[List[float]]] = None
+    ) -> List[List[dict]]:
+        """批量获取参考（技能/特性），失败时返回空参考"""
+        if not auto_reference or not self.rag_service or not descriptions:
+            return [[] for _ in descriptions]
         
+        try:
+            if data_type == "move":
+                return await self.rag_service.search_moves_batch(descriptions, top_k=3, query_embeddings=embeddings)
+            return await self.rag_service.search_abilities_batch(descriptions, top_k=3)
+        except Exception as e:
+            logger.warning(f"RAG批量检索失败：{e}")
+            return [[] for _ in descriptions]
+    
+    async def _generate_move_with_references(
+        self,
+        description: str,
+        references: List[dict]
+    ) -> Dict[str, Any]:
+        """根据已检索的参考生成技能代码"""
         try:
             if self.mode == "cloud":
                 code = await self._generate_cloud(description, references)
@@ -358,6 +445,44 @@ class AIGenerator:
             except Exception as e:
                 logger.warning(f"RAG检索失败：{e}")
         
+        return await self._generate_ability_with_references(description, references)
+    
+    async def generate_abilities_batch(
+        self,
+        descriptions: List[str],
+        auto_reference: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        批量生成特性代码（一次批量RAG检索获取全部参考）
+        
+        单个描述生成出错时只影响该描述的结果（success=False），其余描述照常生成。
+        
+        Args:
+            descriptions: 特性描述列表
+            auto_reference: 是否自动RAG检索参考
+        
+        Returns:
+            与 descriptions 顺序一致的生成结果列表
+        """
+        references_list = await self._search_references_batch("ability", descriptions, auto_reference)
+        
+        results = []
+        for i, (description, references) in enumerate(zip(descriptions, references_list), 1):
+            logger.info(f"  [{i}/{len(descriptions)}] {description[:50]}...")
+            try:
+                results.append(await self._generate_ability_with_references(description, references))
+            except Exception as e:
+                logger.error(f"生成特性失败：{e}")
+                results.append({"success": False, "error": str(e), "code": ""})
+        
+        return results
+    
+    async def _generate_ability_with_references(
+        self,
+        description: str,
+        references: List[dict]
+    ) -> Dict[str, Any]:
+        """根据已检索的参考生成特性代码"""
         try:
             # 构建特性生成的Prompt
             prompt = self._build_ability_prompt(description, references)
@@ -389,13 +514,25 @@ class AIGenerator:
         description: str, 
         references: List[dict]
     ) -> str:
-        """构建特性生成Prompt"""
+        """构建特性生成Prompt（有相关事件处理器片段时，参考特性只保留摘要行）"""
+        
+        snippets = self._handler_snippets(description)
         
         ref_text = ""
         if references:
             ref_text = "\n\n参考以下相似特性：\n"
             for ref in references[:3]:
-                ref_text += f"- {ref.get('name', '')}: {ref.get('content', '')}\n"
+                content = ref.get('content', '')
+                if snippets:
+                    content = content.split("\n", 1)[0]
+                ref_text += f"- {ref.get('name', '')}: {content}\n"
+        
+        rules = ""
+        if snippets:
+            ref_text += "\n\n相关事件处理器（真实特性的代码片段）：\n"
+            for snippet in snippets:
+                ref_text += f"// {snippet['item']}\n{snippet['code']}\n"
+            rules = "\n5. 需要触发效果时添加事件处理器，写法参照上面的代码片段"
         
         return f"""基于以下描述生成Cobblemon特性（Showdown格式JavaScript）。
 
@@ -407,7 +544,7 @@ class AIGenerator:
 1. 返回完整的JavaScript对象（不要exports语句）
 2. 必须包含：num（负数）、name、rating、shortDesc
 3. 数值合理平衡
-4. 直接输出代码，不要任何解释
+4. 直接输出代码，不要任何解释{rules}
 
 示例格式：
 {{
@@ -420,6 +557,17 @@ class AIGenerator:
 请生成：
 """
     
+    def _handler_snippets(self, description: str) -> List[Dict[str, str]]:
+        """描述相关的真实事件处理器片段（无模板库或特性文件时为空）"""
+        if self.template_library is None:
+            return []
+        try:
+            index = self.template_library.get_handler_index("abilities")
+            return index.snippets_for(description) if index else []
+        except Exception as e:
+            logger.warning(f"事件处理器片段获取失败：{e}")
+            return []
+    
     async def _generate_local_ability(self, prompt: str) -> str:
         """本地AI生成特性"""
         
@@ -0,0 +1,233 @@
+"""
+CobbleSeer - 资源包构建计划与输出目标
+
+Builder.plan_package 只决定文件路径并渲染内容，得到不可变的 BuildPlan
+（相对路径 -> UTF-8 字节）；输出目标（PackageSink）只负责 I/O：
+
+- FolderSink: 写入目录（一次性建目录 + 线程池并发写入）
+- ZipSink: 打包为 zip（可直接放入 datapacks）
+- MemorySink: 保存在内存中（预览、测试、上传）
+- DiffSink: 与已有目录比较，不写入
+
+同一个计划可以依次交给多个输出目标（如先 DiffSink 预览再 FolderSink 写入），内容只渲染一次。
+"""
+
+import hashlib
+import zipfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Tuple
+
+
+class BuildPlan:
+    """资源包构建计划（只读）"""
+    
+    __slots__ = ("name", "files", "dependencies")
+    
+    def __init__(self, name: str, entries: Iterable[Tuple[str, bytes]], dependencies: Iterable[str] = ()):
+        """
+        Args:
+            name: 资源包名称（目录名 / zip 文件名）
+            entries: (相对路径, 内容)，路径使用 "/" 分隔；重复路径以后出现的为准
+            dependencies: 依赖的模组列表
+        """
+        files: Dict[str, bytes] = {}
+        for path, data in entries:
+            if path.startswith("/") or ".." in path.split("/"):
+                raise ValueError(f"构建计划中的路径必须是包内相对路径: {path}")
+            files[path] = bytes(data)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "files", MappingProxyType(files))
+        object.__setattr__(self, "dependencies", tuple(dependencies))
+    
+    def __setattr__(self, key, value):
+        raise AttributeError("BuildPlan 是只读的")
+    
+    def __len__(self) -> int:
+        return len(self.files)
+    
+    def __iter__(self) -> Iterator[Tuple[str, bytes]]:
+        return iter(self.files.items())
+    
+    def __contains__(self, path: object) -> bool:
+        return path in self.files
+    
+    @property
+    def total_size(self) -> int:
+        """所有文件的总字节数"""
+        return sum(len(data) for data in self.files.values())
+    
+    def digest(self) -> str:
+        """内容指纹（路径和内容都参与，与文件顺序无关）"""
+        hasher = hashlib.sha256()
+        for path in sorted(self.files):
+            data = self.files[path]
+            hasher.update(path.encode("utf-8") + b"\0" + len(data).to_bytes(8, "little"))
+            hasher.update(data)
+        return hasher.hexdigest()
+
+
+class PackageSink(ABC):
+    """构建计划的输出目标"""
+    
+    format = "base"
+    
+    @abstractmethod
+    def write(self, plan: BuildPlan) -> Dict[str, Any]:
+        """
+        输出构建计划
+        
+        Returns:
+            输出结果（如 {"output_path": ...}），合并进 build_package 的返回值
+        """
+
+
+class FolderSink(PackageSink):
+    """写入目录 <root>/<计划名称>/"""
+    
+    format = "folder"
+    
+    def __init__(self, root: Path, workers: int = 4):
+        """
+        Args:
+            root: 输出根目录
+            workers: 并发写文件的线程数
+        """
+        self.root = Path(root)
+        self.workers = workers
+    
+    def write(self, plan: BuildPlan) -> Dict[str, Any]:
+        output_path = self.root / plan.name
+        output_path.mkdir(parents=True, exist_ok=True)
+        
+        # 只对最深的目录 mkdir，祖先目录随之创建
+        directories = {(output_path / path).parent for path in plan.files}
+        ancestors = {parent for directory in directories for parent in directory.parents}
+        for directory in sorted(directories - ancestors):
+            directory.mkdir(parents=True, exist_ok=True)
+        
+        def write(entry: Tuple[str, bytes]):
+            path, data = entry
+            (output_path / path).write_bytes(data)
+        
+        workers = max(1, min(self.workers, len(plan)))
+        if workers == 1:
+            for entry in plan:
+                write(entry)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pack-writer") as executor:
+                list(executor.map(write, plan))
+        
+        return {"output_path": str(output_path)}
+
+
+class ZipSink(PackageSink):
+    """打包为 <root>/<计划名称>.zip（pack.mcmeta 位于压缩包根目录）"""
+    
+    format = "zip"
+    
+    def __init__(self, root: Path, compression: int = zipfile.ZIP_DEFLATED):
+        """
+        Args:
+            root: 输出根目录
+            compression: zipfile 压缩方式
+        """
+        self.root = Path(root)
+        self.compression = compression
+    
+    def write(self, plan: BuildPlan) -> Dict[str, Any]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        output_path = self.root / f"{plan.name}.zip"
+        # 先写临时文件再替换，写到一半失败时不留下损坏的压缩包
+        temp_path = output_path.with_name(output_path.name + ".tmp")
+        with zipfile.ZipFile(temp_path, "w", compression=self.compression) as archive:
+            for path, data in plan:
+                archive.writestr(path, data)
+        temp_path.replace(output_path)
+        return {"output_path": str(output_path), "archive_bytes": output_path.stat().st_size}
+
+
+class MemorySink(PackageSink):
+    """保存在内存中（files: 相对路径 -> 内容，多次写入时以最后一次为准）"""
+    
+    format = "memory"
+    
+    def __init__(self):
+        self.files: Mapping[str, bytes] = MappingProxyType({})
+    
+    def write(self, plan: BuildPlan) -> Dict[str, Any]:
+        # 计划本身只读，直接引用，不复制内容
+        self.files = plan.files
+        return {"file_count": len(plan)}
+
+
+class DiffSink(PackageSink):
+    """与 <root>/<计划名称>/ 中已有的文件比较（只读，不写入）"""
+    
+    format = "diff"
+    
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: 输出根目录
+        """
+        self.root = Path(root)
+    
+    def write(self, plan: BuildPlan) -> Dict[str, Any]:
+        output_path = self.root / plan.name
+        added: List[str] = []
+        changed: List[str] = []
+        unchanged: List[str] = []
+        for path, data in plan:
+            target = output_path / path
+            if not target.is_file():
+                added.append(path)
+            # 大小不同时不必读取内容
+            elif target.stat().st_size != len(data) or target.read_bytes() != data:
+                changed.append(path)
+            else:
+                unchanged.append(path)
+        
+        existing = [
+            path.relative_to(output_path).as_posix() for path in output_path.rglob("*") if path.is_file()
+        ] if output_path.is_dir() else []
+        removed = sorted(path for path in existing if path not in plan)
+        
+        return {
+            "output_path": str(output_path),
+            "diff": {
+                "added": sorted(added),
+                "changed": sorted(changed),
+                "unchanged": sorted(unchanged),
+                "removed": removed
+            }
+        }
+
+
+# build_package 的 output_format 参数 -> 输出目标
+SINK_FORMATS = ("folder", "zip", "memory", "diff")
+
+
+def create_sink(output_format: str, root: Path, workers: int = 4) -> PackageSink:
+    """
+    根据格式名称创建输出目标
+    
+    Args:
+        output_format: folder / zip / memory / diff
+        root: 输出根目录
+        workers: 目录输出时并发写文件的线程数
+    
+    Returns:
+        输出目标
+    """
+    if output_format == "folder":
+        return FolderSink(root, workers=workers)
+    if output_format == "zip":
+        return ZipSink(root)
+    if output_format == "memory":
+        return MemorySink()
+    if output_format == "diff":
+        return DiffSink(root)
+    raise ValueError(f"未知的输出格式: {output_format}（可选 {' / '.join(SINK_FORMATS)}）")
@@ -9,17 +9,23 @@ CobbleSeer - 文件构建服务
 - lang_zh.json / lang_en.json: 多语言
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 from pathlib import Path
+import asyncio
 import json
 import re
 from datetime import datetime
 from loguru import logger
 
+from services.build_plan import BuildPlan, PackageSink, create_sink
+
 
 class Builder:
     """文件构建器"""
     
+    # 技能表中的未知技能ID解析得分不低于此值时自动更正
+    MOVE_CORRECTION_SCORE = 0.6
+    
     @staticmethod
     def format_text_for_display(text: str, is_chinese: bool = True, max_length: int = 20) -> str:
         """
@@ -75,16 +81,20 @@ class Builder:
         
         return text
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, template_library=None):
         """
         初始化构建器
         
         Args:
             config: 配置字典
+            template_library: 模板库（提供学习表索引时按真实学习表生成技能表）
         """
         self.config = config
+        self.template_library = template_library
         self.namespace = config.get("builder", {}).get("defaults", {}).get("namespace", "cobbleseer")
         self.pack_format = config.get("builder", {}).get("defaults", {}).get("pack_format", 48)
+        # 打包时并发写文件的线程数
+        self.write_workers = config.get("builder", {}).get("write_workers", 4)
         
         # 确保使用绝对路径
         output_dir = config.get("builder", {}).get("output_dir", "output")
@@ -159,11 +169,12 @@ class Builder:
         if data.get("weight"):
             species["weight"] = data["weight"]
         
-        # 添加技能表（根据属性智能生成）
-        species["moves"] = self._generate_default_moves(
+        # 添加技能表（根据属性智能生成，并按参考技能校验ID）
+        species["moves"] = self._validate_moves(self._generate_default_moves(
             data.get("primary_type"),
-            data.get("secondary_type")
-        )
+            data.get("secondary_type"),
+            seed=data.get("name")
+        ))
         
         return species
     
@@ -356,62 +367,104 @@ class Builder:
         
         return required_mods
     
+    def plan_package(self, project_name: str, files: Dict[str, Any]) -> BuildPlan:
+        """
+        生成资源包构建计划（决定文件路径并渲染全部内容，不做任何 I/O）
+        
+        Args:
+            project_name: 项目名称（输出目录名 / zip 文件名）
+            files: 文件字典（build_all 的结果，可附加 data/mega_showdown/ 下的自定义文件）
+        
+        Returns:
+            只读的构建计划，可交给任意输出目标
+        """
+        dependencies = self.detect_dependencies(files)
+        pokemon_name = files.get("species", {}).get("name", project_name)
+        entries = self._render_package_files(pokemon_name, files, dependencies)
+        return BuildPlan(project_name, entries.items(), dependencies)
+    
+    def write_package(self, plan: BuildPlan, sink: PackageSink) -> Dict[str, Any]:
+        """
+        把构建计划交给输出目标
+        
+        Args:
+            plan: 构建计划
+            sink: 输出目标
+        
+        Returns:
+            构建结果（success / format / size_mb / dependencies 及输出目标的结果）
+        """
+        result = {
+            "success": True,
+            "format": sink.format,
+            # 大小按计划中的字节数计算，不再遍历输出目录
+            "size_mb": round(plan.total_size / (1024 * 1024), 2),
+            "dependencies": list(plan.dependencies),
+        }
+        result.update(sink.write(plan))
+        return result
+    
     def build_package(
         self,
         project_name: str,
-        files: Dict[str, Any]
+        files: Dict[str, Any],
+        output_format: Union[str, PackageSink] = "folder"
     ) -> Dict[str, Any]:
         """
-        构建资源包（仅文件夹格式）
+        构建资源包
         
         Args:
             project_name: 项目名称
             files: 文件字典
+            output_format: 输出格式（folder / zip / memory / diff）或输出目标实例
         
         Returns:
             构建结果
         """
         logger.info(f"📦 构建资源包: {project_name}")
         
-        # 使用已初始化的绝对路径
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 检测依赖
-        dependencies = self.detect_dependencies(files)
-        
-        pokemon_name = files.get("species", {}).get("name", project_name)
-        output_path = self.output_dir / project_name
-        output_path.mkdir(parents=True, exist_ok=True)
+        sink = output_format if isinstance(output_format, PackageSink) else create_sink(
+            output_format, self.output_dir, workers=self.write_workers
+        )
+        result = self.write_package(self.plan_package(project_name, files), sink)
         
-        # 创建文件夹格式的资源包
-        self._create_folder_package(output_path, pokemon_name, files, dependencies)
+        logger.info(f"✅ 资源包已生成: {result.get('output_path', sink.format)} ({result['size_mb']:.2f} MB)")
         
-        # 计算目录大小（递归统计所有文件）
-        total_size = sum(f.stat().st_size for f in output_path.rglob('*') if f.is_file())
-        size_mb = total_size / (1024 * 1024)
+        return result
+    
+    async def build_package_async(
+        self,
+        project_name: str,
+        files: Dict[str, Any],
+        output_format: Union[str, PackageSink] = "folder"
+    ) -> Dict[str, Any]:
+        """
+        在工作线程中构建资源包（供 MCP 工具调用，不阻塞事件循环）
         
-        logger.info(f"✅ 资源包已生成: {output_path} ({size_mb:.2f} MB)")
+        Args:
+            project_name: 项目名称
+            files: 文件字典
+            output_format: 输出格式或输出目标实例
         
-        return {
-            "success": True,
-            "output_path": str(output_path),
-            "format": "folder",
-            "size_mb": round(size_mb, 2),
-            "dependencies": dependencies
-        }
+        Returns:
+            构建结果（同 build_package）
+        """
+        return await asyncio.to_thread(self.build_package, project_name, files, output_format)
     
-    def _create_folder_package(self, output_path: Path, pokemon_name: str, files: Dict[str, Any], dependencies: list = None):
+    def _render_package_files(self, pokemon_name: str, files: Dict[str, Any], dependencies: list) -> Dict[str, bytes]:
         """
-        创建文件夹格式的资源包（按照结构树.txt标准）
+        渲染资源包中的所有文件（按照结构树.txt标准）
         
         Args:
-            output_path: 输出路径
             pokemon_name: 宝可梦名称
             files: 文件字典
             dependencies: 依赖的模组列表
+        
+        Returns:
+            包内相对路径 -> 内容（UTF-8 字节）
         """
-        if dependencies is None:
-            dependencies = ["Cobblemon"]
+        entries: Dict[str, bytes] = {}
+        
         # pack.mcmeta
         pack_mcmeta = {
             "pack": {
@@ -419,73 +472,44 @@ class Builder:
                 "description": f"Custom Pokemon: {pokemon_name}"
             }
         }
-        (output_path / "pack.mcmeta").write_text(
-            json.dumps(pack_mcmeta, indent=2, ensure_ascii=False),
-            encoding="utf-8"
-        )
+        entries["pack.mcmeta"] = self._encode(pack_mcmeta)
         
         # ========== DATA 目录 ==========
-        data_dir = output_path / "data" / "cobblemon"
+        data_dir = "data/cobblemon"
         
         # species.json (在 data/cobblemon/species/custom/)
         if "species" in files:
-            species_dir = data_dir / "species" / "custom"
-            species_dir.mkdir(parents=True, exist_ok=True)
-            (species_dir / f"{pokemon_name}.json").write_text(
-                json.dumps(files["species"], indent=2, ensure_ascii=False),
-                encoding="utf-8"
-            )
+            species_dir = f"{data_dir}/species/custom"
+            entries[f"{species_dir}/{pokemon_name}.json"] = self._encode(files["species"])
         
         # spawn.json (在 data/cobblemon/spawn_pool_world/)
         if "spawn" in files:
-            spawn_dir = data_dir / "spawn_pool_world"
-            spawn_dir.mkdir(parents=True, exist_ok=True)
-            (spawn_dir / f"{pokemon_name}.json").write_text(
-                json.dumps(files["spawn"], indent=2, ensure_ascii=False),
-                encoding="utf-8"
-            )
+            spawn_dir = f"{data_dir}/spawn_pool_world"
+            entries[f"{spawn_dir}/{pokemon_name}.json"] = self._encode(files["spawn"])
         
         # ========== 自定义技能/特性（Mega Showdown）==========
         # 处理所有以 data/mega_showdown 开头的文件
         for file_path, file_content in files.items():
             if isinstance(file_path, str) and file_path.startswith("data/mega_showdown/"):
-                # 解析路径
-                full_path = output_path / file_path
-                full_path.parent.mkdir(parents=True, exist_ok=True)
-                # 写入文件（JavaScript 代码直接写入，不用JSON）
-                if file_path.endswith('.js'):
-                    full_path.write_text(file_content, encoding="utf-8")
-                else:
-                    full_path.write_text(
-                        json.dumps(file_content, indent=2, ensure_ascii=False) if isinstance(file_content, dict) else file_content,
-                        encoding="utf-8"
-                    )
+                # JavaScript 代码直接写入，字典序列化为JSON
+                entries[file_path] = self._encode(file_content)
         
         # ========== ASSETS 目录 ==========
-        assets_dir = output_path / "assets" / "cobblemon"
-        bedrock_dir = assets_dir / "bedrock" / "pokemon"
+        assets_dir = "assets/cobblemon"
+        bedrock_dir = f"{assets_dir}/bedrock/pokemon"
         
         # poser.json (在 assets/cobblemon/bedrock/pokemon/posers/，直接放置)
         if "poser" in files:
-            poser_dir = bedrock_dir / "posers"
-            poser_dir.mkdir(parents=True, exist_ok=True)
-            (poser_dir / f"{pokemon_name}.json").write_text(
-                json.dumps(files["poser"], indent=2, ensure_ascii=False),
-                encoding="utf-8"
-            )
+            poser_dir = f"{bedrock_dir}/posers"
+            entries[f"{poser_dir}/{pokemon_name}.json"] = self._encode(files["poser"])
         
         # resolver.json (在 assets/cobblemon/bedrock/pokemon/resolvers/，0_name_base.json)
         if "resolver" in files:
-            resolver_dir = bedrock_dir / "resolvers"
-            resolver_dir.mkdir(parents=True, exist_ok=True)
-            (resolver_dir / f"0_{pokemon_name}_base.json").write_text(
-                json.dumps(files["resolver"], indent=2, ensure_ascii=False),
-                encoding="utf-8"
-            )
+            resolver_dir = f"{bedrock_dir}/resolvers"
+            entries[f"{resolver_dir}/0_{pokemon_name}_base.json"] = self._encode(files["resolver"])
         
         # 模型占位符 (assets/cobblemon/bedrock/pokemon/models/pokemon-name/)
-        model_dir = bedrock_dir / "models" / pokemon_name
-        model_dir.mkdir(parents=True, exist_ok=True)
+        model_dir = f"{bedrock_dir}/models/{pokemon_name}"
         model_placeholder = {
             "format_version": "1.12.0",
             "minecraft:geometry": [{
@@ -497,14 +521,10 @@ class Builder:
                 "bones": []
             }]
         }
-        (model_dir / f"{pokemon_name}.geo.json").write_text(
-            json.dumps(model_placeholder, indent=2, ensure_ascii=False),
-            encoding="utf-8"
-        )
+        entries[f"{model_dir}/{pokemon_name}.geo.json"] = self._encode(model_placeholder)
         
         # 动画占位符 (assets/cobblemon/bedrock/pokemon/animations/pokemon-name/)
-        animation_dir = bedrock_dir / "animations" / pokemon_name
-        animation_dir.mkdir(parents=True, exist_ok=True)
+        animation_dir = f"{bedrock_dir}/animations/{pokemon_name}"
         animation_placeholder = {
             "format_version": "1.8.0",
             "animations": {
@@ -515,14 +535,10 @@ class Builder:
                 }
             }
         }
-        (animation_dir / f"{pokemon_name}.animation.json").write_text(
-            json.dumps(animation_placeholder, indent=2, ensure_ascii=False),
-            encoding="utf-8"
-        )
+        entries[f"{animation_dir}/{pokemon_name}.animation.json"] = self._encode(animation_placeholder)
         
         # 纹理占位符说明 (assets/cobblemon/textures/pokemon/pokemon-name/)
-        texture_dir = assets_dir / "textures" / "pokemon" / pokemon_name
-        texture_dir.mkdir(parents=True, exist_ok=True)
+        texture_dir = f"{assets_dir}/textures/pokemon/{pokemon_name}"
         texture_readme = f"""# 纹理文件占位符
 
 请将以下纹理文件放置在此目录：
@@ -533,29 +549,26 @@ class Builder:
 纹理格式：PNG
 推荐分辨率：64x64 或 128x128
 """
-        (texture_dir / "README.txt").write_text(texture_readme, encoding="utf-8")
+        entries[f"{texture_dir}/README.txt"] = self._encode(texture_readme)
         
         # lang_zh.json (在 assets/cobblemon/lang/)
         if "lang_zh" in files:
-            lang_dir = assets_dir / "lang"
-            lang_dir.mkdir(parents=True, exist_ok=True)
-            (lang_dir / "zh_cn.json").write_text(
-                json.dumps(files["lang_zh"], indent=2, ensure_ascii=False),
-                encoding="utf-8"
-            )
+            lang_dir = f"{assets_dir}/lang"
+            entries[f"{lang_dir}/zh_cn.json"] = self._encode(files["lang_zh"])
         
         # lang_en.json (在 assets/cobblemon/lang/)
         if "lang_en" in files:
-            lang_dir = assets_dir / "lang"
-            lang_dir.mkdir(parents=True, exist_ok=True)
-            (lang_dir / "en_us.json").write_text(
-                json.dumps(files["lang_en"], indent=2, ensure_ascii=False),
-                encoding="utf-8"
-            )
-        
-        # README（按照结构树.txt标准，包含依赖信息）
+            lang_dir = f"{assets_dir}/lang"
+            entries[f"{lang_dir}/en_us.json"] = self._encode(files["lang_en"])
+        
+        # README（包含依赖信息）
         dex_number = files.get("species", {}).get("nationalPokedexNumber", 9999)
+        entries["README.md"] = self._encode(self._render_readme(pokemon_name, dex_number, dependencies))
         
+        return entries
+    
+    def _render_readme(self, pokemon_name: str, dex_number: int, dependencies: list) -> str:
+        """渲染资源包 README（按照结构树.txt标准）"""
         # 构建依赖信息部分
         dependencies_text = "\n".join(f"- **{mod}**" for mod in dependencies)
         needs_mega_showdown = "Mega Showdown" in dependencies
@@ -565,7 +578,7 @@ class Builder:
 **⚠️ 重要提示**：此数据包包含自定义技能或特性，必须安装 [Mega Showdown](https://modrinth.com/mod/mega-showdown) 模组才能正常使用！
 """
         
-        readme = f"""# {pokemon_name.upper()} Resource Pack
+        return f"""# {pokemon_name.upper()} Resource Pack
 
 ## 📦 所需模组
 
@@ -664,7 +677,13 @@ class Builder:
 *Generated by CobbleSeer MCP Server v1.0.0*
 *Structure based on 结构树.txt by 籌橾*
 """
-        (output_path / "README.md").write_text(readme, encoding="utf-8")
+    
+    @staticmethod
+    def _encode(content: Any) -> bytes:
+        """文件内容 -> UTF-8 字节（字典/列表序列化为缩进JSON，字符串原样写入）"""
+        if not isinstance(content, str):
+            content = json.dumps(content, indent=2, ensure_ascii=False)
+        return content.encode("utf-8")
     
     def _infer_biomes(self, primary_type: str, secondary_type: Optional[str] = None) -> list:
         """
@@ -705,17 +724,64 @@ class Builder:
         
         return biomes[:3]  # 最多返回3个群系
     
-    def _generate_default_moves(self, primary_type: str, secondary_type: Optional[str] = None) -> list:
+    def _validate_moves(self, moves: list) -> list:
+        """
+        用模板库的名称索引校验技能表中的技能ID
+        
+        不存在的技能ID解析到足够相近的真实技能时更正，否则保留并警告；
+        没有模板库或参考技能时原样返回。
+        
+        Args:
+            moves: 技能表字符串列表（"level:move_name" / "egg:move_name" / "tm:move_name"）
+        
+        Returns:
+            校验后的技能表
+        """
+        if self.template_library is None:
+            return moves
+        name_index = self.template_library.get_name_index()
+        if not name_index.ids["move"]:
+            return moves
+        
+        validated = []
+        for entry in moves:
+            prefix, _, move_id = entry.rpartition(":")
+            if not name_index.contains("move", move_id):
+                matches = name_index.resolve(move_id, kind="move", limit=1)
+                if matches and matches[0]["score"] >= self.MOVE_CORRECTION_SCORE:
+                    logger.warning(f"🔧 技能表中的 {move_id} 不存在，已更正为 {matches[0]['id']}")
+                    entry = f"{prefix}:{matches[0]['id']}"
+                else:
+                    logger.warning(f"⚠️ 技能表中的 {move_id} 不是已知技能")
+            validated.append(entry)
+        return validated
+    
+    def _generate_default_moves(
+        self,
+        primary_type: str,
+        secondary_type: Optional[str] = None,
+        seed: Optional[Any] = None
+    ) -> list:
         """
         根据属性智能生成默认技能表（Cobblemon 字符串格式）
         
+        模板库有学习表索引时，从真实物种的学习表中按属性和威力档位抽取技能、
+        按真实学会等级分布取等级；否则使用内置的属性技能表。
+        
         Args:
             primary_type: 主属性
             secondary_type: 副属性
+            seed: 随机种子（同一物种生成结果一致）
         
         Returns:
             技能表字符串列表（格式："level:move_name" 或 "egg:move_name" 或 "tm:move_name"）
         """
+        learnset_index = self.template_library.get_learnset_index() if self.template_library else None
+        if learnset_index:
+            moves = learnset_index.generate(primary_type, secondary_type, seed=seed)
+            if moves:
+                return moves
+        
         # 属性对应的核心技能库（Cobblemon 常用技能，使用小写+下划线）
         type_moves = {
             "Fire": ["ember", "flamethrower", "fireblast", "flamecharge", "firefang", "heatwave"],
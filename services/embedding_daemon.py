@@ -0,0 +1,397 @@
+"""
+CobbleSeer - 共享嵌入/检索守护进程
+
+每个编辑器窗口都会启动一个 stdio server.py，各自加载一份嵌入模型和向量库。
+守护进程在本地 Unix socket 上提供嵌入和向量存储服务，多个服务器实例共享
+同一个已预热的模型和索引：
+    
+    python -m services.embedding_daemon [--socket data/embedding.sock]
+
+RAGService 在 rag.daemon.enabled 为 true 且 socket 可连接时使用守护进程，
+否则（或运行中连接断开时）自动回退为进程内模型和向量库。
+
+协议：4字节大端长度 + JSON 消息；向量以 base64 编码的 float32 数组传输。
+"""
+
+import argparse
+import base64
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from services.vector_store import VectorStore
+
+
+# 默认 socket 路径（相对于项目根目录）
+DEFAULT_SOCKET = "data/embedding.sock"
+
+_HEADER = struct.Struct(">I")
+
+
+def daemon_supported() -> bool:
+    """当前平台是否支持 Unix socket（Windows 上回退为进程内模式）"""
+    return hasattr(socket, "AF_UNIX")
+
+
+def resolve_socket_path(config: dict) -> Path:
+    """读取 rag.daemon.socket（相对路径以项目根目录为基准）"""
+    from services.template_library import resolve_project_path
+    
+    daemon_config = config.get("rag", {}).get("daemon", {}) or {}
+    return resolve_project_path(daemon_config.get("socket", DEFAULT_SOCKET))
+
+
+# ==================== 消息编码 ====================
+
+def pack_array(vectors) -> Optional[Dict[str, Any]]:
+    """向量数组 -> 可JSON序列化的字典"""
+    if vectors is None:
+        return None
+    array = np.ascontiguousarray(vectors, dtype=np.float32)
+    return {"shape": list(array.shape), "data": base64.b64encode(array.tobytes()).decode("ascii")}
+
+
+def unpack_array(packed: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+    """pack_array 的逆操作"""
+    if packed is None:
+        return None
+    return np.frombuffer(base64.b64decode(packed["data"]), dtype=np.float32).reshape(packed["shape"])
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any]):
+    """发送一条消息"""
+    payload = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """接收一条消息（对端关闭连接时返回 None）"""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    payload = _recv_exact(sock, _HEADER.unpack(header)[0])
+    if payload is None:
+        raise ConnectionError("连接在消息中途关闭")
+    return json.loads(payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+# ==================== 守护进程 ====================
+
+class EmbeddingDaemon:
+    """守护进程：持有嵌入模型和各集合的向量存储"""
+    
+    def __init__(self, config: dict, embedding_model=None):
+        """
+        加载嵌入模型（向量存储按集合名称首次访问时创建）
+        
+        Args:
+            config: 配置字典
+            embedding_model: 已加载的嵌入模型（默认按 rag.embedding_model 加载）
+        """
+        from services.embeddings import DEFAULT_MODEL, create_embedding_model
+        
+        self.config = config
+        self.model_name = config.get("rag", {}).get("embedding_model", DEFAULT_MODEL)
+        if embedding_model is None:
+            logger.info(f"🔄 加载嵌入模型：{self.model_name}...")
+            embedding_model = create_embedding_model(self.model_name)
+        self.embedding_model = embedding_model
+        self.stores: Dict[str, VectorStore] = {}
+        self._store_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+    
+    def get_store(self, collection: str) -> VectorStore:
+        """获取（或创建）集合的向量存储"""
+        with self._store_lock:
+            store = self.stores.get(collection)
+            if store is None:
+                from services.vector_store import create_vector_store
+                store = create_vector_store(self.config, collection)
+                self.stores[collection] = store
+                logger.info(f"📂 打开集合：{collection}（{store.backend}）")
+            return store
+    
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """处理一条请求"""
+        op = request.get("op")
+        
+        if op == "ping":
+            return {"model": self.model_name, "pid": os.getpid()}
+        
+        if op == "encode":
+            return {"embeddings": pack_array(self.embedding_model.encode(request["texts"]))}
+        
+        store = self.get_store(request["collection"])
+        
+        if op == "query":
+            return store.query(
+                query_embeddings=unpack_array(request["query_embeddings"]).tolist(),
+                n_results=request["n_results"],
+                where=request.get("where")
+            )
+        if op == "get":
+            results = dict(store.get(ids=request.get("ids"), where=request.get("where"), include=request.get("include")))
+            if results.get("embeddings") is not None:
+                results["embeddings"] = pack_array(results["embeddings"])
+            return results
+        if op == "count":
+            return {"count": store.count()}
+        if op == "upsert":
+            with self._write_lock:
+                store.upsert(
+                    ids=request["ids"],
+                    embeddings=unpack_array(request["embeddings"]).tolist(),
+                    documents=request["documents"],
+                    metadatas=request["metadatas"]
+                )
+            return {}
+        if op == "delete":
+            with self._write_lock:
+                store.delete(request["ids"])
+            return {}
+        if op == "flush":
+            with self._write_lock:
+                store.flush()
+            return {}
+        if op == "backend":
+            return {"backend": store.backend}
+        
+        raise ValueError(f"未知的请求: {op}")
+    
+    def create_server(self, socket_path: Path) -> socketserver.ThreadingUnixStreamServer:
+        """创建绑定到 socket_path 的服务器（每个连接一个线程）"""
+        daemon = self
+        
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        request = recv_message(self.request)
+                    except (ConnectionError, OSError):
+                        return
+                    if request is None:
+                        return
+                    try:
+                        response = {"ok": True, "result": daemon.handle(request)}
+                    except Exception as e:
+                        logger.error(f"❌ 请求失败（{request.get('op')}）：{e}")
+                        response = {"ok": False, "error": str(e)}
+                    send_message(self.request, response)
+        
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if socket_path.exists():
+            socket_path.unlink()
+        
+        server = socketserver.ThreadingUnixStreamServer(str(socket_path), Handler)
+        server.daemon_threads = True
+        return server
+    
+    def serve(self, socket_path: Path):
+        """在 Unix socket 上提供服务（阻塞）"""
+        with self.create_server(socket_path) as server:
+            logger.info(f"✅ 嵌入守护进程已启动：{socket_path}")
+            try:
+                server.serve_forever()
+            finally:
+                if socket_path.exists():
+                    socket_path.unlink()
+
+
+# ==================== 客户端 ====================
+
+class DaemonClient:
+    """守护进程客户端（单连接，线程安全，断线自动重连一次）"""
+    
+    def __init__(self, socket_path: Path, timeout: float = 30.0):
+        self.socket_path = Path(socket_path)
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(str(self.socket_path))
+        return sock
+    
+    def request(self, op: str, **payload) -> Dict[str, Any]:
+        """
+        发送请求并等待结果
+        
+        Raises:
+            ConnectionError: 无法连接守护进程
+            RuntimeError: 守护进程处理失败
+        """
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._sock = self._connect()
+                    send_message(self._sock, {"op": op, **payload})
+                    response = recv_message(self._sock)
+                    if response is None:
+                        raise ConnectionError("守护进程关闭了连接")
+                    break
+                except OSError as e:
+                    self.close()
+                    if attempt:
+                        raise ConnectionError(f"无法连接嵌入守护进程：{e}") from e
+        
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response["result"]
+    
+    def ping(self) -> Optional[Dict[str, Any]]:
+        """探测守护进程（不可用时返回 None）"""
+        if not self.socket_path.exists():
+            return None
+        try:
+            return self.request("ping")
+        except (ConnectionError, RuntimeError):
+            return None
+    
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+
+class _FallbackProxy:
+    """守护进程调用失败时切换为进程内对象（仅切换一次）"""
+    
+    def __init__(self, client: DaemonClient, local_factory: Callable[[], Any]):
+        self.client = client
+        self._local_factory = local_factory
+        self._local = None
+    
+    def _call(self, op: str, local_call: Callable[[Any], Any], **payload) -> Any:
+        if self._local is None:
+            try:
+                return self.client.request(op, **payload)
+            except ConnectionError as e:
+                logger.warning(f"⚠️  嵌入守护进程不可用，回退为进程内模式：{e}")
+                self._local = self._local_factory()
+        return local_call(self._local)
+
+
+class RemoteEmbeddingModel(_FallbackProxy):
+    """通过守护进程向量化（接口与 SentenceTransformer.encode 一致）"""
+    
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        result = self._call("encode", lambda model: model.encode(batch), texts=batch)
+        embeddings = unpack_array(result["embeddings"]) if isinstance(result, dict) else np.asarray(result)
+        return embeddings[0] if single else embeddings
+
+
+class RemoteVectorStore(_FallbackProxy, VectorStore):
+    """通过守护进程访问向量存储"""
+    
+    def __init__(self, client: DaemonClient, collection_name: str, local_factory: Callable[[], VectorStore]):
+        super().__init__(client, local_factory)
+        self.collection_name = collection_name
+        backend = self._call("backend", lambda store: {"backend": store.backend}, collection=collection_name)["backend"]
+        self.backend = backend if self._local is not None else f"daemon:{backend}"
+    
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self._call(
+            "upsert", lambda store: store.upsert(ids, embeddings, documents, metadatas),
+            collection=self.collection_name, ids=ids, embeddings=pack_array(embeddings),
+            documents=documents, metadatas=metadatas
+        )
+    
+    def query(self, query_embeddings, n_results, where=None):
+        return self._call(
+            "query", lambda store: store.query(query_embeddings=query_embeddings, n_results=n_results, where=where),
+            collection=self.collection_name, query_embeddings=pack_array(query_embeddings),
+            n_results=n_results, where=where
+        )
+    
+    def get(self, ids=None, where=None, include=None):
+        results = self._call(
+            "get", lambda store: store.get(ids=ids, where=where, include=include),
+            collection=self.collection_name, ids=ids, where=where, include=include
+        )
+        if self._local is None and isinstance(results.get("embeddings"), dict):
+            results["embeddings"] = unpack_array(results["embeddings"])
+        return results
+    
+    def delete(self, ids):
+        self._call("delete", lambda store: store.delete(ids), collection=self.collection_name, ids=ids)
+    
+    def count(self):
+        return self._call("count", lambda store: {"count": store.count()}, collection=self.collection_name)["count"]
+    
+    def flush(self):
+        self._call("flush", lambda store: store.flush(), collection=self.collection_name)
+
+
+def connect_daemon(config: dict) -> Optional[DaemonClient]:
+    """
+    按 rag.daemon 配置连接守护进程
+    
+    Returns:
+        已连通的客户端；未启用、平台不支持或守护进程未运行时返回 None
+    """
+    daemon_config = config.get("rag", {}).get("daemon", {}) or {}
+    if not daemon_config.get("enabled", False) or not daemon_supported():
+        return None
+    
+    client = DaemonClient(resolve_socket_path(config), timeout=daemon_config.get("timeout", 30))
+    info = client.ping()
+    if info is None:
+        logger.info("ℹ️  嵌入守护进程未运行，使用进程内模式")
+        return None
+    
+    logger.info(f"🔗 已连接嵌入守护进程（pid {info['pid']}，模型 {info['model']}）")
+    return client
+
+
+# ==================== 命令行入口 ====================
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口：启动守护进程"""
+    import yaml
+    
+    parser = argparse.ArgumentParser(description="CobbleSeer 共享嵌入/检索守护进程")
+    parser.add_argument("--config", default=str(Path(__file__).parent.parent / "config.yaml"), help="配置文件路径")
+    parser.add_argument("--socket", help=f"socket 路径（默认 rag.daemon.socket 或 {DEFAULT_SOCKET}）")
+    args = parser.parse_args(argv)
+    
+    if not daemon_supported():
+        print("当前平台不支持 Unix socket，无法启动守护进程")
+        return 1
+    
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    socket_path = Path(args.socket) if args.socket else resolve_socket_path(config)
+    EmbeddingDaemon(config).serve(socket_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
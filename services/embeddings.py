@@ -0,0 +1,123 @@
+"""
+CobbleSeer - 嵌入模型后端
+
+rag.embedding_model 选择后端：
+- "sentence-transformers/all-MiniLM-L6-v2"：PyTorch（sentence-transformers）
+- "onnx:<模型目录>"：onnxruntime 运行导出的 ONNX 模型（可为int8量化版本），
+  适合无GPU的CPU节点，启动更快、内存占用更低
+
+ONNX 模型目录由 export_onnx_model.py 生成，包含 model.onnx（或 model_int8.onnx）
+和 tokenizer.json。两个后端的 encode 接口与 SentenceTransformer 一致。
+"""
+
+from pathlib import Path
+from typing import List, Union
+
+import numpy as np
+from loguru import logger
+
+
+# ONNX 后端的配置前缀
+ONNX_PREFIX = "onnx:"
+
+# 模型目录中优先加载的文件（量化版本优先）
+ONNX_MODEL_FILES = ["model_int8.onnx", "model.onnx"]
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class OnnxEmbeddingModel:
+    """onnxruntime 嵌入模型（均值池化 + L2归一化，与 all-MiniLM-L6-v2 一致）"""
+    
+    def __init__(self, model_dir: Union[str, Path], max_length: int = 256, threads: int = 0):
+        """
+        加载 ONNX 模型和分词器
+        
+        Args:
+            model_dir: 模型目录（含 .onnx 文件和 tokenizer.json）
+            max_length: 最大token数（超出截断）
+            threads: 推理线程数（0 = onnxruntime默认）
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        
+        model_dir = Path(model_dir)
+        model_file = next((model_dir / name for name in ONNX_MODEL_FILES if (model_dir / name).exists()), None)
+        if model_file is None:
+            raise FileNotFoundError(f"ONNX模型不存在：{model_dir}（请先运行 export_onnx_model.py）")
+        
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_file), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.model_file = model_file
+    
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """
+        向量化文本
+        
+        Args:
+            texts: 单个文本或文本列表
+            batch_size: 每批推理的文本数
+        
+        Returns:
+            单个文本返回一维向量，文本列表返回二维数组
+        """
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            
+            token_embeddings = self.session.run(None, feeds)[0]
+            batches.append(mean_pool(token_embeddings, attention_mask))
+        
+        embeddings = np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """按注意力掩码均值池化并L2归一化"""
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def create_embedding_model(model_name: str = DEFAULT_MODEL):
+    """
+    根据 rag.embedding_model 创建嵌入模型
+    
+    Args:
+        model_name: 模型名称；"onnx:" 前缀表示ONNX模型目录（相对路径以项目根目录为基准）
+    
+    Returns:
+        具有 encode(texts) 方法的嵌入模型
+    
+    Raises:
+        ImportError: 对应后端依赖未安装
+    """
+    if model_name.startswith(ONNX_PREFIX):
+        from services.template_library import resolve_project_path
+        
+        model_dir = resolve_project_path(model_name[len(ONNX_PREFIX):])
+        model = OnnxEmbeddingModel(model_dir)
+        logger.debug(f"  ONNX嵌入模型：{model.model_file.name}")
+        return model
+    
+    from sentence_transformers import SentenceTransformer
+    
+    return SentenceTransformer(model_name)
@@ -0,0 +1,223 @@
+"""
+CobbleSeer - 特性事件处理器倒排索引
+
+Showdown 特性的行为写在事件处理器里（onModifyAtk、onDamagingHit、onStart ...）。
+HandlerIndex 扫描一遍 abilities.js，为每个条目顶层的函数记录代码区间：
+
+- 处理器名 -> [(特性ID, 起始位置, 结束位置), ...]
+- 特性ID -> [(处理器名, 起始位置, 结束位置), ...]
+
+代码片段按区间从保留的原文中切出，不复制。生成特性时先把描述中的关键词
+（“提高攻击”“接触”“天气”...）映射到处理器名，再直接取出对应的真实代码片段
+放进提示词，比整段参考文档更精确、更省 token。
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.showdown_parser import ShowdownParseError, ShowdownParser
+
+
+# 描述关键词 -> 相关处理器（按相关度排序）
+KEYWORD_HANDLERS: Dict[str, Tuple[str, ...]] = {
+    # 能力值
+    "特攻": ("onModifySpA",),
+    "special attack": ("onModifySpA",),
+    "特防": ("onModifySpD",),
+    "special defense": ("onModifySpD",),
+    "攻击": ("onModifyAtk", "onSourceModifyAtk"),
+    "attack": ("onModifyAtk", "onSourceModifyAtk"),
+    "防御": ("onModifyDef",),
+    "defense": ("onModifyDef",),
+    "速度": ("onModifySpe",),
+    "speed": ("onModifySpe",),
+    "命中": ("onSourceModifyAccuracy", "onModifyAccuracy"),
+    "accuracy": ("onSourceModifyAccuracy", "onModifyAccuracy"),
+    "闪避": ("onModifyAccuracy",),
+    "evasion": ("onModifyAccuracy",),
+    "会心": ("onModifyCritRatio",),
+    "要害": ("onModifyCritRatio",),
+    "critical": ("onModifyCritRatio",),
+    # 伤害与威力
+    "威力": ("onBasePower",),
+    "power": ("onBasePower",),
+    "伤害": ("onSourceModifyDamage", "onModifyDamage"),
+    "damage": ("onSourceModifyDamage", "onModifyDamage"),
+    "本系": ("onModifySTAB",),
+    "stab": ("onModifySTAB",),
+    # 属性变化（"火属性" / "Fire-type" 几乎出现在每条描述中，只匹配明确的变化说法）
+    "属性变为": ("onModifyType",),
+    "属性改为": ("onModifyType",),
+    "变成": ("onModifyType",),
+    "changes type": ("onModifyType",),
+    "changes its type": ("onModifyType",),
+    "changes the type": ("onModifyType",),
+    "change type": ("onModifyType",),
+    "type becomes": ("onModifyType",),
+    "type change": ("onModifyType",),
+    "优先度": ("onModifyPriority",),
+    "先制": ("onModifyPriority",),
+    "priority": ("onModifyPriority",),
+    # 被攻击 / 接触
+    "接触": ("onDamagingHit",),
+    "contact": ("onDamagingHit",),
+    "受到攻击": ("onDamagingHit",),
+    "被攻击": ("onDamagingHit",),
+    "when hit": ("onDamagingHit",),
+    "免疫": ("onTryHit", "onImmunity"),
+    "无效": ("onTryHit",),
+    "immune": ("onTryHit", "onImmunity"),
+    "吸收": ("onTryHit",),
+    "absorb": ("onTryHit",),
+    # 出场 / 退场 / 回合
+    "出场": ("onStart", "onSwitchIn"),
+    "登场": ("onStart", "onSwitchIn"),
+    "switch in": ("onStart", "onSwitchIn"),
+    "enters": ("onStart",),
+    "退场": ("onSwitchOut",),
+    "交换": ("onSwitchOut",),
+    "switch out": ("onSwitchOut",),
+    "每回合": ("onResidual",),
+    "回合结束": ("onResidual",),
+    "end of each turn": ("onResidual",),
+    "end of turn": ("onResidual",),
+    "回复": ("onResidual", "onTryHit"),
+    "heal": ("onResidual", "onTryHit"),
+    # 天气 / 场地
+    "天气": ("onStart", "onWeather"),
+    "weather": ("onStart", "onWeather"),
+    "下雨": ("onStart", "onWeather"),
+    "rain": ("onStart", "onWeather"),
+    "晴": ("onStart", "onWeather"),
+    "sun": ("onStart", "onWeather"),
+    "沙暴": ("onStart", "onWeather"),
+    "冰雹": ("onStart", "onWeather"),
+    "场地": ("onStart",),
+    "terrain": ("onStart",),
+    # 状态与能力变化
+    "异常状态": ("onSetStatus", "onUpdate"),
+    "status": ("onSetStatus", "onUpdate"),
+    "灼伤": ("onSetStatus", "onDamagingHit"),
+    "麻痹": ("onSetStatus", "onDamagingHit"),
+    "中毒": ("onSetStatus", "onDamagingHit"),
+    "睡眠": ("onSetStatus",),
+    "burn": ("onSetStatus", "onDamagingHit"),
+    "paraly": ("onSetStatus", "onDamagingHit"),
+    "poison": ("onSetStatus", "onDamagingHit"),
+    "sleep": ("onSetStatus",),
+    "能力下降": ("onTryBoost",),
+    "不会降低": ("onTryBoost",),
+    "lowered": ("onTryBoost",),
+    "能力提升": ("onAfterBoost", "onChangeBoost"),
+    "倒下": ("onSourceAfterFaint", "onFaint"),
+    "击倒": ("onSourceAfterFaint",),
+    "faint": ("onSourceAfterFaint", "onFaint"),
+    "knock": ("onSourceAfterFaint",),
+}
+
+_KEYWORD_PATTERN = re.compile(
+    "|".join(re.escape(keyword) for keyword in sorted(KEYWORD_HANDLERS, key=len, reverse=True)),
+    re.IGNORECASE
+)
+
+Span = Tuple[str, int, int]
+
+
+def handlers_for(description: str) -> List[str]:
+    """描述中的关键词对应的处理器名（按出现顺序去重）"""
+    handlers: List[str] = []
+    for match in _KEYWORD_PATTERN.finditer(description):
+        for handler in KEYWORD_HANDLERS[match.group(0).lower()]:
+            if handler not in handlers:
+                handlers.append(handler)
+    return handlers
+
+
+class HandlerIndex:
+    """事件处理器倒排索引（只读，参考文件重新加载后重建）"""
+    
+    def __init__(self, text: str):
+        """
+        扫描整个文件建立索引
+        
+        Args:
+            text: abilities.js（或其他 Showdown 数据文件）的文本
+        """
+        self.text = text
+        self.postings: Dict[str, List[Span]] = defaultdict(list)
+        self.by_item: Dict[str, List[Span]] = {}
+        
+        parser = ShowdownParser(text)
+        _, entries = parser.split_entries()
+        for item_id, start, _ in entries:
+            spans: List[Span] = []
+            try:
+                parser.parse_entry(start, handler_spans=spans)
+            except ShowdownParseError:
+                continue
+            if spans:
+                self.by_item[item_id] = spans
+                for handler, span_start, span_end in spans:
+                    self.postings[handler].append((item_id, span_start, span_end))
+        
+        # 每个处理器下的代码片段按长度排序，短片段更适合作为示例
+        for postings in self.postings.values():
+            postings.sort(key=lambda posting: posting[2] - posting[1])
+    
+    def __len__(self) -> int:
+        return len(self.by_item)
+    
+    def handler_counts(self) -> Dict[str, int]:
+        """各处理器出现的特性数（按数量降序）"""
+        counts = {handler: len({item_id for item_id, _, _ in postings}) for handler, postings in self.postings.items()}
+        return dict(sorted(counts.items(), key=lambda pair: -pair[1]))
+    
+    def items_with(self, handler: str) -> List[str]:
+        """具有该处理器的条目ID"""
+        return list(dict.fromkeys(item_id for item_id, _, _ in self.postings.get(handler, [])))
+    
+    def snippet(self, item_id: str, handler: str) -> Optional[str]:
+        """条目中某个处理器的代码"""
+        for name, start, end in self.by_item.get(item_id, []):
+            if name == handler:
+                return self.text[start:end]
+        return None
+    
+    def snippets_for(
+        self,
+        description: str,
+        limit: int = 4,
+        per_handler: int = 2,
+        max_chars: int = 600,
+        exclude: Iterable[str] = ()
+    ) -> List[Dict[str, str]]:
+        """
+        描述相关的真实处理器代码片段
+        
+        Args:
+            description: 特性描述
+            limit: 最多返回的片段数
+            per_handler: 每个处理器最多取几个特性的片段
+            max_chars: 超过此长度的片段跳过（优先短小完整的示例）
+            exclude: 不使用的特性ID
+        
+        Returns:
+            [{"item": 特性ID, "handler": 处理器名, "code": 代码}, ...]
+        """
+        excluded = set(exclude)
+        results: List[Dict[str, str]] = []
+        for handler in handlers_for(description):
+            taken = 0
+            for item_id, start, end in self.postings.get(handler, []):
+                if end - start > max_chars:
+                    break
+                if item_id in excluded:
+                    continue
+                results.append({"item": item_id, "handler": handler, "code": self.text[start:end]})
+                taken += 1
+                if taken >= per_handler or len(results) >= limit:
+                    break
+            if len(results) >= limit:
+                break
+        return results
@@ -0,0 +1,233 @@
+"""
+CobbleSeer - 混合检索
+
+向量检索之外的两路信号：
+- 结构化过滤：从查询中解析属性、分类、威力范围（如"火系物理 威力90"）
+- BM25 词法检索：对文档文本建立倒排索引，精确匹配名称和关键字段
+
+两路排名通过倒数排名融合（RRF）合并。
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# 属性名称（中文 / 英文 -> Showdown属性）
+TYPE_NAMES = {
+    "一般": "Normal", "普通": "Normal", "火": "Fire", "水": "Water", "草": "Grass",
+    "电": "Electric", "冰": "Ice", "格斗": "Fighting", "毒": "Poison", "地面": "Ground",
+    "飞行": "Flying", "超能力": "Psychic", "超能": "Psychic", "虫": "Bug", "岩石": "Rock",
+    "幽灵": "Ghost", "龙": "Dragon", "恶": "Dark", "钢": "Steel", "妖精": "Fairy",
+}
+TYPE_NAMES.update({name.lower(): name for name in set(TYPE_NAMES.values())})
+
+# 分类名称
+CATEGORY_NAMES = {
+    "物理": "Physical", "特殊": "Special", "变化": "Status",
+    "physical": "Physical", "special": "Special", "status": "Status",
+}
+
+_TYPE_PATTERN = re.compile(
+    r"(一般|普通|火|水|草|电|冰|格斗|毒|地面|飞行|超能力|超能|虫|岩石|幽灵|龙|恶|钢|妖精)(?:系|属性)"
+    r"|\b(normal|fire|water|grass|electric|ice|fighting|poison|ground|flying|psychic|bug|rock|ghost|dragon|dark|steel|fairy)[- ]type\b",
+    re.IGNORECASE
+)
+_CATEGORY_PATTERN = re.compile(r"(物理|特殊|变化)|\b(physical|special|status)\b", re.IGNORECASE)
+_POWER_RANGE_PATTERN = re.compile(r"(?:威力|power)\s*[:：]?\s*(\d+)\s*[-~～到至]\s*(\d+)", re.IGNORECASE)
+_POWER_BOUND_PATTERN = re.compile(r"(?:威力|power)\s*[:：]?\s*(\d+)\s*(以上|以下|\+)?", re.IGNORECASE)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[一-鿿]+")
+
+
+def parse_query_filters(query: str, power_tolerance: int = 10) -> Dict[str, Any]:
+    """
+    从查询文本解析结构化过滤条件
+
+    Args:
+        query: 查询文本
+        power_tolerance: 给出精确威力时的容差（±）
+
+    Returns:
+        过滤条件：move_type / category / power_min / power_max（仅包含解析到的字段）
+    """
+    filters: Dict[str, Any] = {}
+
+    type_match = _TYPE_PATTERN.search(query)
+    if type_match:
+        name = type_match.group(1) or type_match.group(2).lower()
+        filters["move_type"] = TYPE_NAMES[name]
+
+    category_match = _CATEGORY_PATTERN.search(query)
+    if category_match:
+        filters["category"] = CATEGORY_NAMES[(category_match.group(1) or category_match.group(2)).lower()]
+
+    range_match = _POWER_RANGE_PATTERN.search(query)
+    if range_match:
+        low, high = sorted((int(range_match.group(1)), int(range_match.group(2))))
+        filters["power_min"], filters["power_max"] = low, high
+    else:
+        bound_match = _POWER_BOUND_PATTERN.search(query)
+        if bound_match:
+            power = int(bound_match.group(1))
+            if bound_match.group(2) in ("以上", "+"):
+                filters["power_min"] = power
+            elif bound_match.group(2) == "以下":
+                filters["power_max"] = power
+            else:
+                filters["power_min"] = max(0, power - power_tolerance)
+                filters["power_max"] = power + power_tolerance
+
+    return filters
+
+
+def build_where(data_type: str, filters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将过滤条件转换为向量库 where 子句
+
+    Args:
+        data_type: 数据类型（move/ability/pokemon）
+        filters: parse_query_filters 的结果
+
+    Returns:
+        where 子句
+    """
+    clauses: List[Dict[str, Any]] = [{"type": data_type}]
+    if "move_type" in filters:
+        clauses.append({"move_type": filters["move_type"]})
+    if "category" in filters:
+        clauses.append({"category": filters["category"]})
+    if "power_min" in filters:
+        clauses.append({"basePower": {"$gte": filters["power_min"]}})
+    if "power_max" in filters:
+        clauses.append({"basePower": {"$lte": filters["power_max"]}})
+
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def matches_filters(metadata: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """判断元数据是否满足过滤条件（与 build_where 语义一致）"""
+    if "move_type" in filters and metadata.get("move_type") != filters["move_type"]:
+        return False
+    if "category" in filters and metadata.get("category") != filters["category"]:
+        return False
+    power = metadata.get("basePower")
+    if "power_min" in filters and not (isinstance(power, (int, float)) and power >= filters["power_min"]):
+        return False
+    if "power_max" in filters and not (isinstance(power, (int, float)) and power <= filters["power_max"]):
+        return False
+    return True
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：英文/数字按单词，中文按字二元组（单字文本保留单字）
+    """
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        if word[0].isascii():
+            tokens.append(word)
+        elif len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class BM25Index:
+    """BM25 倒排索引"""
+
+    def __init__(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        """
+        构建索引
+
+        Args:
+            ids: 文档ID列表
+            documents: 文档文本列表
+            metadatas: 元数据列表（用于过滤）
+            k1: 词频饱和参数
+            b: 文档长度归一化参数
+        """
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas or [{} for _ in ids]
+        self.k1 = k1
+        self.b = b
+
+        # 词项 -> [(文档序号, 词频)]
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+
+        for position, document in enumerate(documents):
+            counts = Counter(tokenize(document))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                self.postings[term].append((position, frequency))
+
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        allowed: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        BM25 检索
+
+        Args:
+            query: 查询文本
+            top_k: 返回数量
+            allowed: 元数据过滤函数（返回 False 的文档被排除）
+
+        Returns:
+            [(文档序号, 分数)]，按分数降序
+        """
+        if not self.ids:
+            return []
+
+        total = len(self.ids)
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / (self.avg_length or 1))
+                scores[position] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        if allowed is not None:
+            ranked = [item for item in ranked if allowed(self.metadatas[item[0]])]
+        return ranked[:top_k]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    倒数排名融合
+
+    Args:
+        rankings: 多路排名（每路为按相关度降序的ID列表）
+        k: 平滑常数
+
+    Returns:
+        [(ID, 融合分数)]，按分数降序
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: -item[1])
@@ -0,0 +1,373 @@
+"""
+CobbleSeer - 参考库导入服务
+
+将 rag.reference_paths 中的参考数据导入RAG向量库：
+1. 解析：通过 TemplateLibrary 逐条读取参考文件
+2. 构建：分块生成文档文本和元数据
+3. 嵌入：多进程批量向量化
+4. 索引：按内容哈希增量写入，删除参考库中已移除的条目
+
+各阶段按生成器串联，条目解析后立即构建、嵌入、写入，内存中只保留正在处理的批次。
+
+命令行用法：
+    python -m services.ingest [--types move ability] [--force] [--workers 4]
+"""
+
+import argparse
+import hashlib
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import chain, islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from services.template_library import TemplateLibrary
+
+
+# 支持导入的数据类型
+DATA_TYPES = ["move", "ability", "pokemon"]
+
+# 元数据中直接保留的技能字段
+MOVE_METADATA_FIELDS = ["num", "basePower", "accuracy", "pp", "priority", "target"]
+
+
+# ==================== 嵌入进程 ====================
+
+_worker_model = None
+
+
+def _init_embedding_worker(model_name: str):
+    """嵌入进程初始化：每个进程加载一次模型"""
+    global _worker_model
+    from services.embeddings import create_embedding_model
+    
+    _worker_model = create_embedding_model(model_name)
+
+
+def _embed_in_worker(texts: List[str]) -> List[List[float]]:
+    """嵌入进程任务：向量化一批文本"""
+    return _worker_model.encode(texts).tolist()
+
+
+# ==================== 文档构建 ====================
+
+def content_hash(document: str, metadata: Dict[str, Any]) -> str:
+    """计算文档内容哈希（文本 + 元数据）"""
+    digest = hashlib.sha1(document.encode("utf-8"))
+    for key in sorted(metadata):
+        digest.update(f"\0{key}={metadata[key]}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_document(
+    data_type: str,
+    item_id: str,
+    item: Dict[str, Any],
+    max_chars: int = 2000
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    根据参考条目构建文档文本和元数据
+    
+    Args:
+        data_type: 数据类型（move/ability/pokemon）
+        item_id: 条目ID
+        item: 条目数据
+        max_chars: 文档最大字符数（超出部分截断）
+    
+    Returns:
+        (文档文本, 元数据)
+    """
+    name = str(item.get("name", item_id))
+    metadata: Dict[str, Any] = {"type": data_type, "id": item_id, "name": name}
+    
+    if data_type == "move":
+        # 技能属性存为 move_type，避免覆盖数据类型字段
+        metadata["move_type"] = item.get("type", "Normal")
+        metadata["category"] = item.get("category", "Physical")
+        for field in MOVE_METADATA_FIELDS:
+            if isinstance(item.get(field), (str, int, float, bool)):
+                metadata[field] = item[field]
+        header = (
+            f"{name} | {metadata['move_type']} {metadata['category']} | "
+            f"威力{item.get('basePower', 0)} 命中{item.get('accuracy', 100)} "
+            f"PP{item.get('pp', 0)} 优先度{item.get('priority', 0)}"
+        )
+    elif data_type == "ability":
+        for field in ["num", "rating"]:
+            if isinstance(item.get(field), (int, float)):
+                metadata[field] = item[field]
+        header = f"{name} | 评级{item.get('rating', 0)}"
+    else:
+        types = [t for t in (item.get("primaryType"), item.get("secondaryType")) if t]
+        metadata["primaryType"] = item.get("primaryType", "")
+        if item.get("nationalPokedexNumber") is not None:
+            metadata["dex"] = item["nationalPokedexNumber"]
+        header = f"{name} | {'/'.join(types)}"
+    
+    body = item.get("source", "")
+    if not body and data_type == "pokemon":
+        stats = item.get("baseStats", {})
+        body = " ".join(f"{k}:{v}" for k, v in stats.items())
+    
+    document = f"{header}\n{body}".strip()[:max_chars]
+    metadata["content_hash"] = content_hash(document, metadata)
+    
+    return document, metadata
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterable[List[Any]]:
+    """按固定大小分块（支持生成器，逐块读取）"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def timed(items: Iterable[Any], timings: Dict[str, float], stage: str) -> Iterable[Any]:
+    """逐项产出，并把产出每一项的耗时累计到 timings[stage]"""
+    iterator = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            timings[stage] += time.perf_counter() - start
+            return
+        timings[stage] += time.perf_counter() - start
+        yield item
+
+
+# ==================== 导入流程 ====================
+
+class ReferenceIngestor:
+    """参考库导入器"""
+    
+    def __init__(
+        self,
+        config: dict,
+        rag_service,
+        template_library: Optional[TemplateLibrary] = None
+    ):
+        """
+        初始化导入器
+        
+        Args:
+            config: 配置字典
+            rag_service: RAG服务实例
+            template_library: 模板库（默认根据 rag.reference_paths 创建）
+        """
+        self.config = config
+        self.rag_service = rag_service
+        self.template_library = template_library or TemplateLibrary.from_config(config)
+        
+        rag_config = config.get("rag", {})
+        ingest_config = rag_config.get("ingest", {}) or {}
+        self.model_name = rag_config.get("embedding_model", "sentence-transformers/all-MiniLM-L6-v2")
+        self.batch_size = ingest_config.get("batch_size", 64)
+        self.workers = ingest_config.get("workers", 2)
+        self.max_document_chars = ingest_config.get("max_document_chars", 2000)
+    
+    def run(
+        self,
+        types: Optional[List[str]] = None,
+        force: bool = False,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        执行完整导入流程
+        
+        Args:
+            types: 导入的数据类型（默认全部）
+            force: 是否忽略内容哈希强制重新索引
+            workers: 嵌入进程数（1表示在当前进程中嵌入）
+            batch_size: 每批嵌入的文档数
+        
+        Returns:
+            导入报告（各阶段耗时与数量）
+        """
+        types = types or DATA_TYPES
+        unknown = [t for t in types if t not in DATA_TYPES]
+        if unknown:
+            raise ValueError(f"未知的数据类型: {unknown}")
+        
+        workers = workers or self.workers
+        batch_size = batch_size or self.batch_size
+        timings = {stage: 0.0 for stage in ("parse", "build", "embed", "index")}
+        counts: Dict[str, int] = {}
+        stats = {"skipped": 0, "batches": 0, "indexed": 0}
+        seen = set()
+        started = time.perf_counter()
+        
+        def documents():
+            """1 + 2. 逐条解析并构建文档"""
+            for data_type in types:
+                counts[data_type] = 0
+                for item_id, item in timed(self.template_library.iter_reference_items(data_type), timings, "parse"):
+                    build_start = time.perf_counter()
+                    document, metadata = build_document(data_type, item_id, item, self.max_document_chars)
+                    doc_id = f"{data_type}_{item_id}"
+                    seen.add(doc_id)
+                    counts[data_type] += 1
+                    timings["build"] += time.perf_counter() - build_start
+                    yield doc_id, document, metadata
+        
+        def changed():
+            """按内容哈希分块筛选变化项（哈希比较计入 build 阶段）"""
+            if force:
+                yield from documents()
+                return
+            for chunk in chunked(documents(), 500):
+                build_start = time.perf_counter()
+                existing = self.rag_service.get_content_hashes([doc_id for doc_id, _, _ in chunk])
+                kept = [p for p in chunk if existing.get(p[0]) != p[2]["content_hash"]]
+                stats["skipped"] += len(chunk) - len(kept)
+                timings["build"] += time.perf_counter() - build_start
+                yield from kept
+        
+        # 3 + 4. 嵌入并增量索引（每批嵌入完成后立即写入）
+        for batch, embeddings in self._embed_batches(chunked(changed(), batch_size), workers, timings):
+            index_start = time.perf_counter()
+            self.rag_service.upsert_embeddings(
+                ids=[doc_id for doc_id, _, _ in batch],
+                embeddings=embeddings,
+                documents=[document for _, document, _ in batch],
+                metadatas=[metadata for _, _, metadata in batch]
+            )
+            timings["index"] += time.perf_counter() - index_start
+            stats["indexed"] += len(batch)
+            stats["batches"] += 1
+        
+        logger.info(
+            f"📖 解析 {sum(counts.values())} 项（{timings['parse']:.2f}s），"
+            f"构建后 {stats['skipped']} 项未变化（{timings['build']:.2f}s）"
+        )
+        
+        # 删除本次未出现的条目（某类型一个条目都没解析到时跳过，避免参考文件缺失时清空索引），
+        # 然后一次性持久化
+        index_start = time.perf_counter()
+        stale = [
+            doc_id
+            for data_type in types if counts[data_type]
+            for doc_id in self.rag_service.get_document_ids(data_type)
+            if doc_id not in seen
+        ]
+        self.rag_service.delete_documents(stale)
+        self.rag_service.flush()
+        timings["index"] += time.perf_counter() - index_start
+        timings["total"] = time.perf_counter() - started
+        
+        logger.info(f"✅ 导入完成：索引{stats['indexed']}项，删除{len(stale)}项，耗时{timings['total']:.2f}s")
+        
+        return {
+            "success": True,
+            "parsed": counts,
+            "indexed": stats["indexed"],
+            "skipped": stats["skipped"],
+            "removed": len(stale),
+            "batches": stats["batches"],
+            "workers": workers,
+            "timings": {stage: round(seconds, 3) for stage, seconds in timings.items()}
+        }
+    
+    def _embed_batches(self, batches: Iterable[List[tuple]], workers: int, timings: Dict[str, float]):
+        """
+        向量化批次生成器中的每个批次，按完成顺序产出 (批次, 向量列表)
+        
+        workers <= 1、只有一个批次或RAG服务连接了共享守护进程时直接使用RAG服务的模型。
+        多进程时最多同时提交 2 × workers 个批次，批次随嵌入进度从上游读取。
+        嵌入耗时（多进程时为等待结果的时间）累计到 timings["embed"]。
+        """
+        batches = iter(batches)
+        head = list(islice(batches, 2))
+        if not head:
+            return
+        batches = chain(head, batches)
+        
+        if workers <= 1 or len(head) == 1 or getattr(self.rag_service, "daemon_client", None):
+            model = self.rag_service.embedding_model
+            if model is None:
+                raise RuntimeError("嵌入模型未加载，无法导入")
+            for batch in batches:
+                embed_start = time.perf_counter()
+                embeddings = model.encode([document for _, document, _ in batch]).tolist()
+                timings["embed"] += time.perf_counter() - embed_start
+                yield batch, embeddings
+            return
+        
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_embedding_worker,
+            initargs=(self.model_name,)
+        ) as executor:
+            futures = {}
+            for batch in chain(batches, [None]):
+                if batch is not None:
+                    futures[executor.submit(_embed_in_worker, [document for _, document, _ in batch])] = batch
+                    if len(futures) < 2 * workers:
+                        continue
+                while futures:
+                    embed_start = time.perf_counter()
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    timings["embed"] += time.perf_counter() - embed_start
+                    for future in done:
+                        yield futures.pop(future), future.result()
+                    if batch is not None:
+                        break
+
+
+# ==================== 命令行入口 ====================
+
+def print_report(report: Dict[str, Any]):
+    """打印导入报告"""
+    print("\n" + "=" * 50)
+    print("  参考库导入报告")
+    print("=" * 50)
+    for data_type, count in report["parsed"].items():
+        print(f"  解析 {data_type:<8} {count:>6} 项")
+    print(f"  索引 {report['indexed']} 项，跳过未变化 {report['skipped']} 项，删除 {report['removed']} 项")
+    print(f"  批次 {report['batches']}，嵌入进程 {report['workers']}")
+    print("-" * 50)
+    for stage, seconds in report["timings"].items():
+        print(f"  {stage:<8} {seconds:>8.3f}s")
+    print("=" * 50)
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="导入参考库到RAG向量库")
+    parser.add_argument("--types", nargs="+", choices=DATA_TYPES, help="导入的数据类型（默认全部）")
+    parser.add_argument("--force", action="store_true", help="忽略内容哈希，强制重新索引")
+    parser.add_argument("--workers", type=int, help="嵌入进程数")
+    parser.add_argument("--batch-size", type=int, help="每批嵌入的文档数")
+    parser.add_argument("--config", default=str(Path(__file__).parent.parent / "config.yaml"), help="配置文件路径")
+    args = parser.parse_args(argv)
+    
+    import yaml
+    from services.rag_service import RAGService
+    
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    
+    rag_service = RAGService(config)
+    if not rag_service.enabled:
+        print("RAG服务已禁用（rag.enabled = false），无需导入")
+        return 1
+    
+    report = ReferenceIngestor(config, rag_service).run(
+        types=args.types,
+        force=args.force,
+        workers=args.workers,
+        batch_size=args.batch_size
+    )
+    print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
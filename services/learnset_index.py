@@ -0,0 +1,254 @@
+"""
+CobbleSeer - 基于真实学习表的技能表生成
+
+从 Showdown learnsets.js 与 moves.js 预先建立索引：
+
+- 属性 -> 按威力档位分桶的技能（按学会该技能的物种数排序）
+- 技能 -> 在真实物种中的升级学会等级分布（取每个物种最新世代的记录）
+- 蛋技能 / 招式学习器技能的普及度
+
+生成技能表时只做加权抽样（预先计算的累计权重 + 二分查找），单次生成为微秒级。
+
+学习表来源编码：<世代><方式><细节>，如 "9L15"（9代15级升级）、"8M"（招式学习器）、
+"7E"（蛋技能）、"8T"（教学）。
+"""
+
+import random
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+# 威力档位（变化技能单独一档）
+POWER_TIERS = [
+    ("weak", 0, 59),
+    ("medium", 60, 89),
+    ("strong", 90, 119),
+    ("ultimate", 120, 999),
+]
+
+# 档位默认学会等级区间（技能没有升级记录时使用）
+TIER_LEVELS = {
+    "status": (8, 30),
+    "weak": (1, 15),
+    "medium": (16, 32),
+    "strong": (33, 48),
+    "ultimate": (49, 65),
+}
+
+_SOURCE_PATTERN = re.compile(r"^(\d+)([LMTES])(\d*)")
+
+
+def power_tier(move_data: Dict[str, Any]) -> str:
+    """技能所属档位"""
+    if move_data.get("category") == "Status":
+        return "status"
+    power = move_data.get("basePower", 0)
+    power = power if isinstance(power, (int, float)) and not isinstance(power, bool) else 0
+    for tier, low, high in POWER_TIERS:
+        if low <= power <= high:
+            return tier
+    return "ultimate"
+
+
+class _WeightedPool:
+    """带累计权重的候选池（一次建立，多次抽样）"""
+    
+    __slots__ = ("items", "cum_weights")
+    
+    def __init__(self, weighted: List[Tuple[str, float]]):
+        self.items = [item for item, _ in weighted]
+        self.cum_weights = list(accumulate(weight for _, weight in weighted))
+    
+    def __bool__(self) -> bool:
+        return bool(self.items)
+    
+    def sample(self, rng: random.Random, count: int, exclude: set) -> List[str]:
+        """不放回抽样 count 个（跳过 exclude 中的技能）"""
+        picked: List[str] = []
+        if not self.items:
+            return picked
+        wanted = min(count, len(self.items))
+        total = self.cum_weights[-1]
+        attempts = 0
+        # 候选大多被排除时尝试次数有上限，宁可少抽也不死循环
+        while len(picked) < wanted and attempts < count * 20:
+            attempts += 1
+            item = self.items[bisect_left(self.cum_weights, rng.random() * total)]
+            if item not in exclude and item not in picked:
+                picked.append(item)
+        return picked
+
+
+class LearnsetIndex:
+    """学习表索引（只读，moves / learnsets 重新加载后重建）"""
+    
+    def __init__(
+        self,
+        moves: Dict[str, Dict[str, Any]],
+        learnsets: Union[Dict[str, Dict[str, Any]], Iterable[Tuple[str, Dict[str, Any]]]]
+    ):
+        """
+        建立索引
+        
+        Args:
+            moves: 技能ID -> 技能数据（get_move_records 的结果）
+            learnsets: 物种ID -> {"learnset": {技能ID: [来源编码, ...]}, ...}，
+                或逐条产出 (物种ID, 条目) 的迭代器（如流式解析 learnsets.js，逐条统计，不保留学习表）
+        """
+        self.moves = moves
+        # 由迭代器建立时为 None
+        self.learnsets = learnsets if isinstance(learnsets, dict) else None
+        
+        learners: Dict[str, int] = defaultdict(int)
+        levels: Dict[str, List[int]] = defaultdict(list)
+        egg_counts: Dict[str, int] = defaultdict(int)
+        tm_counts: Dict[str, int] = defaultdict(int)
+        species_count = 0
+        
+        for _, entry in (learnsets.items() if isinstance(learnsets, dict) else learnsets):
+            learnset = entry.get("learnset") if isinstance(entry, dict) else None
+            if learnset:
+                species_count += 1
+            if not isinstance(learnset, dict):
+                continue
+            for move_id, sources in learnset.items():
+                if move_id not in moves or not isinstance(sources, list):
+                    continue
+                learners[move_id] += 1
+                level, egg, tm = self._latest_sources(sources)
+                if level is not None:
+                    levels[move_id].append(level)
+                if egg:
+                    egg_counts[move_id] += 1
+                if tm:
+                    tm_counts[move_id] += 1
+        
+        self.species_count = species_count
+        self.learners = dict(learners)
+        # 技能 -> 升级学会等级（排序后的数组）
+        self.level_distribution: Dict[str, np.ndarray] = {
+            move_id: np.sort(np.array(values, dtype=np.int16)) for move_id, values in levels.items()
+        }
+        self.median_level: Dict[str, int] = {
+            move_id: int(np.median(values)) for move_id, values in self.level_distribution.items()
+        }
+        
+        # 属性 -> 档位 -> 升级技能池（权重为学会该技能的物种数）
+        self.type_tiers: Dict[str, Dict[str, _WeightedPool]] = {}
+        buckets: Dict[str, Dict[str, List[Tuple[str, float]]]] = defaultdict(lambda: defaultdict(list))
+        egg_buckets: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        tm_buckets: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        for move_id, count in sorted(learners.items(), key=lambda pair: -pair[1]):
+            move_data = moves[move_id]
+            # Z招式 / 极巨招式 / CAP 等非正式技能不进入候选（"Past" 为旧世代技能，保留）
+            if move_data.get("isZ") or move_data.get("isMax") or move_data.get("isNonstandard") not in (None, "Past"):
+                continue
+            move_type = move_data.get("type", "Normal")
+            if move_id in levels:
+                buckets[move_type][power_tier(move_data)].append((move_id, len(levels[move_id])))
+            if egg_counts.get(move_id):
+                egg_buckets[move_type].append((move_id, egg_counts[move_id]))
+            if tm_counts.get(move_id):
+                tm_buckets[move_type].append((move_id, tm_counts[move_id]))
+        
+        for move_type, tiers in buckets.items():
+            self.type_tiers[move_type] = {tier: _WeightedPool(pool) for tier, pool in tiers.items()}
+        self.egg_pools = {move_type: _WeightedPool(pool) for move_type, pool in egg_buckets.items()}
+        self.tm_pools = {move_type: _WeightedPool(pool) for move_type, pool in tm_buckets.items()}
+        
+        # 通用招式学习器技能：学会的物种最多的前若干个
+        universal = sorted(tm_counts.items(), key=lambda pair: -pair[1])[:24]
+        self.universal_tms = _WeightedPool(universal)
+    
+    def __bool__(self) -> bool:
+        return bool(self.type_tiers)
+    
+    @staticmethod
+    def _latest_sources(sources: List[str]) -> Tuple[Optional[int], bool, bool]:
+        """取最新世代的来源：(升级等级, 是否蛋技能, 是否招式学习器/教学)"""
+        parsed = []
+        for source in sources:
+            match = _SOURCE_PATTERN.match(source) if isinstance(source, str) else None
+            if match:
+                parsed.append((int(match.group(1)), match.group(2), match.group(3)))
+        if not parsed:
+            return None, False, False
+        
+        latest = max(gen for gen, _, _ in parsed)
+        current = [(kind, detail) for gen, kind, detail in parsed if gen == latest]
+        level = min((int(detail) for kind, detail in current if kind == "L" and detail), default=None)
+        egg = any(kind == "E" for kind, _ in current)
+        tm = any(kind in ("M", "T") for kind, _ in current)
+        return level, egg, tm
+    
+    def level_for(self, move_id: str, tier: str, rng: random.Random) -> int:
+        """技能的学会等级：从真实物种的等级分布中抽样，无记录时按档位默认区间"""
+        distribution = self.level_distribution.get(move_id)
+        if distribution is not None and distribution.size:
+            return max(1, int(distribution[rng.randrange(distribution.size)]))
+        low, high = TIER_LEVELS[tier]
+        return rng.randint(low, high)
+    
+    def generate(
+        self,
+        primary_type: str,
+        secondary_type: Optional[str] = None,
+        seed: Optional[Any] = None
+    ) -> List[str]:
+        """
+        生成技能表（Cobblemon 字符串格式）
+        
+        Args:
+            primary_type: 主属性
+            secondary_type: 副属性
+            seed: 随机种子（同一物种传入相同种子可复现）
+        
+        Returns:
+            ["等级:技能", ..., "egg:技能", ..., "tm:技能", ...]
+        """
+        rng = random.Random(seed)
+        chosen: set = set()
+        level_moves: List[Tuple[int, str]] = []
+        
+        def draw(move_type: str, tier: str, count: int, level: Optional[int] = None):
+            pool = self.type_tiers.get(move_type, {}).get(tier)
+            if not pool:
+                return
+            for move_id in pool.sample(rng, count, chosen):
+                chosen.add(move_id)
+                level_moves.append((level or self.level_for(move_id, tier, rng), move_id))
+        
+        # 初始技能：一般系的弱技能 + 变化技能
+        draw("Normal", "weak", 1, level=1)
+        draw("Normal", "status", 1, level=1)
+        
+        # 主属性：每档一到两个，副属性：中、强各一个
+        for tier, count in (("weak", 2), ("medium", 2), ("strong", 1), ("ultimate", 1), ("status", 1)):
+            draw(primary_type, tier, count)
+        if secondary_type:
+            for tier in ("medium", "strong"):
+                draw(secondary_type, tier, 1)
+        
+        moves = [f"{level}:{move_id}" for level, move_id in sorted(level_moves)]
+        
+        # 蛋技能：主/副属性的常见蛋技能
+        eggs: List[str] = []
+        for move_type in filter(None, (primary_type, secondary_type, "Normal")):
+            pool = self.egg_pools.get(move_type)
+            if pool and len(eggs) < 3:
+                eggs.extend(pool.sample(rng, 3 - len(eggs), chosen | set(eggs)))
+        moves.extend(f"egg:{move_id}" for move_id in eggs)
+        
+        # 招式学习器：通用技能 + 主属性技能
+        tms = self.universal_tms.sample(rng, 6, set()) if self.universal_tms else []
+        pool = self.tm_pools.get(primary_type)
+        if pool:
+            tms.extend(pool.sample(rng, 2, set(tms)))
+        moves.extend(f"tm:{move_id}" for move_id in tms)
+        
+        return moves
@@ -35,8 +35,14 @@ class MoveGenerator:
         'lower_all': {'atk': -1, 'def': -1, 'spa': -1, 'spd': -1, 'spe': -1},
     }
     
-    def __init__(self):
-        """初始化生成器"""
+    def __init__(self, template_library=None):
+        """
+        初始化生成器
+        
+        Args:
+            template_library: 模板库（提供时在结果中附带数值相近的真实技能作为平衡参考）
+        """
+        self.template_library = template_library
         logger.info("✅ 技能生成器初始化完成（规则引擎模式）")
     
     def generate(
@@ -109,7 +115,7 @@ class MoveGenerator:
         
         logger.info(f"✅ 生成完成：{name}")
         
-        return {
+        result = {
             'success': True,
             'code': code,
             'name': name,
@@ -117,6 +123,33 @@ class MoveGenerator:
             'category': category,
             'basePower': base_power
         }
+        hints = self._balance_hints(move)
+        if hints:
+            result['balance_hints'] = hints
+        return result
+    
+    def _balance_hints(self, move: Dict[str, Any], k: int = 5) -> list:
+        """
+        数值最接近的同属性同分类真实技能（平衡参考）
+        
+        Args:
+            move: 技能字典
+            k: 参考技能数量
+        
+        Returns:
+            精简的技能摘要列表（无模板库或参考数据时为空）
+        """
+        if self.template_library is None:
+            return []
+        try:
+            neighbors = self.template_library.get_move_neighbors()
+            if not neighbors:
+                return []
+            ranked = neighbors.nearest(move, k=k, type=move['type'], category=move['category'])
+            return neighbors.describe(ranked)
+        except Exception as e:
+            logger.warning(f"⚠️ 平衡参考获取失败：{e}")
+            return []
     
     def _generate_flags(self, category: str, contact: Optional[bool]) -> Dict[str, int]:
         """
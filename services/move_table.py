@@ -0,0 +1,236 @@
+"""
+CobbleSeer - 技能数据的列式视图
+
+技能解析结果是字典的字典，统计（威力分布、属性计数、平衡分位数）需要逐条遍历
+Python 对象。MoveTable 把技能数据转成列：
+
+- 数值列：num / basePower / accuracy / pp / priority（NumPy 数组）
+- 分类列：type / category / target（整数编码 + 标签表）
+- 标志位：flags 按位编码为 uint64 掩码
+
+过滤和统计都是单个向量化表达式。accuracy 为 true（必中）的技能在 accuracy 列
+中记为 inf，always_hits 列单独标记。
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+# 可排序的列（"id" 按技能ID字母序）
+SORT_COLUMNS = ("num", "basePower", "accuracy", "pp", "priority", "id")
+
+# 威力档位（左闭右开）
+POWER_BINS = [1, 50, 80, 100, 120, np.inf]
+POWER_BIN_LABELS = ["<50", "50-79", "80-99", "100-119", ">=120"]
+
+
+def _number(value: Any, default: float = 0) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return default
+
+
+def _encode(values: List[Any]) -> tuple:
+    """分类列编码：返回 (编码数组, 标签列表)，缺失值为 -1"""
+    labels = sorted({v for v in values if isinstance(v, str)})
+    lookup = {label: code for code, label in enumerate(labels)}
+    codes = np.fromiter((lookup.get(v, -1) for v in values), dtype=np.int16, count=len(values))
+    return codes, labels
+
+
+class MoveTable:
+    """技能数据的列式视图（只读，技能数据变化时重建）"""
+    
+    def __init__(self, moves: Dict[str, Dict[str, Any]]):
+        """
+        建立列
+        
+        Args:
+            moves: 技能ID -> 技能数据（get_move_records 的结果）
+        """
+        self.moves = moves
+        items = list(moves.values())
+        n = len(items)
+        self.ids = np.array(list(moves), dtype=object)
+        
+        self.num = np.fromiter((_number(m.get("num")) for m in items), dtype=np.int32, count=n)
+        self.basePower = np.fromiter((_number(m.get("basePower")) for m in items), dtype=np.float32, count=n)
+        self.accuracy = np.fromiter(
+            (np.inf if m.get("accuracy") is True else _number(m.get("accuracy"), np.nan) for m in items),
+            dtype=np.float32, count=n
+        )
+        self.pp = np.fromiter((_number(m.get("pp")) for m in items), dtype=np.int16, count=n)
+        self.priority = np.fromiter((_number(m.get("priority")) for m in items), dtype=np.int8, count=n)
+        self.has_secondary = np.fromiter((m.get("secondary") is not None for m in items), dtype=bool, count=n)
+        
+        self.type, self.type_labels = _encode([m.get("type") for m in items])
+        self.category, self.category_labels = _encode([m.get("category") for m in items])
+        self.target, self.target_labels = _encode([m.get("target") for m in items])
+        
+        # 标志位掩码（Showdown 的 flags 不超过64种）
+        flag_names = sorted({f for m in items if isinstance(m.get("flags"), dict) for f in m["flags"]})[:64]
+        self.flag_bits = {name: np.uint64(1) << np.uint64(bit) for bit, name in enumerate(flag_names)}
+        self.flags = np.zeros(n, dtype=np.uint64)
+        for row, move_data in enumerate(items):
+            flags = move_data.get("flags")
+            if isinstance(flags, dict):
+                bits = 0
+                for name, value in flags.items():
+                    if value and name in self.flag_bits:
+                        bits |= int(self.flag_bits[name])
+                self.flags[row] = bits
+        
+        self._id_rank: Optional[np.ndarray] = None
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @property
+    def always_hits(self) -> np.ndarray:
+        """必中技能"""
+        return np.isinf(self.accuracy)
+    
+    def code(self, column: str, label: Optional[str]) -> int:
+        """分类列标签对应的编码（不存在时为 -2，不匹配任何行）"""
+        labels = getattr(self, f"{column}_labels")
+        try:
+            return labels.index(label)
+        except ValueError:
+            return -2
+    
+    def flag_mask(self, names: Iterable[str]) -> Optional[np.uint64]:
+        """标志位名称 -> 掩码（未知标志返回 None）"""
+        mask = 0
+        for name in names:
+            if name not in self.flag_bits:
+                return None
+            mask |= int(self.flag_bits[name])
+        return np.uint64(mask)
+    
+    def mask(
+        self,
+        type: Optional[str] = None,
+        category: Optional[str] = None,
+        power_min: float = 0,
+        power_max: float = 999,
+        has_priority: Optional[bool] = None,
+        has_secondary: Optional[bool] = None,
+        flags: Optional[Iterable[str]] = None
+    ) -> np.ndarray:
+        """
+        组合过滤条件（与 TemplateLibrary.search_moves 参数一致，另加 flags）
+        
+        Args:
+            flags: 必须全部具备的标志（如 ["contact", "punch"]）
+        
+        Returns:
+            布尔掩码
+        """
+        selected = (self.basePower >= power_min) & (self.basePower <= power_max)
+        if type:
+            selected &= self.type == self.code("type", type)
+        if category:
+            selected &= self.category == self.code("category", category)
+        if has_priority is not None:
+            selected &= (self.priority != 0) == has_priority
+        if has_secondary is not None:
+            selected &= self.has_secondary == has_secondary
+        if flags:
+            required = self.flag_mask(flags)
+            if required is None:
+                return np.zeros(len(self), dtype=bool)
+            selected &= (self.flags & required) == required
+        return selected
+    
+    def value_counts(self, column: str, mask: Optional[np.ndarray] = None) -> Dict[Any, int]:
+        """
+        计数（按数量降序）
+        
+        Args:
+            column: 分类列（type/category/target）或整数列（priority/pp/...）
+            mask: 只统计掩码选中的行
+        """
+        values = getattr(self, column)
+        if mask is not None:
+            values = values[mask]
+        labels = getattr(self, f"{column}_labels", None)
+        
+        if labels is not None:
+            counts = np.bincount(values[values >= 0], minlength=len(labels))
+            pairs = [(labels[code], int(count)) for code, count in enumerate(counts) if count]
+        else:
+            unique, counts = np.unique(values, return_counts=True)
+            pairs = [(unique[i].item(), int(counts[i])) for i in range(len(unique))]
+        return dict(sorted(pairs, key=lambda pair: -pair[1]))
+    
+    def flag_counts(self, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """各标志位的技能数（按数量降序）"""
+        flags = self.flags if mask is None else self.flags[mask]
+        counts = {name: int(np.count_nonzero(flags & bit)) for name, bit in self.flag_bits.items()}
+        return dict(sorted(((k, v) for k, v in counts.items() if v), key=lambda pair: -pair[1]))
+    
+    def power_stats(
+        self,
+        mask: Optional[np.ndarray] = None,
+        percentiles: Iterable[float] = (25, 50, 75, 90)
+    ) -> Dict[str, Any]:
+        """
+        威力统计（只统计威力大于0的技能）
+        
+        Returns:
+            count / min / max / mean / 分位数 / 档位计数
+        """
+        powers = self.basePower if mask is None else self.basePower[mask]
+        powers = powers[powers > 0]
+        if not powers.size:
+            return {"count": 0}
+        
+        percentiles = list(percentiles)
+        values = np.percentile(powers, percentiles)
+        histogram, _ = np.histogram(powers, bins=POWER_BINS)
+        return {
+            "count": int(powers.size),
+            "min": float(powers.min()),
+            "max": float(powers.max()),
+            "mean": round(float(powers.mean()), 2),
+            "percentiles": {f"p{p:g}": float(v) for p, v in zip(percentiles, values)},
+            "bins": dict(zip(POWER_BIN_LABELS, histogram.astype(int).tolist()))
+        }
+    
+    def order(self, mask: np.ndarray, sort: Optional[str] = None) -> np.ndarray:
+        """
+        掩码选中的行号，按指定列排序（同值保持原始顺序）
+        
+        Args:
+            mask: 布尔掩码
+            sort: 排序列（SORT_COLUMNS 之一），前缀 "-" 表示降序；None 为原始顺序
+        
+        Raises:
+            ValueError: 未知的排序列
+        """
+        positions = np.flatnonzero(mask)
+        if not sort:
+            return positions
+        
+        descending = sort.startswith("-")
+        column = sort.lstrip("-")
+        if column not in SORT_COLUMNS:
+            raise ValueError(f"未知的排序列: {column}（可选：{'/'.join(SORT_COLUMNS)}）")
+        
+        if column == "id":
+            if self._id_rank is None:
+                self._id_rank = np.argsort(np.argsort(self.ids.astype(str), kind="stable"), kind="stable")
+            keys = self._id_rank[positions]
+        else:
+            keys = getattr(self, column)[positions].astype(np.float64)
+            # 缺失的命中率（nan）排在最后
+            keys = np.nan_to_num(keys, nan=-np.inf if descending else np.inf)
+        if descending:
+            keys = -keys
+        return positions[np.lexsort((positions, keys))]
+    
+    def rows(self, mask: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+        """掩码选中的行号（按原始顺序）"""
+        positions = np.flatnonzero(mask)
+        return positions if limit is None else positions[:limit]
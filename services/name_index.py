@@ -0,0 +1,243 @@
+"""
+CobbleSeer - 技能 / 特性名称解析与补全
+
+用户输入的名称常有拼写错误或只写了一半（"thundr"、"flamethrow"、"十万伏"）。
+NameIndex 把每个技能 / 特性的 ID、显示名称和语言文件中的翻译归一化为键，建立：
+
+- 有序键数组：前缀补全用二分查找定位键区间（等价于一棵压平的前缀树，没有逐字符节点对象）
+- 三元组倒排表：三元组 -> 键位置数组，模糊匹配时一次 bincount 统计共有三元组数，
+  按 Jaccard 相似度排序
+
+单次查询只有几次数组运算，约数十微秒，不需要嵌入检索。
+"""
+
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+# 条目类型（位掩码，一个键可能同时是技能名和特性名）
+KINDS = ("move", "ability")
+_KIND_BITS = {kind: 1 << i for i, kind in enumerate(KINDS)}
+
+# 低于此相似度的模糊匹配不返回
+MIN_SCORE = 0.3
+
+# Cobblemon 语言文件中的名称键（不含 .desc 等说明键）
+_LANG_KEY = re.compile(r"^cobblemon\.(move|ability)\.([a-z0-9_]+)$")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_name(text: str) -> str:
+    """名称 -> 键（小写，去掉空格、标点和下划线；中文字符保留）"""
+    return _NON_WORD.sub("", text.lower())
+
+
+def trigrams(key: str) -> set:
+    """键的三元组（首部补两个空格、尾部补一个，短名称和词首也能匹配）"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def iter_lang_names(data: Dict[str, Any]) -> Iterator[Tuple[str, str, str]]:
+    """语言文件内容 -> (类型, ID, 名称)"""
+    for key, name in data.items():
+        match = _LANG_KEY.match(key)
+        if match and isinstance(name, str) and name:
+            yield match.group(1), normalize_name(match.group(2)), name
+
+
+class NameIndex:
+    """名称索引（只读，技能 / 特性数据重新加载后重建）"""
+    
+    def __init__(self, entries: Iterable[Tuple[str, str, List[str]]]):
+        """
+        建立索引
+        
+        Args:
+            entries: (类型, ID, [显示名称, 其他名称...])，ID 本身总是作为一个键
+        """
+        # 目标：(类型, ID, 显示名称)
+        self.targets: List[Tuple[str, str, str]] = []
+        self.ids: Dict[str, set] = {kind: set() for kind in KINDS}
+        key_targets: Dict[str, List[int]] = defaultdict(list)
+        labels: Dict[str, str] = {}
+        
+        for kind, item_id, names in entries:
+            target = len(self.targets)
+            self.targets.append((kind, item_id, names[0] if names else item_id))
+            self.ids[kind].add(item_id)
+            for label in [item_id, *names]:
+                key = normalize_name(label)
+                if key and target not in key_targets[key]:
+                    key_targets[key].append(target)
+                    labels.setdefault(key, label)
+        
+        self.keys: List[str] = sorted(key_targets)
+        self.labels = [labels[key] for key in self.keys]
+        self.key_targets = [key_targets[key] for key in self.keys]
+        self.key_kinds = np.array(
+            [self._kind_mask(targets) for targets in self.key_targets], dtype=np.int8
+        ).reshape(len(self.keys))
+        
+        postings: Dict[str, List[int]] = defaultdict(list)
+        gram_counts = []
+        for position, key in enumerate(self.keys):
+            grams = trigrams(key)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(position)
+        self.gram_counts = np.array(gram_counts, dtype=np.int32)
+        self.postings: Dict[str, np.ndarray] = {
+            gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()
+        }
+    
+    @classmethod
+    def build(
+        cls,
+        moves: Dict[str, Any],
+        abilities: Dict[str, Any],
+        translations: Optional[Dict[Tuple[str, str], List[str]]] = None
+    ) -> "NameIndex":
+        """
+        由技能 / 特性数据和翻译建立索引
+        
+        Args:
+            moves: 技能ID -> 技能数据
+            abilities: 特性ID -> 特性数据
+            translations: (类型, ID) -> 翻译名称列表（语言文件）
+        """
+        translations = translations or {}
+        
+        def entries():
+            for kind, items in (("move", moves), ("ability", abilities)):
+                for item_id, data in items.items():
+                    name = data.get("name") if hasattr(data, "get") else None
+                    names = [name] if isinstance(name, str) and name else []
+                    yield kind, item_id, names + translations.get((kind, item_id), [])
+        
+        return cls(entries())
+    
+    def __len__(self) -> int:
+        return len(self.targets)
+    
+    def _kind_mask(self, targets: List[int]) -> int:
+        mask = 0
+        for target in targets:
+            mask |= _KIND_BITS[self.targets[target][0]]
+        return mask
+    
+    def contains(self, kind: str, item_id: str) -> bool:
+        """ID 是否存在"""
+        return item_id in self.ids.get(kind, ())
+    
+    def _prefix_range(self, key: str) -> Tuple[int, int]:
+        """以 key 为前缀的键在有序数组中的区间"""
+        # "\U0010ffff" 大于任何字符，key + 它是所有以 key 开头的键的上界
+        return bisect_left(self.keys, key), bisect_left(self.keys, key + "\U0010ffff")
+    
+    def _result(self, target: int, position: int, score: float, match: str) -> Dict[str, Any]:
+        kind, item_id, name = self.targets[target]
+        return {
+            "id": item_id,
+            "kind": kind,
+            "name": name,
+            "matched": self.labels[position],
+            "score": round(score, 3),
+            "match": match
+        }
+    
+    def resolve(
+        self,
+        query: str,
+        kind: Optional[str] = None,
+        limit: int = 5,
+        min_score: float = MIN_SCORE
+    ) -> List[Dict[str, Any]]:
+        """
+        名称解析：精确 > 前缀 / 模糊，同一条目只保留得分最高的匹配
+        
+        前缀匹配得分为输入占键长的比例，模糊匹配得分为三元组 Jaccard 相似度。
+        
+        Args:
+            query: 用户输入的名称（ID、英文名、中文名，可有拼写错误）
+            kind: 只解析该类型（move / ability）
+            limit: 最多返回数量
+            min_score: 最低得分
+        
+        Returns:
+            [{"id", "kind", "name", "matched", "score", "match"}, ...]，按得分降序
+        """
+        key = normalize_name(query)
+        if not key or limit <= 0:
+            return []
+        kind_bit = _KIND_BITS.get(kind, 0) if kind else 0
+        # 目标 -> (得分, 键位置, 匹配方式)
+        best: Dict[int, Tuple[float, int, str]] = {}
+        
+        def offer(position: int, score: float, match: str):
+            if kind_bit and not self.key_kinds[position] & kind_bit:
+                return
+            for target in self.key_targets[position]:
+                if kind and self.targets[target][0] != kind:
+                    continue
+                if target not in best or score > best[target][0]:
+                    best[target] = (score, position, match)
+        
+        low, high = self._prefix_range(key)
+        for position in range(low, min(high, low + 64)):
+            candidate = self.keys[position]
+            if candidate == key:
+                offer(position, 1.0, "exact")
+            else:
+                offer(position, len(key) / len(candidate), "prefix")
+        
+        grams = trigrams(key)
+        arrays = [self.postings[gram] for gram in grams if gram in self.postings]
+        if arrays:
+            shared = np.bincount(np.concatenate(arrays), minlength=len(self.keys))
+            positions = np.flatnonzero(shared)
+            scores = shared[positions] / (len(grams) + self.gram_counts[positions] - shared[positions])
+            keep = scores >= min_score
+            for position, score in zip(positions[keep].tolist(), scores[keep].tolist()):
+                offer(position, score, "fuzzy")
+        
+        ranked = sorted(
+            (item for item in best.items() if item[1][0] >= min_score),
+            key=lambda item: (-item[1][0], self.targets[item[0]][1])
+        )
+        return [self._result(target, position, score, match) for target, (score, position, match) in ranked[:limit]]
+    
+    def complete(self, prefix: str, kind: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        前缀补全（较短的键优先，即最接近输入的名称在前）
+        
+        Args:
+            prefix: 已输入的部分名称
+            kind: 只补全该类型（move / ability）
+            limit: 最多返回数量
+        
+        Returns:
+            [{"id", "kind", "name", "matched", "score", "match"}, ...]
+        """
+        key = normalize_name(prefix)
+        if not key or limit <= 0:
+            return []
+        low, high = self._prefix_range(key)
+        positions = sorted(range(low, high), key=lambda position: (len(self.keys[position]), self.keys[position]))
+        
+        results: List[Dict[str, Any]] = []
+        seen = set()
+        for position in positions:
+            for target in self.key_targets[position]:
+                if target in seen or (kind and self.targets[target][0] != kind):
+                    continue
+                seen.add(target)
+                candidate = self.keys[position]
+                results.append(self._result(target, position, len(key) / len(candidate), "exact" if candidate == key else "prefix"))
+                if len(results) >= limit:
+                    return results
+        return results
@@ -2,9 +2,9 @@
 CobbleSeer - RAG检索服务
 
 负责从参考库中检索相似内容：
-- 向量化文本（sentence-transformers）
-- 存储到ChromaDB
-- 语义搜索
+- 向量化文本（sentence-transformers 或 ONNX）
+- 存储到向量库（ChromaDB 或 NumPy 内存索引）
+- 混合检索（结构化过滤 + 向量 + BM25）
 - 返回Top-K相似结果
 
 参考库来源：
@@ -14,9 +14,22 @@ CobbleSeer - RAG检索服务
 """
 
 from typing import List, Dict, Any, Optional
-from pathlib import Path
+import json
+import numpy as np
 from loguru import logger
 
+from services.hybrid_search import (
+    BM25Index,
+    build_where,
+    matches_filters,
+    parse_query_filters,
+    reciprocal_rank_fusion,
+)
+from services.embedding_daemon import RemoteEmbeddingModel, RemoteVectorStore, connect_daemon
+from services.embeddings import DEFAULT_MODEL, ONNX_PREFIX, create_embedding_model
+from services.reranker import StructuredReranker, parse_move_intent
+from services.vector_store import create_sharded_vector_store, create_vector_store
+
 
 class RAGService:
     """RAG检索服务"""
@@ -30,6 +43,7 @@ class RAGService:
         """
         self.config = config
         self.enabled = config.get("rag", {}).get("enabled", True)
+        self.daemon_client = None
         
         if not self.enabled:
             logger.warning("⚠️  RAG服务已禁用")
@@ -38,58 +52,65 @@ class RAGService:
         self.collection_name = config.get("rag", {}).get("collection_name", "cobblemon_reference")
         self.top_k = config.get("rag", {}).get("top_k", 5)
         
-        # 初始化ChromaDB和嵌入模型
-        self._init_chroma()
+        # 混合检索配置
+        hybrid_config = config.get("rag", {}).get("hybrid", {}) or {}
+        self.hybrid_enabled = hybrid_config.get("enabled", True)
+        self.candidate_pool = hybrid_config.get("candidate_pool", 20)
+        self.rrf_k = hybrid_config.get("rrf_k", 60)
+        self.power_tolerance = hybrid_config.get("power_tolerance", 10)
+        self._lexical_corpora: Dict[str, Dict[str, Any]] = {}
+        
+        # 结构化重排序（在更大的候选池上按属性/分类/数值打分）
+        self.reranker = StructuredReranker(config)
+        
+        # 初始化向量存储和嵌入模型（共享守护进程可用时通过 socket 访问）
+        self.daemon_client = connect_daemon(config)
+        self._init_vector_store()
         self._init_embedding_model()
         
         logger.info(f"✅ RAG服务初始化完成（集合：{self.collection_name}）")
     
-    def _init_chroma(self):
-        """初始化ChromaDB"""
+    def _init_vector_store(self):
+        """
+        初始化向量存储（rag.vector_store：chroma | numpy）
+        
+        每种数据类型一个分片集合（<集合名>_<类型>），旧的单集合数据自动迁移。
+        """
+        backend = self.config.get("rag", {}).get("vector_store", "chroma")
         try:
-            import chromadb
-            from chromadb.config import Settings
-            
-            # 数据目录
-            data_dir = Path(__file__).parent.parent / "data" / "chroma_db"
-            data_dir.mkdir(parents=True, exist_ok=True)
-            
-            # 创建客户端
-            self.chroma_client = chromadb.PersistentClient(
-                path=str(data_dir),
-                settings=Settings(anonymized_telemetry=False)
-            )
-            
-            # 获取或创建集合
-            self.collection = self.chroma_client.get_or_create_collection(
-                name=self.collection_name,
-                metadata={"description": "Cobblemon reference data"}
-            )
-            
-            logger.info(f"✅ ChromaDB初始化成功（路径：{data_dir}）")
+            shard_factory = None
+            if self.daemon_client:
+                def shard_factory(name):
+                    return RemoteVectorStore(
+                        self.daemon_client, name, lambda: create_vector_store(self.config, name)
+                    )
+            self.store = create_sharded_vector_store(self.config, self.collection_name, shard_factory)
+            logger.info(f"✅ 向量存储初始化成功（后端：{self.store.backend}，分片：{'/'.join(self.store.shards)}）")
         
         except ImportError:
-            logger.error("❌ chromadb库未安装，请运行：pip install chromadb")
-            self.chroma_client = None
-            self.collection = None
+            logger.error(f"❌ {backend}后端依赖未安装，请运行：pip install -r requirements.txt")
+            self.store = None
         except Exception as e:
-            logger.error(f"❌ ChromaDB初始化失败：{e}")
-            self.chroma_client = None
-            self.collection = None
+            logger.error(f"❌ 向量存储初始化失败：{e}")
+            self.store = None
     
     def _init_embedding_model(self):
-        """初始化嵌入模型"""
+        """初始化嵌入模型（rag.embedding_model："onnx:<目录>" 使用ONNX后端）"""
+        model_name = self.config.get("rag", {}).get("embedding_model", DEFAULT_MODEL)
         try:
-            from sentence_transformers import SentenceTransformer
-            
-            model_name = self.config.get("rag", {}).get("embedding_model", "sentence-transformers/all-MiniLM-L6-v2")
+            if self.daemon_client:
+                self.embedding_model = RemoteEmbeddingModel(self.daemon_client, lambda: create_embedding_model(model_name))
+                return
             
             logger.info(f"🔄 加载嵌入模型：{model_name}...")
-            self.embedding_model = SentenceTransformer(model_name)
+            self.embedding_model = create_embedding_model(model_name)
             logger.info(f"✅ 嵌入模型加载成功")
         
         except ImportError:
-            logger.error("❌ sentence-transformers库未安装，请运行：pip install sentence-transformers")
+            if model_name.startswith(ONNX_PREFIX):
+                logger.error("❌ onnxruntime/tokenizers库未安装，请运行：pip install onnxruntime tokenizers")
+            else:
+                logger.error("❌ sentence-transformers库未安装，请运行：pip install sentence-transformers")
             self.embedding_model = None
         except Exception as e:
             logger.error(f"❌ 嵌入模型加载失败：{e}")
@@ -97,7 +118,10 @@ class RAGService:
     
     async def search_moves(self, query: str, top_k: int = None) -> List[Dict[str, Any]]:
         """
-        搜索相似技能
+        搜索相似技能（混合检索）
+        
+        查询中的属性/分类/威力（如"火系物理 威力90"）作为结构化预过滤，
+        向量检索与BM25词法检索的排名通过RRF融合，再在候选池上做结构化重排序。
         
         Args:
             query: 查询文本
@@ -106,52 +130,59 @@ class RAGService:
         Returns:
             相似技能列表
         """
-        if not self.enabled or not self.collection:
+        return (await self.search_moves_batch([query], top_k))[0]
+    
+    async def search_moves_batch(
+        self,
+        queries: List[str],
+        top_k: int = None,
+        query_embeddings: Optional[List[List[float]]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        批量搜索相似技能
+        
+        所有查询一次向量化，过滤条件相同的查询合并为一次多向量检索。
+        
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询返回的结果数量
+            query_embeddings: 已计算的查询向量（调用方已向量化时避免重复计算）
+        
+        Returns:
+            与 queries 顺序一致的相似技能列表
+        """
+        if not self.enabled or not self.store:
             logger.warning("⚠️  RAG服务不可用，返回空结果")
-            return []
+            return [[] for _ in queries]
         
         k = top_k or self.top_k
         
         try:
-            logger.debug(f"🔍 搜索技能：{query[:50]}...")
+            logger.debug(f"🔍 搜索技能：{len(queries)}个查询")
             
-            # 向量化查询
-            query_embedding = self.embedding_model.encode(query).tolist()
+            filters_list = [parse_query_filters(query, self.power_tolerance) for query in queries]
+            pool = max(k, self.reranker.pool) if self.reranker.enabled else k
+            if query_embeddings is None:
+                query_embeddings = self._encode(queries)
+            hits_list = self._hybrid_search_batch("move", queries, query_embeddings, pool, filters_list)
+            results = [[self._format_move(hit) for hit in hits] for hits in hits_list]
             
-            # 搜索
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=k,
-                where={"type": "move"}  # 过滤技能类型
-            )
-            
-            # 解析结果
-            moves = []
-            if results and results["documents"]:
-                for i, doc in enumerate(results["documents"][0]):
-                    metadata = results["metadatas"][0][i] if results["metadatas"] else {}
-                    distance = results["distances"][0][i] if results["distances"] else 0
-                    
-                    moves.append({
-                        "name": metadata.get("name", "Unknown"),
-                        "basePower": metadata.get("basePower", 0),
-                        "accuracy": metadata.get("accuracy", 100),
-                        "type": metadata.get("move_type", "Normal"),
-                        "category": metadata.get("category", "Physical"),
-                        "content": doc,
-                        "similarity": 1 - distance  # 距离转相似度
-                    })
+            if self.reranker.enabled:
+                results = [
+                    self.reranker.rerank(candidates, parse_move_intent(query, self.power_tolerance), k)
+                    for query, candidates in zip(queries, results)
+                ]
             
-            logger.debug(f"✅ 找到 {len(moves)} 个相似技能")
-            return moves
+            logger.debug(f"✅ 找到 {sum(len(r) for r in results)} 个相似技能")
+            return results
         
         except Exception as e:
             logger.error(f"❌ 技能搜索失败：{e}")
-            return []
+            return [[] for _ in queries]
     
     async def search_abilities(self, query: str, top_k: int = None) -> List[Dict[str, Any]]:
         """
-        搜索相似特性
+        搜索相似特性（混合检索）
         
         Args:
             query: 查询文本
@@ -160,45 +191,259 @@ class RAGService:
         Returns:
             相似特性列表
         """
-        if not self.enabled or not self.collection:
+        return (await self.search_abilities_batch([query], top_k))[0]
+    
+    async def search_abilities_batch(self, queries: List[str], top_k: int = None) -> List[List[Dict[str, Any]]]:
+        """
+        批量搜索相似特性
+        
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询返回的结果数量
+        
+        Returns:
+            与 queries 顺序一致的相似特性列表
+        """
+        if not self.enabled or not self.store:
             logger.warning("⚠️  RAG服务不可用，返回空结果")
-            return []
+            return [[] for _ in queries]
         
         k = top_k or self.top_k
         
         try:
-            logger.debug(f"🔍 搜索特性：{query[:50]}...")
-            
-            # 向量化查询
-            query_embedding = self.embedding_model.encode(query).tolist()
+            logger.debug(f"🔍 搜索特性：{len(queries)}个查询")
             
-            # 搜索
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=k,
-                where={"type": "ability"}  # 过滤特性类型
-            )
-            
-            # 解析结果
-            abilities = []
-            if results and results["documents"]:
-                for i, doc in enumerate(results["documents"][0]):
-                    metadata = results["metadatas"][0][i] if results["metadatas"] else {}
-                    distance = results["distances"][0][i] if results["distances"] else 0
-                    
-                    abilities.append({
-                        "name": metadata.get("name", "Unknown"),
-                        "content": doc,
-                        "similarity": 1 - distance
-                    })
+            hits_list = self._hybrid_search_batch("ability", queries, self._encode(queries), k, [{} for _ in queries])
+            results = [[self._format_ability(hit) for hit in hits] for hits in hits_list]
             
-            logger.debug(f"✅ 找到 {len(abilities)} 个相似特性")
-            return abilities
+            logger.debug(f"✅ 找到 {sum(len(r) for r in results)} 个相似特性")
+            return results
         
         except Exception as e:
             logger.error(f"❌ 特性搜索失败：{e}")
+            return [[] for _ in queries]
+    
+    async def search_references(
+        self,
+        data_type: str,
+        query: str,
+        top_k: int = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        通用检索（返回原始命中，供 search_reference 工具投影和分页）
+        
+        技能查询中解析出的属性/分类/威力与显式过滤条件合并，显式条件优先。
+        
+        Args:
+            data_type: 数据类型（move/ability/pokemon）
+            query: 查询文本
+            top_k: 返回结果数量
+            filters: 显式过滤条件（move_type / category / power_min / power_max）
+        
+        Returns:
+            [{"id", "document", "metadata", "similarity", "score"}]
+        """
+        if not self.enabled or not self.store:
+            logger.warning("⚠️  RAG服务不可用，返回空结果")
+            return []
+        
+        k = top_k or self.top_k
+        
+        try:
+            merged = parse_query_filters(query, self.power_tolerance) if data_type == "move" else {}
+            merged.update(filters or {})
+            return self._hybrid_search_batch(data_type, [query], self._encode([query]), k, [merged])[0]
+        
+        except Exception as e:
+            logger.error(f"❌ 参考检索失败：{e}")
             return []
     
+    def encode(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """
+        向量化文本（供语义缓存等复用检索所用的嵌入模型）
+        
+        Returns:
+            向量列表；RAG服务或嵌入模型不可用时返回 None
+        """
+        if not self.enabled or getattr(self, "embedding_model", None) is None:
+            return None
+        return self._encode(texts)
+    
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """一次模型调用向量化全部文本"""
+        if not texts:
+            return []
+        return np.asarray(self.embedding_model.encode(texts), dtype=np.float32).tolist()
+    
+    @staticmethod
+    def _format_move(hit: Dict[str, Any]) -> Dict[str, Any]:
+        """将检索结果转换为技能字典"""
+        metadata = hit["metadata"]
+        return {
+            "name": metadata.get("name", "Unknown"),
+            "basePower": metadata.get("basePower", 0),
+            "accuracy": metadata.get("accuracy", 100),
+            "type": metadata.get("move_type", "Normal"),
+            "category": metadata.get("category", "Physical"),
+            "pp": metadata.get("pp"),
+            "content": hit["document"],
+            "similarity": hit["similarity"]
+        }
+    
+    @staticmethod
+    def _format_ability(hit: Dict[str, Any]) -> Dict[str, Any]:
+        """将检索结果转换为特性字典"""
+        return {
+            "name": hit["metadata"].get("name", "Unknown"),
+            "content": hit["document"],
+            "similarity": hit["similarity"]
+        }
+    
+    def _vector_search_batch(
+        self,
+        data_type: str,
+        query_embeddings: List[List[float]],
+        pool: int,
+        filters_list: List[Dict[str, Any]]
+    ) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        批量向量检索
+        
+        过滤条件相同的查询合并为一次多向量检索；过滤条件过严（无结果）
+        的查询放宽为仅按数据类型过滤后再合并检索一次。
+        
+        Args:
+            data_type: 数据类型
+            query_embeddings: 查询向量列表
+            pool: 每个查询的候选数量
+            filters_list: 每个查询的过滤条件（无结果时原地置空）
+        
+        Returns:
+            每个查询的 {文档ID: 命中}（按相似度降序）
+        """
+        hits_list: List[Dict[str, Dict[str, Any]]] = [{} for _ in query_embeddings]
+        
+        def run(indices: List[int]):
+            groups: Dict[str, List[int]] = {}
+            for i in indices:
+                groups.setdefault(json.dumps(build_where(data_type, filters_list[i]), sort_keys=True), []).append(i)
+            
+            for where_key, members in groups.items():
+                results = self.store.query(
+                    query_embeddings=[query_embeddings[i] for i in members],
+                    n_results=pool,
+                    where=json.loads(where_key)
+                )
+                for row, i in enumerate(members):
+                    for doc_id, document, metadata, distance in zip(
+                        results["ids"][row], results["documents"][row],
+                        results["metadatas"][row], results["distances"][row]
+                    ):
+                        hits_list[i][doc_id] = {
+                            "id": doc_id,
+                            "document": document,
+                            "metadata": metadata or {},
+                            "similarity": 1 - distance  # 距离转相似度
+                        }
+        
+        run(list(range(len(query_embeddings))))
+        
+        relaxed = [i for i, hits in enumerate(hits_list) if not hits and filters_list[i]]
+        if relaxed:
+            logger.debug(f"  {len(relaxed)}个查询过滤条件无结果，放宽为仅按类型过滤")
+            for i in relaxed:
+                filters_list[i] = {}
+            run(relaxed)
+        
+        return hits_list
+    
+    def _hybrid_search_batch(
+        self,
+        data_type: str,
+        queries: List[str],
+        query_embeddings: List[List[float]],
+        k: int,
+        filters_list: List[Dict[str, Any]]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        混合检索：结构化预过滤 + 向量检索 + BM25，RRF融合
+        
+        Args:
+            data_type: 数据类型（move/ability/pokemon）
+            queries: 查询文本列表
+            query_embeddings: 查询向量列表
+            k: 每个查询返回的数量
+            filters_list: 每个查询的结构化过滤条件
+        
+        Returns:
+            每个查询的 [{"id", "document", "metadata", "similarity", "score"}]
+        """
+        pool = max(k, self.candidate_pool)
+        filters_list = [dict(filters) for filters in filters_list]
+        vector_hits = self._vector_search_batch(data_type, query_embeddings, pool, filters_list)
+        
+        if not self.hybrid_enabled:
+            return [
+                [dict(hit, score=hit["similarity"]) for hit in list(hits.values())[:k]]
+                for hits in vector_hits
+            ]
+        
+        corpus = self._get_lexical_corpus(data_type)
+        index = corpus["index"]
+        output = []
+        
+        for query, query_embedding, filters, hits in zip(queries, query_embeddings, filters_list, vector_hits):
+            # BM25：查询附加解析出的属性/分类英文名，便于匹配英文文档
+            lexical_query = " ".join([query] + [str(v) for key, v in filters.items() if key in ("move_type", "category")])
+            lexical = index.search(lexical_query, pool, allowed=lambda md, f=filters: matches_filters(md, f))
+            lexical_ranking = [index.ids[position] for position, _ in lexical]
+            
+            fused = reciprocal_rank_fusion([list(hits), lexical_ranking], self.rrf_k)[:k]
+            
+            results = []
+            for doc_id, score in fused:
+                hit = hits.get(doc_id)
+                if hit is None:
+                    # 仅被词法检索命中：从语料中补全文档并计算向量相似度
+                    position = corpus["positions"][doc_id]
+                    hit = {
+                        "id": doc_id,
+                        "document": index.documents[position],
+                        "metadata": index.metadatas[position],
+                        "similarity": (
+                            self._cosine(corpus["embeddings"][position], query_embedding)
+                            if corpus["embeddings"] is not None else 0.0
+                        )
+                    }
+                results.append(dict(hit, score=score))
+            output.append(results)
+        
+        return output
+    
+    @staticmethod
+    def _cosine(a, b) -> float:
+        """余弦相似度"""
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+        denominator = float(np.linalg.norm(a) * np.linalg.norm(b)) or 1.0
+        return float(a @ b) / denominator
+    
+    def _get_lexical_corpus(self, data_type: str) -> Dict[str, Any]:
+        """获取（或构建）某数据类型的BM25语料，写入数据后失效重建"""
+        corpus = self._lexical_corpora.get(data_type)
+        if corpus is None:
+            records = self.store.get(where={"type": data_type}, include=["documents", "metadatas", "embeddings"])
+            index = BM25Index(records["ids"], records["documents"], records["metadatas"])
+            corpus = {
+                "index": index,
+                "positions": {doc_id: i for i, doc_id in enumerate(records["ids"])},
+                "embeddings": records.get("embeddings")
+            }
+            self._lexical_corpora[data_type] = corpus
+            logger.debug(f"📚 构建BM25索引：{data_type}（{len(index)}条）")
+        return corpus
+    
     def index_reference_data(self, data_type: str, items: List[Dict[str, Any]]):
         """
         索引参考数据到向量数据库
@@ -207,7 +452,7 @@ class RAGService:
             data_type: 数据类型（move/ability/pokemon）
             items: 数据项列表
         """
-        if not self.enabled or not self.collection:
+        if not self.enabled or not self.store:
             logger.warning("⚠️  RAG服务不可用，无法索引")
             return
         
@@ -240,16 +485,109 @@ class RAGService:
             
             # 批量添加
             if documents:
-                self.collection.add(
+                self.store.upsert(
+                    ids=ids,
+                    embeddings=self.embedding_model.encode(documents).tolist(),
                     documents=documents,
-                    metadatas=metadatas,
-                    ids=ids
+                    metadatas=metadatas
                 )
+                self.store.flush()
+                self._lexical_corpora.clear()
                 logger.info(f"✅ 索引完成：{len(documents)}项")
-            
+        
         except Exception as e:
             logger.error(f"❌ 索引失败：{e}")
     
+    def upsert_embeddings(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """
+        写入已向量化的数据（存在则覆盖）
+        
+        Args:
+            ids: 文档ID列表
+            embeddings: 向量列表
+            documents: 文档文本列表
+            metadatas: 元数据列表
+        """
+        if not self.enabled or not self.store:
+            logger.warning("⚠️  RAG服务不可用，无法索引")
+            return
+        
+        if ids:
+            self.store.upsert(
+                ids=ids,
+                embeddings=embeddings,
+                documents=documents,
+                metadatas=metadatas
+            )
+            self._lexical_corpora.clear()
+    
+    def get_document_ids(self, data_type: str) -> List[str]:
+        """
+        获取某一数据类型已索引的全部文档ID
+        
+        Args:
+            data_type: 数据类型（move/ability/pokemon）
+        
+        Returns:
+            文档ID列表
+        """
+        if not self.enabled or not self.store:
+            return []
+        
+        try:
+            return list(self.store.get(where={"type": data_type}, include=["metadatas"]).get("ids", []))
+        except Exception as e:
+            logger.warning(f"⚠️  读取已索引文档失败：{e}")
+            return []
+    
+    def delete_documents(self, ids: List[str]):
+        """
+        删除文档（参考库中已移除的条目）
+        
+        Args:
+            ids: 文档ID列表
+        """
+        if not self.enabled or not self.store or not ids:
+            return
+        
+        self.store.delete(ids)
+        self._lexical_corpora.clear()
+    
+    def flush(self):
+        """将 upsert_embeddings / delete_documents 缓冲的写入持久化（批量导入结束时调用一次）"""
+        if self.enabled and self.store:
+            self.store.flush()
+    
+    def get_content_hashes(self, ids: List[str]) -> Dict[str, str]:
+        """
+        获取已索引文档的内容哈希（用于增量索引）
+        
+        Args:
+            ids: 文档ID列表
+        
+        Returns:
+            {文档ID: 内容哈希}，未索引的文档不包含在内
+        """
+        if not self.enabled or not self.store or not ids:
+            return {}
+        
+        try:
+            results = self.store.get(ids=ids, include=["metadatas"])
+        except Exception as e:
+            logger.warning(f"⚠️  读取已索引文档失败：{e}")
+            return {}
+        
+        return {
+            doc_id: (metadata or {}).get("content_hash", "")
+            for doc_id, metadata in zip(results.get("ids", []), results.get("metadatas") or [])
+        }
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """
         获取集合统计信息
@@ -257,14 +595,16 @@ class RAGService:
         Returns:
             统计信息字典
         """
-        if not self.collection:
+        if not self.enabled or not self.store:
             return {"error": "Collection not initialized"}
         
         try:
-            count = self.collection.count()
+            count = self.store.count()
             return {
                 "name": self.collection_name,
+                "backend": self.store.backend,
                 "count": count,
+                "shards": self.store.counts(),
                 "enabled": self.enabled
             }
         except Exception as e:
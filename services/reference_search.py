@@ -0,0 +1,380 @@
+"""
+CobbleSeer - 参考库检索（search_reference 工具后端）
+
+- RAG启用时走混合检索（RAGService），按 rag.similarity_threshold 截断
+- RAG禁用时退化为对 TemplateLibrary 参考数据的BM25检索
+- 结构化过滤：属性 / 分类 / 威力范围
+- 游标分页：每组查询条件只排序一次固定大小的候选列表，翻页在同一列表上切片；
+  游标绑定查询条件，条件变化后旧游标失效
+- 精简投影：默认只返回摘要字段，需要时再返回完整文档
+- 结构化模板查询（query_templates 工具后端）：直接在模板库索引上过滤、排序、分页
+- 名称解析 / 补全（resolve_name 工具后端）：三元组 + 前缀索引，容忍拼写错误和中文名
+"""
+
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from services.hybrid_search import BM25Index, matches_filters
+from services.ingest import build_document
+
+
+# 工具参数中的类型名称 -> 数据类型
+DATA_TYPE_ALIASES = {
+    "moves": "move", "move": "move",
+    "abilities": "ability", "ability": "ability",
+    "pokemon": "pokemon",
+}
+
+# 精简投影字段（元数据字段名）
+COMPACT_FIELDS = {
+    "move": ["id", "name", "move_type", "category", "basePower", "accuracy"],
+    "ability": ["id", "name", "rating"],
+    "pokemon": ["id", "name", "primaryType", "dex"],
+}
+
+# query_templates 默认投影字段（技能原始字段名）
+TEMPLATE_FIELDS = ["id", "name", "type", "category", "basePower", "accuracy", "pp", "priority"]
+
+# 单页最大数量
+MAX_LIMIT = 50
+
+# 每组查询条件的候选列表大小（分页范围上限）
+CANDIDATE_POOL = 200
+
+# 缓存的候选列表数量（按查询条件指纹，LRU淘汰）
+RANKED_CACHE_SIZE = 32
+
+
+def encode_cursor(offset: int, fingerprint: str) -> str:
+    """编码分页游标"""
+    payload = json.dumps({"o": offset, "f": fingerprint}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> int:
+    """
+    解码分页游标
+    
+    Args:
+        cursor: 游标字符串
+        fingerprint: 当前查询条件的指纹
+    
+    Returns:
+        起始偏移
+    
+    Raises:
+        ValueError: 游标无效或与当前查询条件不匹配
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset = int(payload["o"])
+        cursor_fingerprint = payload["f"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"无效的分页游标：{cursor}") from e
+    
+    if cursor_fingerprint != fingerprint or offset < 0:
+        raise ValueError("分页游标与当前查询条件不匹配")
+    return offset
+
+
+def query_fingerprint(**conditions) -> str:
+    """查询条件指纹（用于校验游标）"""
+    return hashlib.sha1(json.dumps(conditions, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+
+
+class ReferenceSearch:
+    """参考库检索服务"""
+    
+    def __init__(self, config: dict, rag_service=None, template_library=None):
+        """
+        初始化检索服务
+        
+        Args:
+            config: 配置字典
+            rag_service: RAG服务实例（未启用时使用模板库）
+            template_library: 模板库实例（默认按 rag.reference_paths 创建）
+        """
+        self.config = config
+        self.rag_service = rag_service
+        self.similarity_threshold = config.get("rag", {}).get("similarity_threshold", 0.0)
+        self.max_chars = (config.get("rag", {}).get("ingest", {}) or {}).get("max_document_chars", 2000)
+        self._template_library = None
+        self._template_indexes: Dict[str, BM25Index] = {}
+        self._ranked: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        if template_library is not None:
+            self._attach_library(template_library)
+    
+    @property
+    def use_rag(self) -> bool:
+        """是否使用RAG检索"""
+        return bool(self.rag_service and self.rag_service.enabled and self.rag_service.store)
+    
+    async def search(
+        self,
+        query: str,
+        data_type: str = "moves",
+        limit: int = 5,
+        move_type: Optional[str] = None,
+        category: Optional[str] = None,
+        power_min: Optional[int] = None,
+        power_max: Optional[int] = None,
+        min_similarity: Optional[float] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        include_content: bool = False
+    ) -> Dict[str, Any]:
+        """
+        检索参考数据
+        
+        Args:
+            query: 查询文本
+            data_type: 数据类型（moves/abilities/pokemon）
+            limit: 每页数量（最多 MAX_LIMIT）
+            move_type: 技能属性过滤（如 Fire）
+            category: 技能分类过滤（Physical/Special/Status）
+            power_min: 最低威力
+            power_max: 最高威力
+            min_similarity: 相似度下限（默认 rag.similarity_threshold，仅RAG检索生效）
+            cursor: 上一页返回的 next_cursor
+            fields: 返回的元数据字段（默认精简字段）
+            include_content: 是否返回完整文档
+        
+        Returns:
+            {"results", "next_cursor", "source", "type"}
+        
+        Raises:
+            ValueError: 类型未知或游标无效
+        """
+        resolved_type = DATA_TYPE_ALIASES.get(data_type.lower())
+        if resolved_type is None:
+            raise ValueError(f"未知的参考类型: {data_type}（可选：moves/abilities/pokemon）")
+        
+        limit = max(1, min(limit, MAX_LIMIT))
+        filters = {
+            key: value for key, value in (
+                ("move_type", move_type), ("category", category),
+                ("power_min", power_min), ("power_max", power_max)
+            ) if value is not None
+        }
+        threshold = self.similarity_threshold if min_similarity is None else min_similarity
+        source = "rag" if self.use_rag else "templates"
+        
+        fingerprint = query_fingerprint(
+            query=query, type=resolved_type, filters=filters, threshold=threshold, source=source
+        )
+        offset = decode_cursor(cursor, fingerprint) if cursor else 0
+        
+        # 首页重新排序；翻页沿用首页的候选列表（混合检索的融合排名依赖候选数量，
+        # 每页按不同窗口重新检索会导致条目重复或遗漏）。缓存被淘汰时按同样的
+        # 固定候选数量重新检索，排名不变。
+        hits = self._ranked.get(fingerprint) if cursor else None
+        if hits is None:
+            if source == "rag":
+                hits = await self.rag_service.search_references(resolved_type, query, CANDIDATE_POOL, filters)
+                hits = [hit for hit in hits if hit["similarity"] >= threshold]
+            else:
+                hits = self._search_templates(resolved_type, query, CANDIDATE_POOL, filters)
+            # 检索在过滤条件无结果时会放宽，显式过滤条件在此严格执行
+            hits = [hit for hit in hits if matches_filters(hit["metadata"], filters)]
+            self._ranked[fingerprint] = hits
+            while len(self._ranked) > RANKED_CACHE_SIZE:
+                self._ranked.popitem(last=False)
+        self._ranked.move_to_end(fingerprint)
+        
+        page = hits[offset:offset + limit]
+        has_more = len(hits) > offset + limit
+        
+        logger.debug(f"🔍 参考检索：{query}（{source}，{resolved_type}）-> {len(page)}条")
+        
+        return {
+            "type": resolved_type,
+            "source": source,
+            "results": [self._project(resolved_type, hit, fields, include_content) for hit in page],
+            "next_cursor": encode_cursor(offset + limit, fingerprint) if has_more else None
+        }
+    
+    def query_templates(
+        self,
+        move_type: Optional[str] = None,
+        category: Optional[str] = None,
+        power_min: Optional[int] = None,
+        power_max: Optional[int] = None,
+        has_priority: Optional[bool] = None,
+        has_secondary: Optional[bool] = None,
+        effect: Optional[str] = None,
+        flags: Optional[List[str]] = None,
+        sort: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        结构化技能模板查询（不经过文本检索，在模板库索引上求值）
+        
+        Args:
+            move_type: 技能属性（如 Fire）
+            category: 技能分类（Physical/Special/Status）
+            power_min: 最低威力
+            power_max: 最高威力
+            has_priority: 是否有优先度
+            has_secondary: 是否有追加效果
+            effect: 效果类型（burn/paralyze/.../drain/recoil/boost_*/lower_*）
+            flags: 必须具备的标志（如 ["contact", "punch"]）
+            sort: 排序列（num/basePower/accuracy/pp/priority/id），前缀 "-" 表示降序
+            fields: 返回的技能字段（默认 TEMPLATE_FIELDS）
+            limit: 每页数量（最多 MAX_LIMIT）
+            cursor: 上一页返回的 next_cursor
+        
+        Returns:
+            {"type", "total", "results", "next_cursor"}
+        
+        Raises:
+            ValueError: 效果类型、排序列未知或游标无效
+        """
+        limit = max(1, min(limit, MAX_LIMIT))
+        conditions = dict(
+            type=move_type, category=category,
+            power_min=0 if power_min is None else power_min,
+            power_max=999 if power_max is None else power_max,
+            has_priority=has_priority, has_secondary=has_secondary,
+            effect=effect, flags=sorted(flags) if flags else None
+        )
+        fingerprint = query_fingerprint(query="templates", sort=sort, **conditions)
+        offset = decode_cursor(cursor, fingerprint) if cursor else 0
+        
+        table, rows = self._get_library().query_moves(sort=sort, **conditions)
+        page = rows[offset:offset + limit]
+        fields = fields or TEMPLATE_FIELDS
+        
+        results = []
+        for move_id in table.ids[page]:
+            move_data = table.moves[move_id]
+            results.append({
+                field: move_id if field == "id" else move_data[field]
+                for field in fields if field == "id" or field in move_data
+            })
+        
+        logger.debug(f"🔍 模板查询：{conditions}（排序 {sort}）-> {len(rows)}条")
+        
+        return {
+            "type": "move",
+            "total": int(len(rows)),
+            "results": results,
+            "next_cursor": encode_cursor(offset + limit, fingerprint) if offset + limit < len(rows) else None
+        }
+    
+    def resolve_name(
+        self,
+        query: str,
+        kind: Optional[str] = None,
+        limit: int = 5,
+        autocomplete: bool = False
+    ) -> Dict[str, Any]:
+        """
+        技能 / 特性名称解析
+        
+        Args:
+            query: 名称（ID、英文名或翻译名，可有拼写错误或只输入开头）
+            kind: 类型（move/moves/ability/abilities，None 表示都查）
+            limit: 最多返回数量（最多50）
+            autocomplete: True 时只做前缀补全
+        
+        Returns:
+            {"query", "results": [{"id", "kind", "name", "matched", "score", "match"}, ...]}
+        
+        Raises:
+            ValueError: 类型未知
+        """
+        if kind:
+            if DATA_TYPE_ALIASES.get(kind) not in ("move", "ability"):
+                raise ValueError(f"未知的名称类型: {kind}（可选 move / ability）")
+            kind = DATA_TYPE_ALIASES[kind]
+        limit = max(1, min(limit, MAX_LIMIT))
+        
+        index = self._get_library().get_name_index()
+        if autocomplete:
+            results = index.complete(query, kind=kind, limit=limit)
+        else:
+            results = index.resolve(query, kind=kind, limit=limit)
+        
+        logger.debug(f"🔤 名称解析：{query!r}（{kind or '全部'}）-> {len(results)}条")
+        return {"query": query, "results": results}
+    
+    def _search_templates(
+        self,
+        data_type: str,
+        query: str,
+        top_k: int,
+        filters: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """RAG不可用时对模板库参考数据做BM25检索（无向量相似度）"""
+        index = self._get_template_index(data_type)
+        ranked = index.search(query, top_k, allowed=lambda md: matches_filters(md, filters))
+        return [
+            {
+                "id": index.ids[position],
+                "document": index.documents[position],
+                "metadata": index.metadatas[position],
+                "similarity": None,
+                "score": score
+            }
+            for position, score in ranked
+        ]
+    
+    def _attach_library(self, template_library):
+        """使用模板库，并在参考文件热重载后丢弃对应的BM25索引"""
+        self._template_library = template_library
+        template_library.reload_listeners.append(self._on_reference_reload)
+    
+    def _on_reference_reload(self, name: str):
+        data_type = {"moves": "move", "abilities": "ability"}.get(name)
+        if data_type:
+            self._template_indexes.pop(data_type, None)
+            self._ranked.clear()
+    
+    def _get_library(self):
+        """模板库（未传入时按配置创建）"""
+        if self._template_library is None:
+            from services.template_library import TemplateLibrary
+            self._attach_library(TemplateLibrary.from_config(self.config))
+        return self._template_library
+    
+    def _get_template_index(self, data_type: str) -> BM25Index:
+        """获取（或构建）模板库某数据类型的BM25索引"""
+        index = self._template_indexes.get(data_type)
+        if index is None:
+            ids, documents, metadatas = [], [], []
+            for item_id, item in self._get_library().iter_reference_items(data_type):
+                document, metadata = build_document(data_type, item_id, item, self.max_chars)
+                ids.append(item_id)
+                documents.append(document)
+                metadatas.append(metadata)
+            
+            index = BM25Index(ids, documents, metadatas)
+            self._template_indexes[data_type] = index
+            logger.debug(f"📚 构建模板库检索索引：{data_type}（{len(index)}条）")
+        return index
+    
+    @staticmethod
+    def _project(
+        data_type: str,
+        hit: Dict[str, Any],
+        fields: Optional[List[str]],
+        include_content: bool
+    ) -> Dict[str, Any]:
+        """投影检索结果：精简字段 + 摘要（文档首行），按需附带完整文档"""
+        metadata = hit["metadata"] or {}
+        result = {field: metadata[field] for field in (fields or COMPACT_FIELDS[data_type]) if field in metadata}
+        result.setdefault("id", hit["id"])
+        result["summary"] = hit["document"].split("\n", 1)[0]
+        result["similarity"] = round(hit["similarity"], 4) if hit["similarity"] is not None else None
+        result["score"] = round(hit["score"], 4)
+        if include_content:
+            result["content"] = hit["document"]
+        return result
@@ -0,0 +1,113 @@
+"""
+CobbleSeer - 参考文件热重载
+
+后台线程轮询模板库登记的参考文件（大小 + 修改时间），文件变化且内容稳定后
+调用 TemplateLibrary.refresh_reference 增量重载，无需重启服务器。
+
+使用轮询而不是系统文件事件：不引入额外依赖，Windows / 网络盘上行为一致。
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+class ReferenceWatcher:
+    """参考文件变化监视器"""
+    
+    def __init__(self, library, names: Optional[List[str]] = None, interval: float = 2.0):
+        """
+        初始化监视器
+        
+        Args:
+            library: TemplateLibrary 实例
+            names: 监视的文件名称（默认 library.reference_names()）
+            interval: 轮询间隔（秒）
+        """
+        self.library = library
+        self.names = names or library.reference_names()
+        self.interval = interval
+        self._stats: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @classmethod
+    def from_config(cls, config: dict, library) -> Optional["ReferenceWatcher"]:
+        """根据 rag.reference_watch 创建监视器（未启用时返回 None）"""
+        watch_config = config.get("rag", {}).get("reference_watch", {}) or {}
+        if not watch_config.get("enabled", False):
+            return None
+        return cls(library, names=watch_config.get("names"), interval=watch_config.get("interval", 2.0))
+    
+    def _stat(self, name: str) -> Optional[Tuple[int, int]]:
+        path: Path = self.library.get_reference_file(name)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+    
+    def baseline(self):
+        """记录当前文件状态，并为已存在的文件建立条目哈希基线"""
+        for name in self.names:
+            self._stats[name] = self._stat(name)
+            if self._stats[name] is not None:
+                try:
+                    self.library.refresh_reference(name)
+                except Exception as e:
+                    logger.warning(f"⚠️ 参考文件基线建立失败（{name}）：{e}")
+    
+    def check_once(self) -> Dict[str, Dict]:
+        """
+        检查一次文件变化
+        
+        文件状态变化后要等到下一次检查状态不再变化（写入完成）才重载。
+        
+        Returns:
+            本次重载的文件名称 -> 重载报告
+        """
+        reports = {}
+        for name in self.names:
+            stat = self._stat(name)
+            if stat is None or stat == self._stats.get(name):
+                self._pending.pop(name, None)
+                continue
+            
+            if self._pending.get(name) != stat:
+                # 第一次看到新状态：等待写入稳定
+                self._pending[name] = stat
+                continue
+            
+            del self._pending[name]
+            self._stats[name] = stat
+            try:
+                reports[name] = self.library.refresh_reference(name)
+            except Exception as e:
+                # 解析失败（如保存了一半的文件）：保留旧数据，下次变化时重试
+                logger.warning(f"⚠️ 参考文件重载失败（{name}），继续使用旧数据：{e}")
+        return reports
+    
+    def start(self):
+        """启动后台线程（基线在线程中建立，不阻塞调用方）"""
+        if self._thread is not None:
+            return
+        
+        def run():
+            self.baseline()
+            while not self._stop.wait(self.interval):
+                self.check_once()
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="reference-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"👀 监视参考文件变化：{', '.join(self.names)}（每{self.interval}s）")
+    
+    def stop(self):
+        """停止后台线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
@@ -0,0 +1,142 @@
+"""
+CobbleSeer - 结构化重排序
+
+混合检索按文本相关度返回候选，排在前面的参考技能可能属性或分类与需求不符。
+重排序在更大的候选池（默认50条）上按结构化字段打分，只保留最相符的前几条：
+
+- 属性匹配 / 分类匹配
+- 威力、命中、PP 与需求值的归一化差距
+- 检索相似度与融合排名
+
+所有候选的打分为一次向量化计算。
+"""
+
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+
+from services.hybrid_search import parse_query_filters
+
+
+# 默认权重（rag.rerank.weights 可覆盖）
+DEFAULT_WEIGHTS = {
+    "similarity": 1.0,
+    "retrieval": 0.5,
+    "type": 1.0,
+    "category": 0.6,
+    "power": 0.8,
+    "accuracy": 0.3,
+    "pp": 0.2,
+}
+
+# 数值字段的归一化尺度（差距除以尺度后截断到 [0, 1]）
+NUMERIC_SCALES = {"basePower": 150.0, "accuracy": 50.0, "pp": 30.0}
+
+# 缺少数值时的差距（介于完全匹配和完全不匹配之间）
+MISSING_PENALTY = 0.5
+
+_ACCURACY_PATTERN = re.compile(r"(?:命中率?|accuracy)\s*[:：]?\s*(\d+)", re.IGNORECASE)
+_PP_PATTERN = re.compile(r"(?<![a-z])pp\s*[:：]?\s*(\d+)", re.IGNORECASE)
+
+
+def parse_move_intent(query: str, power_tolerance: int = 10) -> Dict[str, Any]:
+    """
+    解析查询中的结构化需求
+    
+    Returns:
+        move_type / category / basePower / accuracy / pp（仅包含解析到的字段）
+    """
+    filters = parse_query_filters(query, power_tolerance)
+    intent: Dict[str, Any] = {key: filters[key] for key in ("move_type", "category") if key in filters}
+    
+    if "power_min" in filters and "power_max" in filters:
+        intent["basePower"] = (filters["power_min"] + filters["power_max"]) / 2
+    elif "power_min" in filters:
+        intent["basePower"] = filters["power_min"]
+    elif "power_max" in filters:
+        intent["basePower"] = filters["power_max"]
+    
+    accuracy = _ACCURACY_PATTERN.search(query)
+    if accuracy:
+        intent["accuracy"] = int(accuracy.group(1))
+    pp = _PP_PATTERN.search(query)
+    if pp:
+        intent["pp"] = int(pp.group(1))
+    
+    return intent
+
+
+def _numeric(value: Any) -> float:
+    """数值字段（accuracy: true 表示必中，按100计）"""
+    if value is True:
+        return 100.0
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+class StructuredReranker:
+    """技能候选的结构化重排序"""
+    
+    def __init__(self, config: dict):
+        """
+        初始化重排序器
+        
+        Args:
+            config: 配置字典（读取 rag.rerank）
+        """
+        rerank_config = config.get("rag", {}).get("rerank", {}) or {}
+        self.enabled = rerank_config.get("enabled", True)
+        self.pool = rerank_config.get("pool", 50)
+        self.weights = {**DEFAULT_WEIGHTS, **(rerank_config.get("weights", {}) or {})}
+    
+    def rerank(
+        self,
+        candidates: List[Dict[str, Any]],
+        intent: Dict[str, Any],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        重排序技能候选
+        
+        Args:
+            candidates: 检索结果（按检索排名；含 type/category/basePower/accuracy/pp/similarity）
+            intent: parse_move_intent 的结果
+            top_k: 保留数量
+        
+        Returns:
+            前 top_k 个候选（附带 rerank_score）
+        """
+        if not candidates:
+            return []
+        
+        scores = self.score(candidates, intent)
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return [dict(candidates[i], rerank_score=round(float(scores[i]), 4)) for i in order]
+    
+    def score(self, candidates: List[Dict[str, Any]], intent: Dict[str, Any]) -> np.ndarray:
+        """向量化计算所有候选的分数"""
+        n = len(candidates)
+        w = self.weights
+        
+        similarity = np.array([c.get("similarity") or 0.0 for c in candidates], dtype=np.float64)
+        # 检索排名先验：第一名为1，最后一名为0
+        retrieval = 1.0 - np.arange(n, dtype=np.float64) / max(n - 1, 1)
+        scores = w["similarity"] * similarity + w["retrieval"] * retrieval
+        
+        if "move_type" in intent:
+            types = np.array([c.get("type") for c in candidates], dtype=object)
+            scores += w["type"] * (types == intent["move_type"])
+        if "category" in intent:
+            categories = np.array([c.get("category") for c in candidates], dtype=object)
+            scores += w["category"] * (categories == intent["category"])
+        
+        for field, weight_key in (("basePower", "power"), ("accuracy", "accuracy"), ("pp", "pp")):
+            if field not in intent:
+                continue
+            values = np.array([_numeric(c.get(field)) for c in candidates], dtype=np.float64)
+            gap = np.clip(np.abs(values - intent[field]) / NUMERIC_SCALES[field], 0.0, 1.0)
+            scores -= w[weight_key] * np.where(np.isnan(gap), MISSING_PENALTY, gap)
+        
+        return scores
@@ -0,0 +1,187 @@
+"""
+CobbleSeer - 语义响应缓存
+
+设计师经常用略微改写的描述反复生成技能（"威力90的火系物理攻击" /
+"火系物理攻击 威力90"），精确匹配缓存无法命中。语义缓存以描述向量为键：
+
+1. 查找余弦相似度超过阈值的历史生成结果
+2. 防误命中：描述中提取的数值、属性、分类和状态效果必须完全一致
+3. 命中时直接返回历史结果，不再调用大模型
+
+缓存在进程内，按 LRU 淘汰并支持过期时间。默认关闭（cache.semantic.enabled）：
+签名不区分目标、追加效果几率等细节，相近但不同的需求可能误命中。
+"""
+
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from services.hybrid_search import parse_query_filters
+
+
+# 状态/效果关键字（描述相似但效果不同时不能互相命中）
+EFFECT_KEYWORDS = {
+    "烧伤": "brn", "灼伤": "brn", "burn": "brn",
+    "麻痹": "par", "paraly": "par",
+    "冰冻": "frz", "freez": "frz",
+    "剧毒": "tox", "中毒": "psn", "poison": "psn",
+    "睡眠": "slp", "睡着": "slp", "sleep": "slp",
+    "混乱": "confusion", "confus": "confusion",
+    "畏缩": "flinch", "flinch": "flinch",
+    "回复": "heal", "恢复": "heal", "heal": "heal",
+    "反作用": "recoil", "recoil": "recoil",
+    "先制": "priority", "priority": "priority",
+    "提升": "boost", "提高": "boost", "raise": "boost",
+    "降低": "drop", "lower": "drop",
+}
+
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def extract_signature(description: str) -> Tuple:
+    """
+    提取描述的结构化签名（防误命中）
+    
+    Returns:
+        (数值, 属性, 分类, 效果关键字)；数值按出现的多重集合比较，与顺序无关
+    """
+    lowered = description.lower()
+    filters = parse_query_filters(description)
+    numbers = tuple(sorted(float(n) for n in _NUMBER_PATTERN.findall(lowered)))
+    effects = tuple(sorted({code for word, code in EFFECT_KEYWORDS.items() if word in lowered}))
+    return numbers, filters.get("move_type"), filters.get("category"), effects
+
+
+class SemanticCache:
+    """描述向量为键的生成结果缓存"""
+    
+    def __init__(self, config: dict):
+        """
+        初始化缓存
+        
+        Args:
+            config: 配置字典（读取 cache.semantic，容量/过期时间默认沿用 cache.max_size / cache.ttl）
+        """
+        cache_config = config.get("cache", {}) or {}
+        semantic_config = cache_config.get("semantic", {}) or {}
+        self.enabled = cache_config.get("enabled", True) and semantic_config.get("enabled", False)
+        self.threshold = semantic_config.get("threshold", 0.92)
+        self.max_entries = semantic_config.get("max_entries", cache_config.get("max_size", 1000))
+        self.ttl = semantic_config.get("ttl", cache_config.get("ttl", 3600))
+        
+        # 键 -> {"signature", "result", "created", "description"}；向量按相同顺序存于矩阵
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._keys: List[int] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._next_key = 0
+        self.stats = {"hits": 0, "misses": 0, "guard_rejects": 0}
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def lookup(self, description: str, embedding) -> Optional[Dict[str, Any]]:
+        """
+        查找语义相同的历史结果
+        
+        Args:
+            description: 描述
+            embedding: 描述向量
+        
+        Returns:
+            命中的生成结果（附带 cache 信息），未命中返回 None
+        """
+        if not self.enabled or embedding is None:
+            return None
+        
+        self._expire()
+        if not self._keys:
+            self.stats["misses"] += 1
+            return None
+        
+        query = self._normalize(np.asarray(embedding, dtype=np.float32)[None, :])[0]
+        similarities = self._matrix @ query
+        signature = extract_signature(description)
+        
+        # 按相似度从高到低检查阈值以上的候选，签名一致才算命中
+        rejected = False
+        for row in np.argsort(-similarities):
+            similarity = float(similarities[row])
+            if similarity < self.threshold:
+                break
+            key = self._keys[row]
+            entry = self._entries[key]
+            if entry["signature"] != signature:
+                rejected = True
+                continue
+            
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            logger.info(f"♻️  语义缓存命中（相似度 {similarity:.3f}）：{entry['description'][:30]}")
+            return dict(entry["result"], cache={"hit": True, "similarity": round(similarity, 4)})
+        
+        if rejected:
+            self.stats["guard_rejects"] += 1
+        self.stats["misses"] += 1
+        return None
+    
+    def store(self, description: str, embedding, result: Dict[str, Any]):
+        """缓存一次成功的生成结果"""
+        if not self.enabled or embedding is None or not result.get("success"):
+            return
+        
+        vector = self._normalize(np.asarray(embedding, dtype=np.float32)[None, :])
+        key = self._next_key
+        self._next_key += 1
+        
+        self._entries[key] = {
+            "signature": extract_signature(description),
+            "result": result,
+            "created": time.monotonic(),
+            "description": description
+        }
+        self._keys.append(key)
+        self._matrix = vector if not self._matrix.size else np.vstack([self._matrix, vector])
+        
+        while len(self._entries) > self.max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self._remove_rows({oldest})
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """命中率统计"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+        }
+    
+    def clear(self):
+        """清空缓存（保留统计）"""
+        self._entries.clear()
+        self._keys = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+    
+    def _expire(self):
+        """移除过期条目"""
+        if not self.ttl:
+            return
+        deadline = time.monotonic() - self.ttl
+        expired = {key for key, entry in self._entries.items() if entry["created"] < deadline}
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._remove_rows(expired)
+    
+    def _remove_rows(self, keys: set):
+        keep = [i for i, key in enumerate(self._keys) if key not in keys]
+        self._keys = [self._keys[i] for i in keep]
+        self._matrix = self._matrix[keep]
+    
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
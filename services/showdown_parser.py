@@ -0,0 +1,543 @@
+"""
+CobbleSeer - Showdown JS 数据文件解析器
+
+单遍扫描 moves.js / abilities.js 等 Showdown 数据文件：
+- 一次扫描构建每个条目的字段树（嵌套对象、数组、字符串、数字、字面量）
+- 正确处理字符串、模板字符串、注释和正则字面量中的括号
+- 函数（onModifyAtk() {...}、basePowerCallback: function () {...}、箭头函数）
+  只做括号配对跳过，不解析函数体；条目顶层的函数名记录在 handlers 中
+
+词法扫描由预编译的锚定正则驱动（re.match(text, pos)），Python 层只处理
+结构性字符，大文件的扫描开销主要在正则引擎中。
+"""
+
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class ShowdownParseError(ValueError):
+    """数据文件结构无法解析"""
+
+
+# 主对象定义：const Moves = {、export const Moves: MoveDataTable = {、exports.Moves = {
+_OBJECT_START = re.compile(
+    r"(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\b[^=\n]*=\s*\{"
+    r"|exports\.([A-Za-z_$][\w$]*)\s*=\s*\{"
+)
+
+# 空白与注释
+_SKIP = re.compile(r"(?:\s+|//[^\n]*|/\*.*?\*/)*", re.S)
+
+# 快速路径：一次匹配 `key: 标量,` 形式的简单成员（占数据文件的大多数）
+_SIMPLE_MEMBER = re.compile(
+    r"\s*([A-Za-z_$][\w$]*)\s*:\s*"
+    r"(?:\"((?:[^\"\\\n]|\\.)*)\"|'((?:[^'\\\n]|\\.)*)'|(-?\d+)(?![\w.])|(true|false|null)\b)"
+    r"\s*(?:,|(?=\}))"
+)
+
+# 对象键：标识符、带引号字符串、数字
+_KEY = re.compile(r"[A-Za-z_$][\w$]*|\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'|\d+")
+
+_STRING = {
+    '"': re.compile(r"\"(?:[^\"\\]|\\.)*\"", re.S),
+    "'": re.compile(r"'(?:[^'\\]|\\.)*'", re.S),
+    "`": re.compile(r"`(?:[^`\\]|\\.)*`", re.S),
+}
+_NUMBER = re.compile(r"-?(?:0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)")
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*")
+
+# 函数值：function (...) {...}、(a, b) => ...、a => ...
+_FUNCTION_VALUE = re.compile(r"(?:async\s+)?function\b|(?:async\s+)?(?:\([^()]*\)|[A-Za-z_$][\w$]*)\s*=>")
+
+# 括号配对扫描时需要处理的字符（只跟踪与起始括号同类的括号）
+_STRUCTURAL = {
+    "{": re.compile(r"[{}\"'`/]"),
+    "(": re.compile(r"[()\"'`/]"),
+    "[": re.compile(r"[\[\]\"'`/]"),
+}
+_REGEX_LITERAL = re.compile(r"/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*")
+_LINE_COMMENT_END = re.compile(r"\n")
+_FUNCTION_HEAD = re.compile(r"(?:async\s+)?function\b\s*[A-Za-z_$]*\s*")
+_METHOD_MODIFIER = re.compile(r"(?:get|set|async)\s+(?=[A-Za-z_$\"'])")
+_EXPRESSION_RUN = re.compile(r"[^,}\]{(\[\"'`/\s]+")
+
+# 出现在这些字符之后的 / 是正则字面量而不是除号
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+_ESCAPE_PATTERN = re.compile(r"\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\n|.)", re.S)
+
+_LITERALS = {"true": True, "false": False, "null": None, "undefined": None}
+
+_OPENERS = {"{": "}", "(": ")", "[": "]"}
+
+
+def _unescape(body: str) -> str:
+    """解码JS字符串转义"""
+    if "\\" not in body:
+        return body
+    
+    def replace(match):
+        escape = match.group(1)
+        if escape[0] == "u":
+            return chr(int(escape[2:-1] if escape[1] == "{" else escape[1:], 16))
+        if escape[0] == "x":
+            return chr(int(escape[1:], 16))
+        if escape == "\n":
+            return ""
+        return _ESCAPES.get(escape, escape)
+    
+    return _ESCAPE_PATTERN.sub(replace, body)
+
+
+class ShowdownParser:
+    """Showdown 数据文件的单遍解析器"""
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.length = len(text)
+    
+    # ---------- 入口 ----------
+    
+    def parse(self, keep_source: bool = False) -> Tuple[Optional[str], Dict[str, Dict[str, Any]]]:
+        """
+        解析文件中的主对象
+        
+        Args:
+            keep_source: 是否在条目中保留原始代码（source字段）
+        
+        Returns:
+            (对象名称, {条目ID: 条目数据})；找不到主对象时返回 (None, {})
+        """
+        match = _OBJECT_START.search(self.text)
+        if not match:
+            return None, {}
+        
+        name = match.group(1) or match.group(2)
+        items: Dict[str, Dict[str, Any]] = {}
+        pos = match.end()
+        
+        while True:
+            key, item, pos = self.parse_entry(pos, keep_source=keep_source)
+            if key is None:
+                break
+            if item is not None:
+                items[key] = item
+        
+        return name, items
+    
+    def parse_entry(
+        self,
+        pos: int,
+        keep_source: bool = False,
+        handler_spans: Optional[List[Tuple[str, int, int]]] = None
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]], int]:
+        """
+        解析主对象中从 pos 开始的一个条目
+        
+        Args:
+            pos: 上一个条目结束的位置（或主对象的 { 之后）
+            keep_source: 是否在条目中保留原始代码（source字段）
+            handler_spans: 传入列表时追加条目顶层函数的 (名称, 起始位置, 结束位置)
+        
+        Returns:
+            (条目ID, 条目数据, 结束位置)；非对象条目的数据为 None，
+            到达主对象的 } 时条目ID为 None
+        
+        Raises:
+            ShowdownParseError: 文本在条目结束前截断（流式解析据此读取更多内容）
+        """
+        text = self.text
+        pos = self._skip(pos)
+        if pos >= self.length:
+            raise ShowdownParseError("主对象未闭合")
+        if text[pos] == "}":
+            return None, None, pos + 1
+        
+        key_start = pos
+        key, pos = self._key(pos)
+        pos = self._skip(pos)
+        if text.startswith(":", pos):
+            pos = self._skip(pos + 1)
+        
+        item = None
+        if text.startswith("{", pos):
+            handlers: List[str] = []
+            item, pos = self._object(pos, handlers, handler_spans)
+            if handlers:
+                item["handlers"] = handlers
+            if keep_source:
+                item["source"] = text[key_start:pos]
+        else:
+            # 非对象条目（如别名引用）跳过
+            pos = self._skip_expression(pos)
+        
+        # 条目之后必须能看到 , 或 }（否则文本可能在条目中间截断）
+        pos = self._skip(pos)
+        if pos >= self.length:
+            raise ShowdownParseError("条目后缺少分隔符")
+        if text[pos] == ",":
+            pos += 1
+        return key, item, pos
+    
+    def split_entries(self) -> Tuple[Optional[str], List[Tuple[str, int, int]]]:
+        """
+        只切分条目、不解析字段（函数体和对象体都按括号配对跳过）
+        
+        Returns:
+            (对象名称, [(条目ID, 起始位置, 结束位置)])；起始位置可直接传给 parse_entry
+        """
+        match = _OBJECT_START.search(self.text)
+        if not match:
+            return None, []
+        
+        text = self.text
+        spans: List[Tuple[str, int, int]] = []
+        pos = match.end()
+        while True:
+            pos = self._skip(pos)
+            if pos >= self.length:
+                raise ShowdownParseError("主对象未闭合")
+            if text[pos] == "}":
+                break
+            
+            start = pos
+            key, pos = self._key(pos)
+            pos = self._skip(pos)
+            if text.startswith(":", pos):
+                pos = self._skip(pos + 1)
+            if text.startswith("{", pos):
+                pos = self._skip_balanced(pos)
+                spans.append((key, start, pos))
+            else:
+                pos = self._skip_expression(pos)
+            
+            pos = self._skip(pos)
+            if text.startswith(",", pos):
+                pos += 1
+        
+        return match.group(1) or match.group(2), spans
+    
+    # ---------- 值 ----------
+    
+    def _skip(self, pos: int) -> int:
+        return _SKIP.match(self.text, pos).end()
+    
+    def _key(self, pos: int) -> Tuple[str, int]:
+        match = _KEY.match(self.text, pos)
+        if not match:
+            raise ShowdownParseError(f"位置 {pos} 处缺少对象键：{self.text[pos:pos + 20]!r}")
+        key = match.group()
+        if key[0] in "\"'":
+            key = _unescape(key[1:-1])
+        return key, match.end()
+    
+    def _object(
+        self,
+        pos: int,
+        handlers: Optional[List[str]] = None,
+        spans: Optional[List[Tuple[str, int, int]]] = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """解析对象字面量（pos 指向 {），函数成员跳过，名称记入 handlers，代码区间记入 spans"""
+        text = self.text
+        result: Dict[str, Any] = {}
+        pos += 1
+        
+        while True:
+            simple = _SIMPLE_MEMBER.match(text, pos)
+            if simple:
+                key, double, single, integer, literal = simple.groups()
+                if integer is not None:
+                    result[key] = int(integer)
+                elif literal is not None:
+                    result[key] = _LITERALS[literal]
+                else:
+                    result[key] = _unescape(double if double is not None else single)
+                pos = simple.end()
+                continue
+            
+            pos = self._skip(pos)
+            if pos >= self.length:
+                raise ShowdownParseError("对象未闭合")
+            char = text[pos]
+            if char == "}":
+                return result, pos + 1
+            
+            member_start = pos
+            if text.startswith("...", pos):
+                pos = self._skip_expression(pos + 3)
+            else:
+                # get / set / async 修饰的方法
+                modifier = _METHOD_MODIFIER.match(text, pos)
+                if modifier:
+                    pos = modifier.end()
+                key, pos = self._key(pos)
+                pos = self._skip(pos)
+                char = text[pos] if pos < self.length else ""
+                
+                if char == "(":
+                    # 方法简写：name(args) {...}
+                    pos = self._skip_function(pos)
+                    if handlers is not None:
+                        handlers.append(key)
+                    if spans is not None:
+                        spans.append((key, member_start, pos))
+                elif char == ":":
+                    pos = self._skip(pos + 1)
+                    if _FUNCTION_VALUE.match(text, pos):
+                        pos = self._skip_function(pos)
+                        if handlers is not None:
+                            handlers.append(key)
+                        if spans is not None:
+                            spans.append((key, member_start, pos))
+                    else:
+                        result[key], pos = self._value(pos)
+                else:
+                    # 简写属性 {name}
+                    result[key] = key
+            
+            pos = self._skip(pos)
+            if text.startswith(",", pos):
+                pos += 1
+    
+    def _array(self, pos: int) -> Tuple[List[Any], int]:
+        """解析数组字面量（pos 指向 [）"""
+        text = self.text
+        result: List[Any] = []
+        pos += 1
+        
+        while True:
+            pos = self._skip(pos)
+            if pos >= self.length:
+                raise ShowdownParseError("数组未闭合")
+            if text[pos] == "]":
+                return result, pos + 1
+            if _FUNCTION_VALUE.match(text, pos):
+                pos = self._skip_function(pos)
+            else:
+                value, pos = self._value(pos)
+                result.append(value)
+            pos = self._skip(pos)
+            if text.startswith(",", pos):
+                pos += 1
+    
+    def _value(self, pos: int) -> Tuple[Any, int]:
+        """解析一个值；无法识别的表达式保留原始文本"""
+        text = self.text
+        start = pos
+        if pos >= self.length:
+            raise ShowdownParseError("缺少值")
+        char = text[pos]
+        
+        if char == "{":
+            value, pos = self._object(pos)
+        elif char == "[":
+            value, pos = self._array(pos)
+        elif char in _STRING:
+            match = _STRING[char].match(text, pos)
+            if not match:
+                raise ShowdownParseError(f"位置 {pos} 处字符串未闭合")
+            value, pos = _unescape(match.group()[1:-1]), match.end()
+        else:
+            match = _NUMBER.match(text, pos)
+            if match:
+                literal = match.group()
+                if literal.lstrip("-")[:2] in ("0x", "0X"):
+                    value = int(literal, 16)
+                elif any(c in literal for c in ".eE"):
+                    value = float(literal)
+                else:
+                    value = int(literal)
+                pos = match.end()
+            else:
+                match = _IDENTIFIER.match(text, pos)
+                if not match:
+                    end = self._skip_expression(pos)
+                    return text[start:end].strip(), end
+                value = _LITERALS.get(match.group(), match.group())
+                pos = match.end()
+        
+        # 值后面还有运算符（如 60 * 2、a || b）：整体按原始表达式保存
+        after = self._skip(pos)
+        if after < self.length and text[after] not in ",}]":
+            end = self._skip_expression(pos)
+            return text[start:end].strip(), end
+        return value, pos
+    
+    # ---------- 跳过 ----------
+    
+    def _skip_function(self, pos: int) -> int:
+        """跳过函数：参数列表、=>、函数体（{...} 或表达式）"""
+        text = self.text
+        match = _FUNCTION_HEAD.match(text, pos)
+        if match:
+            pos = match.end()
+        
+        pos = self._skip(pos)
+        if text.startswith("(", pos):
+            pos = self._skip_balanced(pos)
+        else:
+            # 单参数箭头函数 a => ...
+            match = _IDENTIFIER.match(text, pos)
+            if not match:
+                raise ShowdownParseError(f"位置 {pos} 处无法识别的函数")
+            pos = match.end()
+        
+        pos = self._skip(pos)
+        if text.startswith("=>", pos):
+            pos = self._skip(pos + 2)
+        if text.startswith("{", pos):
+            return self._skip_balanced(pos)
+        return self._skip_expression(pos)
+    
+    def _skip_expression(self, pos: int) -> int:
+        """跳到当前层级的下一个 , } ] 之前"""
+        text = self.text
+        while pos < self.length:
+            pos = self._skip(pos)
+            if pos >= self.length:
+                break
+            char = text[pos]
+            if char in ",}]":
+                return pos
+            if char in _OPENERS or char in _STRING:
+                pos = self._skip_balanced(pos)
+            elif char == "/":
+                pos = self._skip_slash(pos)
+            else:
+                match = _EXPRESSION_RUN.match(text, pos)
+                pos = match.end() if match else pos + 1
+        return pos
+    
+    def _skip_balanced(self, pos: int) -> int:
+        """跳过配对的括号（或单个字符串），返回结束位置之后"""
+        text = self.text
+        char = text[pos]
+        if char in _STRING:
+            match = _STRING[char].match(text, pos)
+            if not match:
+                raise ShowdownParseError(f"位置 {pos} 处字符串未闭合")
+            return match.end()
+        
+        opener, closer = char, _OPENERS[char]
+        structural = _STRUCTURAL[opener]
+        depth = 0
+        while True:
+            match = structural.search(text, pos)
+            if not match:
+                raise ShowdownParseError("括号不配对")
+            pos = match.start()
+            char = text[pos]
+            
+            if char == opener:
+                depth += 1
+                pos += 1
+            elif char == closer:
+                depth -= 1
+                pos += 1
+                if depth == 0:
+                    return pos
+            elif char in _STRING:
+                pos = self._skip_balanced(pos)
+            else:
+                pos = self._skip_slash(pos)
+    
+    def _skip_slash(self, pos: int) -> int:
+        """处理 /：注释、正则字面量或除号"""
+        text = self.text
+        following = text[pos + 1:pos + 2]
+        if following == "/":
+            match = _LINE_COMMENT_END.search(text, pos)
+            return match.end() if match else self.length
+        if following == "*":
+            end = text.find("*/", pos + 2)
+            return end + 2 if end >= 0 else self.length
+        
+        previous = pos - 1
+        while previous >= 0 and text[previous] in " \t\r\n":
+            previous -= 1
+        is_regex = previous < 0 or text[previous] in _REGEX_PRECEDERS or text[max(0, previous - 5):previous + 1].endswith("return")
+        if is_regex:
+            match = _REGEX_LITERAL.match(text, pos)
+            if match:
+                return match.end()
+        return pos + 1
+
+
+def parse_showdown_source(text: str, keep_source: bool = False) -> Tuple[Optional[str], Dict[str, Dict[str, Any]]]:
+    """
+    解析 Showdown 数据文件内容
+    
+    Args:
+        text: 文件内容
+        keep_source: 是否在条目中保留原始代码（source字段）
+    
+    Returns:
+        (对象名称, {条目ID: 条目数据})
+    """
+    return ShowdownParser(text).parse(keep_source=keep_source)
+
+
+def iter_showdown_file(
+    file_path,
+    keep_source: bool = False,
+    chunk_size: int = 1 << 18
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    流式解析 Showdown 数据文件，逐条产出 (条目ID, 条目数据)
+    
+    按块读取文件，缓冲区只保留尚未解析完的条目，峰值内存约为
+    chunk_size + 最大单个条目，与文件大小无关（适用于 learnsets.js / pokedex.js）。
+    
+    Args:
+        file_path: 文件路径
+        keep_source: 是否在条目中保留原始代码（source字段）
+        chunk_size: 每次读取的字符数
+    
+    Yields:
+        (条目ID, 条目数据)；非对象条目跳过
+    
+    Raises:
+        ShowdownParseError: 文件在主对象结束前截断或结构无法解析
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        buffer = ""
+        eof = False
+        
+        def read_more() -> Tuple[bool, str]:
+            chunk = f.read(chunk_size)
+            return bool(chunk), chunk
+        
+        # 1. 定位主对象（对象定义可能跨越块边界，保留缓冲区末尾继续查找）
+        while True:
+            more, chunk = read_more()
+            buffer += chunk
+            match = _OBJECT_START.search(buffer)
+            if match:
+                break
+            if not more:
+                return
+            buffer = buffer[-256:]
+        
+        buffer = buffer[match.end():]
+        
+        # 2. 逐条解析；条目被块边界截断时读取下一块后从条目开头重试
+        while True:
+            parser = ShowdownParser(buffer)
+            pos = 0
+            while True:
+                try:
+                    key, item, end = parser.parse_entry(pos, keep_source=keep_source)
+                except ShowdownParseError:
+                    if eof:
+                        raise
+                    break
+                if key is None:
+                    return
+                if item is not None:
+                    yield key, item
+                pos = end
+            
+            more, chunk = read_more()
+            eof = not more
+            buffer = buffer[pos:] + chunk
@@ -0,0 +1,185 @@
+"""
+CobbleSeer - 模板解析结果的磁盘缓存
+
+moves.js / abilities.js 解析后以 pickle（协议5）存盘，新进程直接反序列化，
+不再重复解析。缓存键为源文件路径，条目记录文件大小、修改时间和内容哈希：
+
+- 大小和修改时间一致：直接命中（不读取源文件）
+- 大小或修改时间变化：计算内容哈希，一致则刷新元数据后命中（如 touch / 重新检出）
+- 内容变化或解析器版本变化：失效，重新解析后覆盖
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+
+# 解析器输出格式变化时递增，使旧缓存失效
+PARSER_VERSION = 2
+
+PICKLE_PROTOCOL = 5
+
+
+def content_hash(content: bytes) -> str:
+    """源文件内容哈希"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_hash(path: Path, chunk_size: int = 1 << 20) -> Tuple[int, str]:
+    """分块读取文件，返回 (字节数, 内容哈希)，结果与 content_hash(path.read_bytes()) 一致"""
+    hasher = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+            size += len(chunk)
+    return size, hasher.hexdigest()
+
+
+class TemplateParseCache:
+    """按源文件缓存解析结果"""
+    
+    def __init__(self, cache_dir: Path):
+        """
+        初始化缓存
+        
+        Args:
+            cache_dir: 缓存目录（不存在时在首次写入时创建）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0}
+    
+    def _entry_path(self, source: Path, keep_source: bool) -> Path:
+        key = f"{source.resolve()}|{int(keep_source)}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return self.cache_dir / f"{source.stem}-{digest}.pkl"
+    
+    def load(
+        self,
+        source: Path,
+        keep_source: bool = False,
+        entry_hashes: Optional[Dict[str, bytes]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的解析结果
+        
+        Args:
+            source: 源文件路径
+            keep_source: 解析时是否保留原始代码（分别缓存）
+            entry_hashes: 传入字典时，命中且缓存中记录了条目哈希则填充（热重载基线）
+        
+        Returns:
+            解析结果；未命中或已失效返回 None
+        """
+        entry_path = self._entry_path(source, keep_source)
+        try:
+            with open(entry_path, "rb") as f:
+                entry = pickle.load(f)
+            stat = source.stat()
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        except Exception as e:
+            logger.debug(f"  模板缓存不可读，忽略：{entry_path.name}（{e}）")
+            self.stats["misses"] += 1
+            return None
+        
+        if entry.get("version") != PARSER_VERSION:
+            self.stats["misses"] += 1
+            return None
+        
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            self.stats["hits"] += 1
+            if entry_hashes is not None:
+                entry_hashes.update(entry.get("entry_hashes") or {})
+            return entry["items"]
+        
+        # 元数据变化但内容可能相同
+        if entry["size"] == stat.st_size and entry["hash"] == file_hash(source)[1]:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            try:
+                self._write(entry_path, entry)
+            except OSError:
+                pass
+            self.stats["revalidated"] += 1
+            self.stats["hits"] += 1
+            if entry_hashes is not None:
+                entry_hashes.update(entry.get("entry_hashes") or {})
+            return entry["items"]
+        
+        self.stats["misses"] += 1
+        return None
+    
+    def store(
+        self,
+        source: Path,
+        content: bytes,
+        items: Dict[str, Any],
+        keep_source: bool = False,
+        entry_hashes: Optional[Dict[str, bytes]] = None
+    ):
+        """
+        写入解析结果
+        
+        Args:
+            source: 源文件路径
+            content: 解析时读取的文件内容（用于计算哈希）
+            items: 解析结果
+            keep_source: 解析时是否保留原始代码
+            entry_hashes: 各条目原始代码的哈希（随解析结果一起缓存）
+        """
+        self.store_hashed(source, len(content), content_hash(content), items, keep_source, entry_hashes)
+    
+    def store_hashed(
+        self,
+        source: Path,
+        size: int,
+        digest: str,
+        items: Dict[str, Any],
+        keep_source: bool = False,
+        entry_hashes: Optional[Dict[str, bytes]] = None
+    ):
+        """
+        写入解析结果（内容哈希已在别处计算，如进程池工作进程）
+        
+        Args:
+            source: 源文件路径
+            size: 解析时读取的内容字节数
+            digest: 解析时读取的内容哈希（content_hash）
+            items: 解析结果
+            keep_source: 解析时是否保留原始代码
+            entry_hashes: 各条目原始代码的哈希（随解析结果一起缓存）
+        """
+        stat = source.stat()
+        entry = {
+            "version": PARSER_VERSION,
+            "path": str(source.resolve()),
+            "size": size,
+            # 解析期间文件被改写时记录的大小与当前不一致，下次加载会重新校验哈希
+            "mtime_ns": stat.st_mtime_ns if stat.st_size == size else 0,
+            "hash": digest,
+            "items": items,
+            "entry_hashes": entry_hashes
+        }
+        try:
+            self._write(self._entry_path(source, keep_source), entry)
+        except OSError as e:
+            logger.warning(f"⚠️ 模板缓存写入失败：{e}")
+    
+    def clear(self):
+        """删除所有缓存文件"""
+        if self.cache_dir.exists():
+            for entry_path in self.cache_dir.glob("*.pkl"):
+                entry_path.unlink(missing_ok=True)
+    
+    def _write(self, entry_path: Path, entry: Dict[str, Any]):
+        """原子写入（先写临时文件再替换）"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(entry, f, protocol=PICKLE_PROTOCOL)
+        os.replace(tmp_path, entry_path)
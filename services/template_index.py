@@ -0,0 +1,206 @@
+"""
+CobbleSeer - 技能模板二级索引
+
+TemplateLibrary 加载技能后一次性建立索引，search_moves / get_move_by_effect
+不再逐条扫描：
+
+- 属性、分类、追加状态 -> 技能位置列表
+- 吸取 / 反作用 / 能力变化 / 追加效果 / 非零优先度 -> 技能位置列表
+- 按威力排序的数组（bisect 区间查询）
+
+位置即技能在原始字典中的顺序，查询结果与线性扫描的顺序一致。
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, List, Optional, Set
+
+
+# get_move_by_effect 的效果名 -> 状态代码
+STATUS_EFFECTS = {
+    'paralyze': 'par',
+    'burn': 'brn',
+    'poison': 'psn',
+    'sleep': 'slp',
+    'freeze': 'frz'
+}
+
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+def _power(move_data: Dict[str, Any]) -> float:
+    power = move_data.get('basePower', 0)
+    return power if isinstance(power, (int, float)) and not isinstance(power, bool) else 0
+
+
+class MoveIndex:
+    """技能数据的二级索引（只读，技能数据变化时重建）"""
+    
+    def __init__(self, moves: Dict[str, Dict[str, Any]]):
+        """
+        建立索引
+        
+        Args:
+            moves: 技能ID -> 技能数据（get_move_records 的结果）
+        """
+        self.moves = moves
+        self.ids: List[str] = list(moves)
+        self.items: List[Dict[str, Any]] = list(moves.values())
+        self.powers: List[float] = [_power(move_data) for move_data in self.items]
+        
+        self.by_type: Dict[str, List[int]] = defaultdict(list)
+        self.by_category: Dict[str, List[int]] = defaultdict(list)
+        self.by_status: Dict[str, List[int]] = defaultdict(list)
+        self.drain: List[int] = []
+        self.recoil: List[int] = []
+        self.boost: List[int] = []
+        self.secondary: List[int] = []
+        self.priority: List[int] = []
+        
+        for position, move_data in enumerate(self.items):
+            self.by_type[move_data.get('type')].append(position)
+            self.by_category[move_data.get('category')].append(position)
+            
+            secondary = move_data.get('secondary')
+            if secondary is not None:
+                self.secondary.append(position)
+            if isinstance(secondary, dict):
+                if secondary.get('status'):
+                    self.by_status[secondary['status']].append(position)
+                if 'boosts' in secondary:
+                    self.boost.append(position)
+            
+            if 'drain' in move_data:
+                self.drain.append(position)
+            if 'recoil' in move_data:
+                self.recoil.append(position)
+            if move_data.get('priority', 0) != 0:
+                self.priority.append(position)
+        
+        # 威力区间查询：按威力排序的位置
+        self.power_order: List[int] = sorted(range(len(self.items)), key=self.powers.__getitem__)
+        self.sorted_powers: List[float] = [self.powers[i] for i in self.power_order]
+        
+        self._sets: Dict[int, Set[int]] = {}
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    def _as_set(self, positions: List[int]) -> Set[int]:
+        """位置列表对应的集合（按列表缓存）"""
+        key = id(positions)
+        if key not in self._sets:
+            self._sets[key] = set(positions)
+        return self._sets[key]
+    
+    def query(
+        self,
+        type: Optional[str] = None,
+        category: Optional[str] = None,
+        power_min: float = 0,
+        power_max: float = 999,
+        has_priority: Optional[bool] = None,
+        has_secondary: Optional[bool] = None,
+        limit: int = 10
+    ) -> List[int]:
+        """
+        索引求交查询
+        
+        从候选最少的索引出发与其余索引求交（集合运算），只取位置最小的 limit 条；
+        没有正向条件时按顺序遍历，凑够 limit 条即停止。
+        
+        Returns:
+            符合条件的技能位置（按原始顺序）
+        """
+        if limit <= 0:
+            return []
+        
+        required: List[List[int]] = []
+        if type:
+            required.append(self.by_type.get(type, []))
+        if category:
+            required.append(self.by_category.get(category, []))
+        if has_priority:
+            required.append(self.priority)
+        if has_secondary:
+            required.append(self.secondary)
+        
+        if any(not positions for positions in required):
+            return []
+        
+        excluded: List[Set[int]] = []
+        if has_priority is False:
+            excluded.append(self._as_set(self.priority))
+        if has_secondary is False:
+            excluded.append(self._as_set(self.secondary))
+        
+        low = bisect_left(self.sorted_powers, power_min)
+        high = bisect_right(self.sorted_powers, power_max)
+        power_filtered = high - low < len(self.items)
+        
+        if not required and not power_filtered:
+            # 只有排除条件：按顺序遍历，凑够即停
+            no_priority = excluded[0] if has_priority is False else _EMPTY
+            no_secondary = excluded[-1] if has_secondary is False else _EMPTY
+            results: List[int] = []
+            for position in range(len(self.items)):
+                if position in no_priority or position in no_secondary:
+                    continue
+                results.append(position)
+                if len(results) >= limit:
+                    break
+            return results
+        
+        # 从候选最少的条件出发做集合求交
+        required.sort(key=len)
+        if power_filtered and (not required or high - low < len(required[0])):
+            candidates = set(self.power_order[low:high])
+        else:
+            candidates = set(required.pop(0))
+            if power_filtered:
+                powers = self.powers
+                candidates = {p for p in candidates if power_min <= powers[p] <= power_max}
+        
+        for positions in required:
+            candidates.intersection_update(self._as_set(positions))
+        for excluded_set in excluded:
+            candidates.difference_update(excluded_set)
+        
+        return heapq.nsmallest(limit, candidates)
+    
+    def effect_positions(self, effect_type: str) -> List[int]:
+        """
+        带指定效果的技能位置（按原始顺序）
+        
+        Args:
+            effect_type: 效果类型（paralyze/burn/.../drain/recoil/boost_*/lower_*）
+        
+        Raises:
+            ValueError: 未知的效果类型
+        """
+        if effect_type in STATUS_EFFECTS:
+            return self.by_status.get(STATUS_EFFECTS[effect_type], [])
+        if effect_type == 'drain':
+            return self.drain
+        if effect_type == 'recoil':
+            return self.recoil
+        if effect_type.startswith('boost_') or effect_type.startswith('lower_'):
+            return self.boost
+        raise ValueError(
+            f"未知的效果类型: {effect_type}（可选：{'/'.join(STATUS_EFFECTS)}/drain/recoil/boost_*/lower_*）"
+        )
+    
+    def first_with_effect(self, effect_type: str) -> Optional[Dict[str, Any]]:
+        """
+        带指定效果的第一个技能
+        
+        Args:
+            effect_type: 效果类型（paralyze/burn/.../drain/recoil/boost_*/lower_*）
+        """
+        try:
+            positions = self.effect_positions(effect_type)
+        except ValueError:
+            return None
+        return self.items[positions[0]] if positions else None
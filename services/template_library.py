@@ -3,47 +3,266 @@
 从参考数据中提取和管理技能/特性模板
 """
 import json
+import os
 import re
+import hashlib
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Tuple
+import numpy as np
 from loguru import logger
 
+from services.showdown_parser import ShowdownParseError, ShowdownParser, iter_showdown_file, parse_showdown_source
+from services.template_cache import TemplateParseCache, content_hash
+from services.handler_index import HandlerIndex
+from services.learnset_index import LearnsetIndex
+from services.move_neighbors import MoveNeighbors
+from services.move_table import MoveTable
+from services.name_index import NameIndex, iter_lang_names
+from services.template_index import MoveIndex
+from services.template_records import compact_entries, compact_items, to_plain_items
+
+
+# 项目根目录（相对配置路径的基准）
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def resolve_project_path(path: str) -> Path:
+    """将配置中的路径解析为绝对路径（相对路径以项目根目录为基准）"""
+    path = Path(path)
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
+
+# Showdown 数据文件后缀（preload 只解析这些文件，宝可梦参考包等目录除外）
+SHOWDOWN_SUFFIXES = (".js", ".ts")
+
+
+def _entry_digest(text: str, start: int, end: int) -> bytes:
+    """单个条目原始代码的哈希"""
+    return hashlib.sha1(text[start:end].encode('utf-8')).digest()
+
+
+def compute_entry_hashes(text: str) -> Dict[str, bytes]:
+    """
+    各条目原始代码的哈希（热重载按此判断哪些条目变化）
+    
+    Returns:
+        条目ID -> 哈希；无法切分条目时为空字典
+    """
+    try:
+        _, spans = ShowdownParser(text).split_entries()
+    except ShowdownParseError:
+        return {}
+    return {item_id: _entry_digest(text, start, end) for item_id, start, end in spans}
+
+
+def _parse_reference_file(path: str) -> Tuple[Dict[str, Any], float, int, str, Dict[str, bytes]]:
+    """进程池工作函数：解析单个参考文件，返回 (条目, 耗时秒数, 内容字节数, 内容哈希, 条目哈希)"""
+    started = time.perf_counter()
+    raw = Path(path).read_bytes()
+    content = raw.decode('utf-8')
+    _, items = parse_showdown_source(content)
+    return items, time.perf_counter() - started, len(raw), content_hash(raw), compute_entry_hashes(content)
+
 
 class TemplateLibrary:
     """技能和特性模板库"""
     
-    def __init__(self, reference_dir: str):
+    # 超过此大小的参考文件使用流式解析（learnsets.js / pokedex.js 等）
+    STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024
+    
+    def __init__(self, reference_dir: str, cache_dir: Optional[str] = None):
         """
         初始化模板库
         
         Args:
             reference_dir: 参考数据目录路径
+            cache_dir: 解析结果磁盘缓存目录（None 表示不使用磁盘缓存）
         """
         self.reference_dir = Path(reference_dir)
+        # 单独指定的参考文件（名称 -> 路径），未指定时使用 reference_dir/<名称>.js
+        self.reference_files: Dict[str, Path] = {}
         self.moves_cache = None
         self.abilities_cache = None
+        # 其余参考文件的解析结果（名称 -> 条目），由 preload / load_reference 填充
+        self.reference_data: Dict[str, Dict[str, Any]] = {}
+        self.parse_cache = TemplateParseCache(resolve_project_path(cache_dir)) if cache_dir else None
+        self._move_index: Optional[MoveIndex] = None
+        self._move_table: Optional[MoveTable] = None
+        self._learnset_index: Optional[LearnsetIndex] = None
+        # 流式建立学习表索引时的源文件签名（路径, 大小, 修改时间）
+        self._learnset_source: Optional[Tuple[str, int, int]] = None
+        self._move_neighbors: Optional[MoveNeighbors] = None
+        # 事件处理器索引：文件名称 -> (建立索引时的条目字典, 索引)
+        self._handler_indexes: Dict[str, Tuple[Dict[str, Any], HandlerIndex]] = {}
+        # 名称索引：(建立索引时的技能字典, 特性字典, 索引)
+        self._name_index: Optional[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], NameIndex]] = None
+        # 热重载：每个文件各条目原始代码的哈希，以及重载完成后的回调（参数为文件名称）
+        self._entry_hashes: Dict[str, Dict[str, bytes]] = {}
+        self._reload_lock = threading.Lock()
+        self.reload_listeners: List[Callable[[str], None]] = []
         
         logger.info(f"📚 初始化模板库：{self.reference_dir}")
     
-    def parse_showdown_js(self, file_path: Path) -> Dict[str, Any]:
+    @classmethod
+    def from_config(cls, config: dict) -> "TemplateLibrary":
+        """
+        根据配置中的 rag.reference_paths 创建模板库
+        
+        技能目录作为 reference_dir，特性目录单独登记 abilities.js，
+        rag.reference_files 中的其他参考文件（pokedex/learnsets/items/...）按名称登记。
+        相对路径以项目根目录为基准。解析结果缓存目录读取 cache.templates。
+        
+        Args:
+            config: 配置字典
+        
+        Returns:
+            模板库实例
+        """
+        paths = config.get("rag", {}).get("reference_paths", {}) or {}
+        moves_dir = resolve_project_path(paths.get("moves", "reference"))
+        cache_config = config.get("cache", {}) or {}
+        templates_cache = cache_config.get("templates", {}) or {}
+        cache_dir = None
+        if cache_config.get("enabled", True) and templates_cache.get("enabled", True):
+            cache_dir = templates_cache.get("dir", "data/template_cache")
+        library = cls(str(moves_dir), cache_dir=cache_dir)
+        
+        if paths.get("abilities"):
+            library.reference_files["abilities"] = resolve_project_path(paths["abilities"]) / "abilities.js"
+        if paths.get("pokemon"):
+            library.reference_files["pokemon"] = resolve_project_path(paths["pokemon"])
+        for name, file_path in (config.get("rag", {}).get("reference_files", {}) or {}).items():
+            library.reference_files[name] = resolve_project_path(file_path)
+        
+        return library
+    
+    def get_reference_file(self, name: str) -> Path:
+        """
+        获取参考文件路径
+        
+        Args:
+            name: 文件名称（moves/abilities/...）
+        
+        Returns:
+            文件路径
+        """
+        return self.reference_files.get(name, self.reference_dir / f"{name}.js")
+    
+    def parse_showdown_js(
+        self,
+        file_path: Path,
+        keep_source: bool = False,
+        entry_hashes: Optional[Dict[str, bytes]] = None
+    ) -> Dict[str, Any]:
         """
-        解析Showdown格式的JS文件
+        解析Showdown格式的JS文件（单遍词法扫描，见 services/showdown_parser.py）
         
         Args:
             file_path: JS文件路径
-            
+            keep_source: 是否在条目中保留原始代码（source字段，用于RAG索引）
+            entry_hashes: 传入字典时填充各条目原始代码的哈希（热重载基线，随解析结果一起缓存）
+        
         Returns:
             解析后的数据字典
         """
+        if self.parse_cache is not None:
+            items = self.parse_cache.load(file_path, keep_source=keep_source, entry_hashes=entry_hashes)
+            if items is not None:
+                logger.info(f"⚡ 从缓存加载 {file_path.name}：{len(items)} 个条目")
+                return items
+        
         logger.info(f"📖 解析文件：{file_path.name}")
         
+        raw = file_path.read_bytes()
+        content = raw.decode('utf-8')
+        
+        try:
+            obj_name, items = parse_showdown_source(content, keep_source=keep_source)
+        except ShowdownParseError as e:
+            logger.warning(f"⚠️ 单遍解析失败（{e}），回退到逐行解析")
+            return self.parse_showdown_js_legacy(file_path, keep_source=keep_source)
+        
+        if obj_name is None:
+            logger.warning(f"⚠️ 未找到对象定义")
+            return {}
+        
+        logger.info(f"  找到对象：{obj_name}")
+        logger.info(f"✅ 成功解析 {len(items)} 个条目")
+        
+        if entry_hashes is not None:
+            entry_hashes.update(compute_entry_hashes(content))
+        if self.parse_cache is not None:
+            self.parse_cache.store(file_path, raw, items, keep_source=keep_source, entry_hashes=entry_hashes or None)
+        return items
+    
+    def iter_showdown_js(self, file_path: Path, keep_source: bool = False):
+        """
+        流式解析Showdown格式的JS文件（按块读取，逐条产出，峰值内存与文件大小无关）
+        
+        Args:
+            file_path: JS文件路径
+            keep_source: 是否在条目中保留原始代码（source字段）
+        
+        Yields:
+            (条目ID, 条目数据)
+        """
+        logger.info(f"📖 流式解析文件：{file_path.name}")
+        count = 0
+        for item_id, item in iter_showdown_file(file_path, keep_source=keep_source):
+            count += 1
+            yield item_id, item
+        logger.info(f"✅ 成功解析 {count} 个条目")
+    
+    def _stream_reference(self, name: str, file_path: Path) -> Dict[str, Any]:
+        """
+        流式建立大型参考文件的条目字典：不读入整个文件内容，技能 / 特性条目
+        解析后立即转为紧凑记录（不保留中间的普通字典）；流式解析失败时回退为整体解析
+        
+        Args:
+            name: 文件名称
+            file_path: JS文件路径
+        
+        Returns:
+            条目字典
+        """
+        try:
+            return compact_entries(name, self.iter_showdown_js(file_path))
+        except ShowdownParseError as e:
+            logger.warning(f"⚠️ 流式解析失败（{e}），改为整体解析")
+            return self.parse_showdown_js(file_path)
+    
+    def _load_reference_file(self, name: str, file_path: Path):
+        """解析参考文件并合并到模板库（超过 STREAM_THRESHOLD_BYTES 的文件流式解析，不记录条目哈希）"""
+        if file_path.stat().st_size > self.STREAM_THRESHOLD_BYTES:
+            self._merge_reference(name, self._stream_reference(name, file_path))
+        else:
+            hashes: Dict[str, bytes] = {}
+            self._merge_reference(name, self.parse_showdown_js(file_path, entry_hashes=hashes), hashes)
+    
+    def parse_showdown_js_legacy(self, file_path: Path, keep_source: bool = False) -> Dict[str, Any]:
+        """
+        解析Showdown格式的JS文件（旧版：逐行括号计数 + 逐字段正则）
+        
+        仅提取基础字段；字符串或注释中的括号会打乱计数。保留用于回退和性能对比。
+        
+        Args:
+            file_path: JS文件路径
+            keep_source: 是否在条目中保留原始代码（source字段，用于RAG索引）
+        
+        Returns:
+            解析后的数据字典
+        """
         content = file_path.read_text(encoding='utf-8')
         
         # 查找主对象定义
         # 支持两种格式：
         # 1. const Moves = {...}
         # 2. exports.Moves = {...}
-        pattern = r'(?:const|exports\.)\s+(Moves|Abilities)\s*=\s*(\{[\s\S]*?\n\};)'
+        pattern = r'(?:const\s+|exports\.)(Moves|Abilities)\s*=\s*(\{[\s\S]*?\n\};)'
         match = re.search(pattern, content)
         
         if not match:
@@ -86,6 +305,8 @@ class TemplateLibrary:
                     try:
                         item_data = self._parse_item(item_str)
                         if item_data:
+                            if keep_source:
+                                item_data['source'] = item_str.strip()
                             items[current_item] = item_data
                     except Exception as e:
                         logger.debug(f"  跳过条目 {current_item}：{e}")
@@ -95,7 +316,6 @@ class TemplateLibrary:
                     current_item = None
                     current_lines = []
         
-        logger.info(f"✅ 成功解析 {len(items)} 个条目")
         return items
     
     def _parse_item(self, item_str: str) -> Dict[str, Any]:
@@ -105,7 +325,7 @@ class TemplateLibrary:
         
         Args:
             item_str: 条目字符串
-            
+        
         Returns:
             条目数据字典
         """
@@ -194,52 +414,523 @@ class TemplateLibrary:
         
         return data
     
-    def load_moves(self, force_reload: bool = False) -> Dict[str, Any]:
+    def reference_names(self) -> List[str]:
+        """所有已登记的 Showdown 参考文件名称（技能、特性及 reference_files 中的文件）"""
+        names = ["moves", "abilities"]
+        for name, path in self.reference_files.items():
+            if name not in names and path.suffix in SHOWDOWN_SUFFIXES:
+                names.append(name)
+        return names
+    
+    def load_reference(self, name: str, force_reload: bool = False) -> Dict[str, Any]:
         """
-        加载所有技能数据
+        加载任意已登记的参考文件（如 learnsets / pokedex）
+        
+        返回完整的条目字典；只需逐条处理的内部使用方（学习表索引、RAG导入）直接消费
+        流式解析结果，不经过这里。
         
         Args:
+            name: 文件名称
             force_reload: 是否强制重新加载
+        
+        Returns:
+            条目字典；文件不存在时返回空字典
+        """
+        if name == "moves":
+            return self.load_moves(force_reload)
+        if name == "abilities":
+            return self.load_abilities(force_reload)
+        if name in self.reference_data and not force_reload:
+            return self.reference_data[name]
+        
+        file_path = self.get_reference_file(name)
+        if not file_path.exists():
+            logger.error(f"❌ 参考文件不存在：{file_path}")
+            return {}
+        
+        self._load_reference_file(name, file_path)
+        return self.reference_data[name]
+    
+    def preload(self, names: Optional[List[str]] = None, workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        并行解析多个参考文件并合并到模板库
+        
+        磁盘缓存命中的文件直接读取，其余文件在进程池中并行解析（每个文件一个任务），
+        冷启动总耗时约等于最大单个文件的解析耗时。
+        
+        超过 STREAM_THRESHOLD_BYTES 的文件不经过进程池整体传回：技能 / 特性流式建立紧凑记录，
+        学习表流式建立学习表索引（不保留学习表），其余文件推迟到使用时再读取。
+        
+        Args:
+            names: 要加载的文件名称（默认 reference_names() 的全部文件）
+            workers: 进程数（默认CPU核数；1表示在当前进程中依次解析）
+        
+        Returns:
+            每个文件的报告：{"items", "seconds", "source": "cache"|"parsed"|"stream"|"deferred"} 或 {"error"}；
+            deferred 的 items 为 None
+        """
+        names = names or self.reference_names()
+        report: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, Path] = {}
+        streamed: List[str] = []
+        started = time.perf_counter()
+        
+        for name in names:
+            file_path = self.get_reference_file(name)
+            if not file_path.is_file():
+                report[name] = {"error": f"参考文件不存在：{file_path}"}
+                continue
+            if file_path.stat().st_size > self.STREAM_THRESHOLD_BYTES:
+                streamed.append(name)
+                continue
             
+            load_start = time.perf_counter()
+            hashes: Dict[str, bytes] = {}
+            items = self.parse_cache.load(file_path, entry_hashes=hashes) if self.parse_cache is not None else None
+            if items is None:
+                pending[name] = file_path
+                continue
+            self._merge_reference(name, items, hashes)
+            report[name] = {"items": len(items), "seconds": round(time.perf_counter() - load_start, 4), "source": "cache"}
+        
+        def finish(name: str, items: Dict[str, Any], seconds: float, size: int, digest: str, hashes: Dict[str, bytes]):
+            if self.parse_cache is not None:
+                self.parse_cache.store_hashed(pending[name], size, digest, items, entry_hashes=hashes or None)
+            self._merge_reference(name, items, hashes)
+            report[name] = {"items": len(items), "seconds": round(seconds, 4), "source": "parsed"}
+        
+        workers = min(workers or os.cpu_count() or 1, len(pending)) if pending else 0
+        if workers == 1:
+            for name, file_path in pending.items():
+                try:
+                    finish(name, *_parse_reference_file(str(file_path)))
+                except Exception as e:
+                    report[name] = {"error": str(e)}
+        elif workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(_parse_reference_file, str(file_path)): name
+                    for name, file_path in pending.items()
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        finish(name, *future.result())
+                    except Exception as e:
+                        report[name] = {"error": str(e)}
+        
+        # 大型文件在当前进程中流式消费（学习表依赖已加载的技能，放在最后）
+        for name in sorted(streamed, key=lambda name: name == "learnsets"):
+            load_start = time.perf_counter()
+            try:
+                if name == "moves":
+                    count = len(self.get_move_records())
+                elif name == "abilities":
+                    count = len(self.get_ability_records())
+                elif name == "learnsets":
+                    index = self.get_learnset_index()
+                    count = index.species_count if index is not None else 0
+                else:
+                    report[name] = {"items": None, "seconds": 0.0, "source": "deferred"}
+                    continue
+            except Exception as e:
+                report[name] = {"error": str(e)}
+                continue
+            report[name] = {"items": count, "seconds": round(time.perf_counter() - load_start, 4), "source": "stream"}
+        
+        total = time.perf_counter() - started
+        loaded = sum(1 for entry in report.values() if entry.get("items") is not None)
+        logger.info(f"✅ 预加载 {loaded}/{len(names)} 个参考文件（{len(pending)}个并行解析，{workers}进程，{total:.2f}s）")
+        return report
+    
+    def refresh_reference(self, name: str) -> Dict[str, Any]:
+        """
+        增量重载参考文件（文件变化后由 ReferenceWatcher 调用）
+        
+        只切分条目并按原始代码哈希比较，仅重新解析新增/变化的条目，未变化的条目沿用原对象。
+        新的条目字典（以及技能的索引和列式表）全部构建完成后才整体替换引用，
+        正在执行的查询始终看到完整的旧数据或完整的新数据。
+        
+        Args:
+            name: 文件名称（moves/abilities/...）
+        
         Returns:
-            技能数据字典
+            {"changed", "added", "removed", "unchanged", "seconds"}；首次调用（无基线哈希）时全部计为 added
+        """
+        with self._reload_lock:
+            started = time.perf_counter()
+            file_path = self.get_reference_file(name)
+            raw = file_path.read_bytes()
+            parser = ShowdownParser(raw.decode('utf-8'))
+            _, spans = parser.split_entries()
+            
+            current = {
+                "moves": self.moves_cache,
+                "abilities": self.abilities_cache
+            }.get(name, self.reference_data.get(name)) or {}
+            old_hashes = self._entry_hashes.get(name, {})
+            
+            items: Dict[str, Any] = {}
+            hashes: Dict[str, bytes] = {}
+            changed = added = 0
+            for item_id, start, end in spans:
+                digest = _entry_digest(parser.text, start, end)
+                hashes[item_id] = digest
+                if old_hashes.get(item_id) == digest and item_id in current:
+                    items[item_id] = current[item_id]
+                    continue
+                _, item, _ = parser.parse_entry(start)
+                items[item_id] = item
+                if item_id in old_hashes:
+                    changed += 1
+                else:
+                    added += 1
+            
+            # 先转为紧凑记录，索引和列式表与模板库引用同一批条目对象；
+            # 再构建派生结构，最后整体替换引用（替换间隙中的查询会按新数据自行重建，结果一致）
+            compact_items(name, items)
+            if name == "moves":
+                index, table = MoveIndex(items), MoveTable(items)
+                self._merge_reference(name, items, hashes)
+                self._move_index, self._move_table = index, table
+            else:
+                self._merge_reference(name, items, hashes)
+            
+            if self.parse_cache is not None:
+                self.parse_cache.store(file_path, raw, items, entry_hashes=hashes)
+            
+            report = {
+                "changed": changed,
+                "added": added,
+                "removed": len(set(old_hashes) - set(hashes)),
+                "unchanged": len(items) - changed - added,
+                "seconds": round(time.perf_counter() - started, 4)
+            }
+        
+        logger.info(f"🔄 重载 {file_path.name}：{report}")
+        for listener in list(self.reload_listeners):
+            try:
+                listener(name)
+            except Exception as e:
+                logger.warning(f"⚠️ 重载回调失败：{e}")
+        return report
+    
+    def _merge_reference(self, name: str, items: Dict[str, Any], hashes: Optional[Dict[str, bytes]] = None):
+        """
+        合并加载结果（技能 / 特性条目转为紧凑记录）
+        
+        Args:
+            name: 文件名称
+            items: 条目字典
+            hashes: 各条目原始代码的哈希（热重载基线；为空表示未知，下次重载全部重新解析）
+        """
+        compact_items(name, items)
+        if hashes:
+            self._entry_hashes[name] = hashes
+        else:
+            self._entry_hashes.pop(name, None)
+        if name == "moves":
+            self.moves_cache = items
+        elif name == "abilities":
+            self.abilities_cache = items
+        else:
+            self.reference_data[name] = items
+    
+    def get_move_records(self, force_reload: bool = False) -> Dict[str, Any]:
+        """
+        加载所有技能数据（紧凑记录，只读；模板库内部的索引基于此对象建立）
+        
+        Args:
+            force_reload: 是否强制重新加载
+        
+        Returns:
+            技能ID -> 技能记录
         """
         if self.moves_cache is not None and not force_reload:
             return self.moves_cache
         
-        moves_file = self.reference_dir / "moves.js"
+        moves_file = self.get_reference_file("moves")
         if not moves_file.exists():
             logger.error(f"❌ 技能文件不存在：{moves_file}")
             return {}
         
-        self.moves_cache = self.parse_showdown_js(moves_file)
+        self._load_reference_file("moves", moves_file)
         logger.info(f"✅ 已加载 {len(self.moves_cache)} 个技能模板")
         
         return self.moves_cache
     
-    def load_abilities(self, force_reload: bool = False) -> Dict[str, Any]:
+    def get_ability_records(self, force_reload: bool = False) -> Dict[str, Any]:
         """
-        加载所有特性数据
+        加载所有特性数据（紧凑记录，只读）
         
         Args:
             force_reload: 是否强制重新加载
-            
+        
         Returns:
-            特性数据字典
+            特性ID -> 特性记录
         """
         if self.abilities_cache is not None and not force_reload:
             return self.abilities_cache
         
-        abilities_file = self.reference_dir / "abilities.js"
+        abilities_file = self.get_reference_file("abilities")
         if not abilities_file.exists():
             logger.error(f"❌ 特性文件不存在：{abilities_file}")
             return {}
         
-        self.abilities_cache = self.parse_showdown_js(abilities_file)
+        self._load_reference_file("abilities", abilities_file)
         logger.info(f"✅ 已加载 {len(self.abilities_cache)} 个特性模板")
         
         return self.abilities_cache
     
+    def load_moves(self, force_reload: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        加载所有技能数据
+        
+        Args:
+            force_reload: 是否强制重新加载
+        
+        Returns:
+            技能数据字典（每次返回新的普通字典，可 JSON 序列化和修改）
+        """
+        return to_plain_items(self.get_move_records(force_reload))
+    
+    def load_abilities(self, force_reload: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        加载所有特性数据
+        
+        Args:
+            force_reload: 是否强制重新加载
+        
+        Returns:
+            特性数据字典（每次返回新的普通字典，可 JSON 序列化和修改）
+        """
+        return to_plain_items(self.get_ability_records(force_reload))
+    
+    def iter_reference_items(self, data_type: str):
+        """
+        逐条产出参考数据（用于RAG导入）
+        
+        技能/特性条目保留原始代码（source字段），超过 STREAM_THRESHOLD_BYTES 的
+        文件流式解析；宝可梦数据来自参考包中 species 目录下的 JSON 文件。
+        
+        Args:
+            data_type: 数据类型（move/ability/pokemon）
+        
+        Yields:
+            (条目ID, 条目数据)
+        """
+        if data_type == "pokemon":
+            yield from self._iter_species(self.get_reference_file("pokemon"))
+            return
+        
+        file_name = {"move": "moves", "ability": "abilities"}.get(data_type)
+        if file_name is None:
+            raise ValueError(f"未知的数据类型: {data_type}")
+        
+        file_path = self.get_reference_file(file_name)
+        if not file_path.exists():
+            logger.error(f"❌ 参考文件不存在：{file_path}")
+            return
+        
+        if file_path.stat().st_size > self.STREAM_THRESHOLD_BYTES:
+            yield from self.iter_showdown_js(file_path, keep_source=True)
+        else:
+            yield from self.parse_showdown_js(file_path, keep_source=True).items()
+    
+    def _iter_species(self, pack_dir: Path):
+        """遍历参考包中的 species JSON 文件"""
+        if not pack_dir.exists():
+            logger.error(f"❌ 宝可梦参考包不存在：{pack_dir}")
+            return
+        
+        for species_file in sorted(pack_dir.rglob("species/**/*.json")):
+            try:
+                data = json.loads(species_file.read_text(encoding='utf-8'))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.debug(f"  跳过文件 {species_file.name}：{e}")
+                continue
+            if isinstance(data, dict):
+                yield species_file.stem, data
+    
+    def get_move_index(self) -> MoveIndex:
+        """
+        技能二级索引（加载技能时建立，技能数据重新加载后自动重建）
+        
+        Returns:
+            技能索引
+        """
+        moves = self.get_move_records()
+        index = self._move_index
+        if index is None or index.moves is not moves:
+            index = MoveIndex(moves)
+            # 重载期间读到旧数据的查询不覆盖新索引
+            if self.moves_cache is moves:
+                self._move_index = index
+        return index
+    
+    def get_move_table(self) -> MoveTable:
+        """
+        技能列式视图（用于向量化过滤和统计，技能数据重新加载后自动重建）
+        
+        Returns:
+            技能列式表
+        """
+        moves = self.get_move_records()
+        table = self._move_table
+        if table is None or table.moves is not moves:
+            table = MoveTable(moves)
+            if self.moves_cache is moves:
+                self._move_table = table
+        return table
+    
+    def get_move_neighbors(self) -> Optional[MoveNeighbors]:
+        """
+        技能数值近邻索引（平衡参考，技能数据重新加载后自动重建）
+        
+        Returns:
+            近邻索引；技能文件不存在时返回 None
+        """
+        if self.moves_cache is None and not self.get_reference_file("moves").exists():
+            return None
+        moves = self.get_move_records()
+        neighbors = self._move_neighbors
+        if neighbors is None or neighbors.moves is not moves:
+            neighbors = MoveNeighbors(moves)
+            if self.moves_cache is moves:
+                self._move_neighbors = neighbors
+        return neighbors
+    
+    def get_handler_index(self, name: str = "abilities") -> Optional[HandlerIndex]:
+        """
+        事件处理器倒排索引（处理器 -> 特性 -> 代码区间，参考文件重新加载后自动重建）
+        
+        Args:
+            name: 文件名称（默认 abilities）
+        
+        Returns:
+            处理器索引；文件不存在时返回 None
+        """
+        file_path = self.get_reference_file(name)
+        if not file_path.is_file():
+            return None
+        if name == "abilities":
+            items = self.get_ability_records()
+        elif name == "moves":
+            items = self.get_move_records()
+        else:
+            items = self.load_reference(name)
+        cached = self._handler_indexes.get(name)
+        if cached is not None and cached[0] is items:
+            return cached[1]
+        
+        index = HandlerIndex(file_path.read_text(encoding='utf-8'))
+        self._handler_indexes[name] = (items, index)
+        logger.info(f"✅ 事件处理器索引：{file_path.name}（{len(index)}个条目，{len(index.postings)}种处理器）")
+        return index
+    
+    def _lang_files(self) -> List[Path]:
+        """语言文件：登记的 lang（目录或单个 JSON），否则为宝可梦参考包中的 lang 目录"""
+        lang_path = self.reference_files.get("lang")
+        if lang_path is not None:
+            if lang_path.is_dir():
+                return sorted(lang_path.glob("*.json"))
+            return [lang_path] if lang_path.is_file() else []
+        pack_dir = self.reference_files.get("pokemon")
+        if pack_dir is not None and pack_dir.is_dir():
+            return sorted(pack_dir.rglob("lang/*.json"))
+        return []
+    
+    def load_translations(self) -> Dict[Tuple[str, str], List[str]]:
+        """
+        语言文件中的技能 / 特性名称（cobblemon.move.<ID> / cobblemon.ability.<ID>）
+        
+        Returns:
+            (类型, ID) -> 各语言的名称
+        """
+        translations: Dict[Tuple[str, str], List[str]] = {}
+        for lang_file in self._lang_files():
+            try:
+                data = json.loads(lang_file.read_text(encoding='utf-8'))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.debug(f"  跳过语言文件 {lang_file.name}：{e}")
+                continue
+            if not isinstance(data, dict):
+                continue
+            for kind, item_id, name in iter_lang_names(data):
+                names = translations.setdefault((kind, item_id), [])
+                if name not in names:
+                    names.append(name)
+        return translations
+    
+    def get_name_index(self) -> NameIndex:
+        """
+        技能 / 特性名称索引（模糊解析与前缀补全，技能或特性重新加载后自动重建）
+        
+        语言文件只在建立索引时读取。
+        
+        Returns:
+            名称索引（技能、特性文件都不存在时为空索引）
+        """
+        moves = self.get_move_records() if self.moves_cache is not None or self.get_reference_file("moves").exists() else None
+        abilities = (
+            self.get_ability_records()
+            if self.abilities_cache is not None or self.get_reference_file("abilities").exists() else None
+        )
+        cached = self._name_index
+        if cached is not None and cached[0] is moves and cached[1] is abilities:
+            return cached[2]
+        
+        index = NameIndex.build(moves or {}, abilities or {}, self.load_translations())
+        if (moves is None or self.moves_cache is moves) and (abilities is None or self.abilities_cache is abilities):
+            self._name_index = (moves, abilities, index)
+        logger.info(f"✅ 名称索引：{len(index)}个技能/特性，{len(index.keys)}个名称")
+        return index
+    
+    def get_learnset_index(self) -> Optional[LearnsetIndex]:
+        """
+        学习表索引（技能或学习表重新加载后自动重建）
+        
+        学习表尚未加载且文件超过 STREAM_THRESHOLD_BYTES 时，索引直接从流式解析
+        逐条建立，不在内存中保留整个学习表。
+        
+        Returns:
+            学习表索引；learnsets 或 moves 不可用时返回 None
+        """
+        learnsets = self.reference_data.get("learnsets")
+        file_path = self.get_reference_file("learnsets")
+        if learnsets is None and not file_path.exists():
+            return None
+        moves = self.get_move_records()
+        if not moves:
+            return None
+        
+        index = self._learnset_index
+        if learnsets is None and file_path.stat().st_size > self.STREAM_THRESHOLD_BYTES:
+            stat = file_path.stat()
+            source = (str(file_path), stat.st_size, stat.st_mtime_ns)
+            if index is not None and index.moves is moves and self._learnset_source == source:
+                return index
+            try:
+                index = LearnsetIndex(moves, self.iter_showdown_js(file_path))
+            except ShowdownParseError as e:
+                logger.warning(f"⚠️ 学习表流式解析失败（{e}），改为整体加载")
+            else:
+                if self.moves_cache is moves:
+                    self._learnset_index, self._learnset_source = index, source
+                    logger.info(f"✅ 学习表索引：{index.species_count} 个物种，{len(index.learners)} 个技能")
+                return index
+        
+        learnsets = self.load_reference("learnsets") if learnsets is None else learnsets
+        if not learnsets:
+            return None
+        
+        if index is None or index.moves is not moves or index.learnsets is not learnsets:
+            index = LearnsetIndex(moves, learnsets)
+            if self.moves_cache is moves and self.reference_data.get("learnsets") is learnsets:
+                self._learnset_index, self._learnset_source = index, None
+                logger.info(f"✅ 学习表索引：{index.species_count} 个物种，{len(index.learners)} 个技能")
+        return index
+    
     def search_moves(
         self,
         type: Optional[str] = None,
@@ -248,7 +939,8 @@ class TemplateLibrary:
         power_max: int = 999,
         has_priority: Optional[bool] = None,
         has_secondary: Optional[bool] = None,
-        limit: int = 10
+        limit: int = 10,
+        flags: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         搜索技能模板
@@ -261,46 +953,82 @@ class TemplateLibrary:
             has_priority: 是否有优先度
             has_secondary: 是否有追加效果
             limit: 返回数量限制
-            
+            flags: 必须具备的标志（如 ["contact", "punch"]）
+        
         Returns:
             符合条件的技能列表
         """
-        moves = self.load_moves()
-        results = []
+        if flags:
+            # 标志位过滤走列式视图（一次向量化掩码）
+            table = self.get_move_table()
+            mask = table.mask(
+                type=type,
+                category=category,
+                power_min=power_min,
+                power_max=power_max,
+                has_priority=has_priority,
+                has_secondary=has_secondary,
+                flags=flags
+            )
+            return [{'id': move_id, **table.moves[move_id]} for move_id in table.ids[table.rows(mask, limit)]]
         
-        for move_id, move_data in moves.items():
-            # 过滤条件
-            if type and move_data.get('type') != type:
-                continue
-            
-            if category and move_data.get('category') != category:
-                continue
-            
-            power = move_data.get('basePower', 0)
-            if power < power_min or power > power_max:
-                continue
-            
-            if has_priority is not None:
-                move_priority = move_data.get('priority', 0)
-                if has_priority and move_priority == 0:
-                    continue
-                if not has_priority and move_priority != 0:
-                    continue
-            
-            if has_secondary is not None:
-                has_sec = 'secondary' in move_data and move_data['secondary'] is not None
-                if has_secondary != has_sec:
-                    continue
-            
-            results.append({
-                'id': move_id,
-                **move_data
-            })
-            
-            if len(results) >= limit:
-                break
+        index = self.get_move_index()
+        positions = index.query(
+            type=type,
+            category=category,
+            power_min=power_min,
+            power_max=power_max,
+            has_priority=has_priority,
+            has_secondary=has_secondary,
+            limit=limit
+        )
+        return [{'id': index.ids[position], **index.items[position]} for position in positions]
+    
+    def query_moves(
+        self,
+        type: Optional[str] = None,
+        category: Optional[str] = None,
+        power_min: float = 0,
+        power_max: float = 999,
+        has_priority: Optional[bool] = None,
+        has_secondary: Optional[bool] = None,
+        effect: Optional[str] = None,
+        flags: Optional[List[str]] = None,
+        sort: Optional[str] = None
+    ) -> Tuple[MoveTable, np.ndarray]:
+        """
+        完整的技能查询（query_templates 工具后端）：列式掩码过滤 + 效果索引 + 排序
+        
+        Args:
+            effect: 效果类型（见 MoveIndex.effect_positions）
+            sort: 排序列，前缀 "-" 表示降序（见 MoveTable.order）
+            其余参数同 search_moves
+        
+        Returns:
+            (技能列式表, 符合条件的行号（已排序）)
         
-        return results
+        Raises:
+            ValueError: 未知的效果类型或排序列
+        """
+        table = self.get_move_table()
+        mask = table.mask(
+            type=type,
+            category=category,
+            power_min=power_min,
+            power_max=power_max,
+            has_priority=has_priority,
+            has_secondary=has_secondary,
+            flags=flags
+        )
+        if effect:
+            index = self.get_move_index()
+            if index.moves is not table.moves:
+                # 重载间隙两者来自不同版本：按列式表的数据重建，保证行号一致
+                index = MoveIndex(table.moves)
+            effect_mask = np.zeros(len(table), dtype=bool)
+            effect_mask[index.effect_positions(effect)] = True
+            mask &= effect_mask
+        return table, table.order(mask, sort)
     
     def get_move_by_effect(self, effect_type: str) -> Optional[Dict[str, Any]]:
         """
@@ -308,43 +1036,46 @@ class TemplateLibrary:
         
         Args:
             effect_type: 效果类型（paralyze, burn, drain等）
-            
+        
         Returns:
-            参考技能数据
+            参考技能数据（普通字典）
         """
-        moves = self.load_moves()
-        
-        # 状态异常映射
-        status_map = {
-            'paralyze': 'par',
-            'burn': 'brn',
-            'poison': 'psn',
-            'sleep': 'slp',
-            'freeze': 'frz'
-        }
-        
-        # 搜索对应效果的技能
-        for move_id, move_data in moves.items():
-            secondary = move_data.get('secondary')
-            
-            if effect_type in status_map:
-                # 状态异常
-                target_status = status_map[effect_type]
-                if secondary and secondary.get('status') == target_status:
-                    return move_data
-            
-            elif effect_type == 'drain':
-                if 'drain' in move_data:
-                    return move_data
-            
-            elif effect_type == 'recoil':
-                if 'recoil' in move_data:
-                    return move_data
-            
-            elif effect_type.startswith('boost_') or effect_type.startswith('lower_'):
-                # 能力变化
-                if secondary and 'boosts' in secondary:
-                    return move_data
-        
-        return None
+        move = self.get_move_index().first_with_effect(effect_type)
+        return dict(move) if move is not None else None
+
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口：并行预加载所有参考文件并打印每个文件的耗时"""
+    import argparse
+    import yaml
+    
+    parser = argparse.ArgumentParser(description="并行预加载参考文件")
+    parser.add_argument("--names", nargs="+", help="要加载的文件名称（默认全部）")
+    parser.add_argument("--workers", type=int, help="进程数（默认CPU核数）")
+    parser.add_argument("--config", default=str(PROJECT_ROOT / "config.yaml"), help="配置文件路径")
+    args = parser.parse_args(argv)
+    
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    
+    started = time.perf_counter()
+    report = TemplateLibrary.from_config(config).preload(args.names, workers=args.workers)
+    total = time.perf_counter() - started
+    
+    print("\n" + "=" * 50)
+    print("  参考文件预加载")
+    print("=" * 50)
+    for name, entry in report.items():
+        if "error" in entry:
+            print(f"  {name:<12} ❌ {entry['error']}")
+        else:
+            print(f"  {name:<12} {entry['items']:>6} 项  {entry['seconds']:>8.3f}s  ({entry['source']})")
+    print("-" * 50)
+    print(f"  总耗时 {total:.3f}s")
+    print("=" * 50)
+    return 0
+
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+CobbleSeer - 技能 / 特性条目的紧凑表示
+
+解析结果原本是普通字典：每个条目一份键的哈希表，flags 又是一个独立字典，
+加载多个参考包（本体 + 模组）时内存增长明显。这里改为 __slots__ 记录：
+
+- 常用字段存在槽位中（没有逐条目的 __dict__ 和键哈希表）
+- type / category / target 等取值很少的字符串做 intern，所有条目共用同一对象
+- flags 打包成整数位掩码（标志名 -> 位 的登记表全局共享）
+- 其余字段（函数名、source 等）放在 extra 字典中，没有时为 None
+
+记录实现只读 Mapping 接口，原有的 get / [] / in / ** 展开写法不需要修改；
+需要真正的字典时（JSON 序列化、修改）用 to_dict() / to_plain_items()。
+TemplateLibrary 的公开加载接口（load_moves / load_abilities）返回普通字典。
+"""
+
+import sys
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# 标志名 <-> 位（进程内全局登记，只增不减）
+FLAG_NAMES: List[str] = []
+_FLAG_BITS: Dict[str, int] = {}
+_FLAG_LOCK = threading.Lock()
+
+
+def flag_bit(name: str) -> int:
+    """标志名对应的位（首次出现时登记）"""
+    bit = _FLAG_BITS.get(name)
+    if bit is None:
+        with _FLAG_LOCK:
+            bit = _FLAG_BITS.get(name)
+            if bit is None:
+                bit = 1 << len(FLAG_NAMES)
+                FLAG_NAMES.append(sys.intern(name))
+                _FLAG_BITS[name] = bit
+    return bit
+
+
+def pack_flags(flags: Dict[str, Any]) -> Optional[int]:
+    """flags 字典 -> 位掩码（存在非1取值时无法无损打包，返回 None）"""
+    mask = 0
+    for name, value in flags.items():
+        if value != 1 or isinstance(value, bool):
+            return None
+        mask |= flag_bit(name)
+    return mask
+
+
+def unpack_flags(mask: int) -> Dict[str, int]:
+    """位掩码 -> flags 字典"""
+    flags = {}
+    bit = 0
+    while mask:
+        if mask & 1:
+            flags[FLAG_NAMES[bit]] = 1
+        mask >>= 1
+        bit += 1
+    return flags
+
+
+# 槽位中表示“条目没有这个字段”（与显式的 None 区分，如 secondary: null）
+_ABSENT = object()
+
+
+class TemplateRecord(Mapping):
+    """紧凑条目基类（子类只需声明 FIELDS / INTERNED）"""
+    
+    __slots__ = ("_flags", "_extra")
+    
+    # 存在槽位中的字段（按此顺序迭代，flags 和 extra 字段随后）
+    FIELDS: Tuple[str, ...] = ()
+    # 取值重复率高、需要 intern 的字符串字段
+    INTERNED: frozenset = frozenset()
+    _FIELD_SET: frozenset = frozenset()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+    
+    def __init__(self, data: Dict[str, Any]):
+        extra = None
+        for key, value in data.items():
+            if key in self._FIELD_SET:
+                if key in self.INTERNED and isinstance(value, str):
+                    value = sys.intern(value)
+                object.__setattr__(self, key, value)
+            elif key != "flags":
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        for key in self.FIELDS:
+            if key not in data:
+                object.__setattr__(self, key, _ABSENT)
+        
+        flags = data.get("flags", _ABSENT)
+        if isinstance(flags, dict):
+            packed = pack_flags(flags)
+            flags = packed if packed is not None else flags
+        object.__setattr__(self, "_flags", flags)
+        object.__setattr__(self, "_extra", extra)
+    
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} 是只读记录，需要修改时使用 to_dict()")
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == "flags":
+            flags = self._flags
+            if flags is _ABSENT:
+                raise KeyError(key)
+            return unpack_flags(flags) if isinstance(flags, int) else flags
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            if value is _ABSENT:
+                raise KeyError(key)
+            return value
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        # Mapping.get 通过 KeyError 实现，热路径上直接判断更快
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            return default if value is _ABSENT else value
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __contains__(self, key: object) -> bool:
+        if key in self._FIELD_SET:
+            return getattr(self, key) is not _ABSENT
+        if key == "flags":
+            return self._flags is not _ABSENT
+        return self._extra is not None and key in self._extra
+    
+    def __iter__(self) -> Iterator[str]:
+        for key in self.FIELDS:
+            if getattr(self, key) is not _ABSENT:
+                yield key
+        if self._flags is not _ABSENT:
+            yield "flags"
+        if self._extra is not None:
+            yield from self._extra
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    @property
+    def flag_mask(self) -> int:
+        """flags 的位掩码（没有 flags 时为0；无法打包的 flags 现场计算）"""
+        flags = self._flags
+        if flags is _ABSENT:
+            return 0
+        if isinstance(flags, int):
+            return flags
+        return sum(flag_bit(name) for name, value in flags.items() if value)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转为普通字典（新对象，可修改）"""
+        return {key: self[key] for key in self}
+    
+    def __reduce__(self):
+        # 位掩码依赖进程内的标志登记顺序，序列化时还原为字典
+        return (type(self), (self.to_dict(),))
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class MoveRecord(TemplateRecord):
+    """技能条目"""
+    
+    FIELDS = (
+        "num", "name", "type", "category", "basePower", "accuracy", "pp", "priority",
+        "target", "secondary", "critRatio", "drain", "recoil", "contestType", "desc", "shortDesc",
+    )
+    INTERNED = frozenset({"type", "category", "target", "contestType"})
+    __slots__ = FIELDS
+
+
+class AbilityRecord(TemplateRecord):
+    """特性条目"""
+    
+    FIELDS = ("num", "name", "rating", "desc", "shortDesc", "isNonstandard")
+    INTERNED = frozenset({"isNonstandard"})
+    __slots__ = FIELDS
+
+
+# 参考文件名称 -> 记录类型（其余参考文件保持普通字典）
+RECORD_TYPES = {"moves": MoveRecord, "abilities": AbilityRecord}
+
+
+def compact_items(name: str, items: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将条目字典中的普通字典条目原地替换为紧凑记录
+    
+    Args:
+        name: 参考文件名称（只处理 moves / abilities）
+        items: 条目ID -> 条目
+    
+    Returns:
+        同一个 items 对象（引用不变，依赖对象身份的索引缓存仍然有效）
+    """
+    record_type = RECORD_TYPES.get(name)
+    if record_type is not None:
+        for item_id, item in items.items():
+            if isinstance(item, dict):
+                items[item_id] = record_type(item)
+    return items
+
+
+def compact_entries(name: str, entries: Iterable[Tuple[str, Any]]) -> Dict[str, Any]:
+    """
+    由逐条产出的 (条目ID, 条目) 建立条目字典，每个条目到达时立即转为紧凑记录
+    （流式解析时不保留中间的普通字典）
+    
+    Args:
+        name: 参考文件名称（moves / abilities 转为记录，其余保持原样）
+        entries: (条目ID, 条目) 迭代器
+    
+    Returns:
+        条目ID -> 条目
+    """
+    record_type = RECORD_TYPES.get(name)
+    items: Dict[str, Any] = {}
+    for item_id, item in entries:
+        items[item_id] = record_type(item) if record_type is not None and isinstance(item, dict) else item
+    return items
+
+
+def to_plain_items(items: Mapping) -> Dict[str, Any]:
+    """
+    条目字典 -> 新的普通字典（紧凑记录转为 dict，可 JSON 序列化和修改）
+    
+    Args:
+        items: 条目ID -> 条目（记录或字典）
+    
+    Returns:
+        条目ID -> 普通字典
+    """
+    return {
+        item_id: item.to_dict() if isinstance(item, TemplateRecord) else item
+        for item_id, item in items.items()
+    }
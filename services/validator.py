@@ -13,18 +13,25 @@ import json
 from pathlib import Path
 from loguru import logger
 
+from services.showdown_parser import ShowdownParseError, parse_showdown_source
+
 
 class Validator:
     """文件验证器"""
     
-    def __init__(self, config: dict):
+    # 威力超过数值相近的真实技能最高威力的比例时给出警告
+    POWER_TOLERANCE = 1.2
+    
+    def __init__(self, config: dict, template_library=None):
         """
         初始化验证器
         
         Args:
             config: 配置字典
+            template_library: 模板库（提供时对技能做数值平衡检查）
         """
         self.config = config
+        self.template_library = template_library
         self.strict_mode = config.get("validator", {}).get("strict_mode", True)
         
         logger.info(f"✅ Validator初始化完成（严格模式: {self.strict_mode}）")
@@ -190,10 +197,22 @@ class Validator:
                     break
             else:
                 errors.append(f"category应为: Physical/Special/Status")
-            
+        
         except Exception as e:
             errors.append(f"代码解析失败: {str(e)}")
         
+        # 数值平衡检查（只提示，检查本身出错也不影响有效性）
+        if not errors and self.template_library is not None:
+            try:
+                _, items = parse_showdown_source(f"exports.Moves = {{custom: {code}}};")
+                warnings.extend(self.validate_move_balance(items["custom"])["warnings"])
+            except (ShowdownParseError, KeyError, TypeError) as e:
+                logger.warning(f"⚠️ 技能代码无法解析，跳过数值平衡检查：{e}")
+                warnings.append(f"未进行数值平衡检查（代码无法解析：{e}）")
+            except Exception as e:
+                logger.warning(f"⚠️ 技能数值平衡检查失败：{e}")
+                warnings.append(f"未进行数值平衡检查（{e}）")
+        
         is_valid = len(errors) == 0
         
         logger.debug(f"Move代码验证: {'✅ 通过' if is_valid else '❌ 失败'}")
@@ -204,6 +223,43 @@ class Validator:
             "warnings": warnings
         }
     
+    def validate_move_balance(self, move: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        技能数值平衡检查
+        
+        在命中 / PP / 优先度 / 会心 / 吸取 / 反作用相近的同分类真实技能中比较威力，
+        并给出整体数值最接近的真实技能作为参考。
+        
+        Args:
+            move: 技能数据（Showdown 字段）
+        
+        Returns:
+            验证结果（附带 similar_moves）
+        """
+        warnings = []
+        similar = []
+        neighbors = self.template_library.get_move_neighbors() if self.template_library else None
+        
+        if neighbors:
+            category = move.get("category")
+            base_power = move.get("basePower", 0)
+            if category != "Status" and isinstance(base_power, (int, float)) and base_power > 0:
+                peers = neighbors.describe(neighbors.nearest(move, k=5, category=category, ignore=("basePower",)))
+                peer_powers = [peer["basePower"] for peer in peers if isinstance(peer["basePower"], (int, float))]
+                if peer_powers and base_power > max(peer_powers) * self.POWER_TOLERANCE:
+                    names = "、".join(peer["name"] for peer in peers[:3])
+                    warnings.append(
+                        f"威力{base_power}偏高：数值相近的真实技能（{names}等）最高威力为{max(peer_powers)}"
+                    )
+            similar = neighbors.describe(neighbors.nearest(move, k=3, type=move.get("type"), category=category))
+        
+        return {
+            "valid": True,
+            "errors": [],
+            "warnings": warnings,
+            "similar_moves": similar
+        }
+    
     def validate_all(self, files: Dict[str, Any]) -> Dict[str, Any]:
         """
         验证所有文件
@@ -0,0 +1,702 @@
+"""
+CobbleSeer - 向量存储后端
+
+RAGService 通过统一接口访问向量存储：
+- ChromaVectorStore: ChromaDB 持久化集合（默认）
+- NumpyVectorStore: 内存映射 float16 矩阵 + 元数据列，暴力检索
+
+参考库只有几千条技能/特性，NumPy 后端一次矩阵-向量乘积即可完成检索，
+无需 SQLite 和 HNSW 索引。查询结果统一为 Chroma 的返回格式。
+
+ShardedVectorStore 按数据类型（move/ability/pokemon）将数据分到独立的集合
+（<集合名>_<类型>），查询按 where 中的类型条件路由到单个分片，
+各类型的索引参数通过 rag.shards 单独配置。
+"""
+
+import json
+import os
+import shutil
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+
+# 默认数据目录
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+# 分片的数据类型
+SHARD_TYPES = ["move", "ability", "pokemon"]
+
+
+class VectorStore(ABC):
+    """向量存储接口"""
+    
+    backend = "base"
+    
+    @abstractmethod
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """写入文档（存在则覆盖）"""
+    
+    @abstractmethod
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[list]]:
+        """
+        批量向量检索
+        
+        Returns:
+            Chroma 格式结果：{"ids": [[...]], "documents": [[...]], "metadatas": [[...]], "distances": [[...]]}
+            外层列表与 query_embeddings 一一对应
+        """
+    
+    @abstractmethod
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, list]:
+        """
+        按ID或过滤条件读取文档
+        
+        Returns:
+            {"ids": [...], "documents": [...], "metadatas": [...]}，
+            include 含 "embeddings" 时附带向量
+        """
+    
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """按ID删除文档（不存在的ID忽略）"""
+    
+    @abstractmethod
+    def count(self) -> int:
+        """文档数量"""
+    
+    def flush(self):
+        """将缓冲的写入持久化（默认每次写入立即持久化，无需操作）"""
+    
+    def drop(self):
+        """删除整个集合（用于迁移后清理旧集合）"""
+        raise NotImplementedError(f"{self.backend}后端不支持删除集合")
+
+
+class ChromaVectorStore(VectorStore):
+    """ChromaDB 后端"""
+    
+    backend = "chroma"
+    
+    def __init__(self, collection_name: str, data_dir: Optional[Path] = None, hnsw: Optional[Dict[str, Any]] = None):
+        """
+        初始化ChromaDB集合
+        
+        Args:
+            collection_name: 集合名称
+            data_dir: 数据目录
+            hnsw: HNSW索引参数（space / M / construction_ef / search_ef）
+        """
+        import chromadb
+        from chromadb.config import Settings
+        
+        data_dir = data_dir or DATA_DIR / "chroma_db"
+        data_dir.mkdir(parents=True, exist_ok=True)
+        
+        self.client = chromadb.PersistentClient(
+            path=str(data_dir),
+            settings=Settings(anonymized_telemetry=False)
+        )
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            metadata={
+                "description": "Cobblemon reference data",
+                **{f"hnsw:{key}": value for key, value in (hnsw or {}).items()}
+            }
+        )
+        self.collection_name = collection_name
+        self.data_dir = data_dir
+    
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+    
+    def query(self, query_embeddings, n_results, where=None):
+        return self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where
+        )
+    
+    def get(self, ids=None, where=None, include=None):
+        return self.collection.get(ids=ids, where=where, include=include or ["documents", "metadatas"])
+    
+    def delete(self, ids):
+        if ids:
+            self.collection.delete(ids=ids)
+    
+    def count(self):
+        return self.collection.count()
+    
+    def drop(self):
+        self.client.delete_collection(self.collection_name)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    NumPy 内存向量索引
+    
+    磁盘布局（data/numpy_index/<集合名>/）：
+    - embeddings.npy: 归一化后的向量矩阵（默认 float16，np.load 内存映射）
+    - records.json: ids / documents / metadatas
+    
+    检索使用余弦距离（1 - 余弦相似度）。先按元数据列掩码取候选，再按
+    SCORE_CHUNK_ROWS 行分块将候选向量转为 float32 计算相似度（float16 矩阵
+    乘法没有BLAS加速；分块转换不在内存中保留整个矩阵的 float32 副本）。
+    
+    upsert 只修改内存中的索引，flush 时才整体写入磁盘（批量导入只写一次）；
+    元数据列在写入后标记为过期，下次读取时才重建。
+    """
+    
+    backend = "numpy"
+    
+    # 相似度分块计算的行数（每块的 float32 临时副本约为 行数 × 维度 × 4 字节）
+    SCORE_CHUNK_ROWS = 8192
+    
+    def __init__(self, collection_name: str, data_dir: Optional[Path] = None, dtype: str = "float16"):
+        """
+        加载（或创建）NumPy 索引
+        
+        Args:
+            collection_name: 集合名称
+            data_dir: 数据目录
+            dtype: 向量存储精度（float16 / float32）
+        """
+        self.path = (data_dir or DATA_DIR / "numpy_index") / collection_name
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dtype = np.dtype(dtype)
+        
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.matrix = np.zeros((0, 0), dtype=self.dtype)
+        self._dirty = False
+        self._load()
+    
+    # ---------- 持久化 ----------
+    
+    def _load(self):
+        """从磁盘加载索引（向量矩阵内存映射）"""
+        records_file = self.path / "records.json"
+        matrix_file = self.path / "embeddings.npy"
+        
+        if records_file.exists() and matrix_file.exists():
+            records = json.loads(records_file.read_text(encoding="utf-8"))
+            self.ids = records["ids"]
+            self.documents = records["documents"]
+            self.metadatas = records["metadatas"]
+            self.matrix = np.load(matrix_file, mmap_mode="r")
+            logger.debug(f"📂 加载NumPy索引：{len(self.ids)}条（{self.path}）")
+        
+        self._rebuild_positions()
+    
+    def _save(self):
+        """原子写入索引文件"""
+        matrix_tmp = self.path / "embeddings.tmp.npy"
+        records_tmp = self.path / "records.tmp.json"
+        
+        np.save(matrix_tmp, np.ascontiguousarray(self.matrix, dtype=self.dtype))
+        records_tmp.write_text(
+            json.dumps({"ids": self.ids, "documents": self.documents, "metadatas": self.metadatas}, ensure_ascii=False),
+            encoding="utf-8"
+        )
+        os.replace(matrix_tmp, self.path / "embeddings.npy")
+        os.replace(records_tmp, self.path / "records.json")
+        
+        self.matrix = np.load(self.path / "embeddings.npy", mmap_mode="r")
+        self._dirty = False
+    
+    def _rebuild_positions(self):
+        """重建ID映射，元数据列标记为过期"""
+        self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self._columns_stale = True
+    
+    def _ensure_columns(self):
+        """元数据列过期时重建（连续多次 upsert 只在下次读取时重建一次）"""
+        if self._columns_stale:
+            self._rebuild_columns()
+    
+    def _rebuild_columns(self):
+        """重建元数据列"""
+        self._columns: Dict[str, np.ndarray] = {}
+        self._columns_stale = False
+        
+        # type 列使用分类编码，常用的按数据类型过滤只需一次整数比较
+        self._type_vocab: Dict[str, int] = {}
+        codes = np.empty(len(self.metadatas), dtype=np.int16)
+        for i, metadata in enumerate(self.metadatas):
+            codes[i] = self._type_vocab.setdefault(metadata.get("type", ""), len(self._type_vocab))
+        self._type_codes = codes
+    
+    # ---------- 写入 ----------
+    
+    def upsert(self, ids, embeddings, documents, metadatas):
+        if not ids:
+            return
+        
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = (vectors / np.where(norms == 0, 1, norms)).astype(self.dtype)
+        
+        # 同一批中重复的ID以最后一次出现为准
+        rows = {doc_id: row for row, doc_id in enumerate(ids)}
+        updated = [(self._positions[doc_id], row) for doc_id, row in rows.items() if doc_id in self._positions]
+        added = [(doc_id, row) for doc_id, row in rows.items() if doc_id not in self._positions]
+        
+        # 先完成矩阵，再修改ID和文档列表（矩阵出错时索引保持不变）
+        matrix = self.matrix
+        if updated:
+            if not matrix.flags.writeable:
+                matrix = np.array(matrix, dtype=self.dtype)
+            matrix[[position for position, _ in updated]] = vectors[[row for _, row in updated]]
+        if added:
+            new_rows = vectors[[row for _, row in added]]
+            matrix = np.vstack([matrix, new_rows]) if len(self.ids) else new_rows
+        
+        for position, row in updated:
+            self.documents[position] = documents[row]
+            self.metadatas[position] = dict(metadatas[row])
+        for doc_id, row in added:
+            self._positions[doc_id] = len(self.ids)
+            self.ids.append(doc_id)
+            self.documents.append(documents[row])
+            self.metadatas.append(dict(metadatas[row]))
+        
+        self.matrix = matrix
+        self._dirty = True
+        self._columns_stale = True
+    
+    def delete(self, ids):
+        positions = [self._positions[doc_id] for doc_id in set(ids) if doc_id in self._positions]
+        if not positions:
+            return
+        
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[positions] = False
+        self.matrix = np.asarray(self.matrix)[keep]
+        self.ids = [doc_id for doc_id, kept in zip(self.ids, keep) if kept]
+        self.documents = [document for document, kept in zip(self.documents, keep) if kept]
+        self.metadatas = [metadata for metadata, kept in zip(self.metadatas, keep) if kept]
+        self._dirty = True
+        self._rebuild_positions()
+    
+    def flush(self):
+        if self._dirty:
+            self._save()
+    
+    # ---------- 读取 ----------
+    
+    def get(self, ids=None, where=None, include=None):
+        if ids is not None:
+            positions = [self._positions[i] for i in ids if i in self._positions]
+            if where:
+                mask = self._filter(where)
+                positions = [p for p in positions if mask[p]]
+        else:
+            positions = np.flatnonzero(self._filter(where)).tolist() if self.ids else []
+        
+        result = {
+            "ids": [self.ids[p] for p in positions],
+            "documents": [self.documents[p] for p in positions],
+            "metadatas": [self.metadatas[p] for p in positions]
+        }
+        if include and "embeddings" in include:
+            result["embeddings"] = np.asarray(self.matrix[positions], dtype=np.float32)
+        return result
+    
+    def count(self):
+        return len(self.ids)
+    
+    def drop(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.ids, self.documents, self.metadatas = [], [], []
+        self.matrix = np.zeros((0, 0), dtype=self.dtype)
+        self._dirty = False
+        self._rebuild_positions()
+    
+    def query(self, query_embeddings, n_results, where=None):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        
+        empty = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        candidates = np.flatnonzero(self._filter(where)) if len(self.ids) else np.array([], dtype=np.int64)
+        if candidates.size == 0:
+            for key in empty:
+                empty[key] = [[] for _ in range(len(queries))]
+            return empty
+        
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+        
+        # (候选数, 维度) @ (维度, 查询数) -> 每列为一个查询的相似度，按块转换精度
+        scores = np.empty((candidates.size, len(queries)), dtype=np.float32)
+        for start in range(0, candidates.size, self.SCORE_CHUNK_ROWS):
+            rows = candidates[start:start + self.SCORE_CHUNK_ROWS]
+            scores[start:start + rows.size] = np.asarray(self.matrix[rows], dtype=np.float32) @ queries.T
+        k = min(n_results, candidates.size)
+        
+        results = {key: [] for key in empty}
+        for column in range(scores.shape[1]):
+            column_scores = scores[:, column]
+            top = np.argpartition(-column_scores, k - 1)[:k] if k < candidates.size else np.arange(candidates.size)
+            top = top[np.argsort(-column_scores[top], kind="stable")]
+            positions = candidates[top]
+            results["ids"].append([self.ids[p] for p in positions])
+            results["documents"].append([self.documents[p] for p in positions])
+            results["metadatas"].append([self.metadatas[p] for p in positions])
+            results["distances"].append((1.0 - column_scores[top]).tolist())
+        
+        return results
+    
+    # ---------- 元数据过滤 ----------
+    
+    def _column(self, field: str) -> np.ndarray:
+        """元数据列（按需构建并缓存）"""
+        column = self._columns.get(field)
+        if column is None:
+            column = np.empty(len(self.metadatas), dtype=object)
+            column[:] = [metadata.get(field) for metadata in self.metadatas]
+            self._columns[field] = column
+        return column
+    
+    def _numeric_column(self, field: str) -> np.ndarray:
+        """数值元数据列（非数值为 NaN）"""
+        key = f"#{field}"
+        column = self._columns.get(key)
+        if column is None:
+            column = np.array([
+                value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+                for value in self._column(field)
+            ], dtype=np.float64)
+            self._columns[key] = column
+        return column
+    
+    def _filter(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """
+        计算 Chroma where 条件的布尔掩码
+        
+        支持：字段相等、$eq/$ne/$gt/$gte/$lt/$lte/$in/$nin、$and/$or
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+        if not where:
+            return mask
+        self._ensure_columns()
+        
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._filter(clause)
+            elif key == "$or":
+                any_mask = np.zeros(len(self.ids), dtype=bool)
+                for clause in condition:
+                    any_mask |= self._filter(clause)
+                mask &= any_mask
+            elif isinstance(condition, dict):
+                for op, value in condition.items():
+                    mask &= self._compare(key, op, value)
+            else:
+                mask &= self._compare(key, "$eq", condition)
+        
+        return mask
+    
+    def _compare(self, field: str, op: str, value: Any) -> np.ndarray:
+        """单个字段比较"""
+        if field == "type" and op == "$eq":
+            code = self._type_vocab.get(value)
+            return self._type_codes == code if code is not None else np.zeros(len(self.ids), dtype=bool)
+        
+        if op in ("$gt", "$gte", "$lt", "$lte"):
+            column = self._numeric_column(field)
+            with np.errstate(invalid="ignore"):
+                return {
+                    "$gt": column > value,
+                    "$gte": column >= value,
+                    "$lt": column < value,
+                    "$lte": column <= value
+                }[op]
+        
+        column = self._column(field)
+        if op == "$eq":
+            return np.array([v == value for v in column], dtype=bool)
+        if op == "$ne":
+            return np.array([v != value for v in column], dtype=bool)
+        if op == "$in":
+            return np.array([v in value for v in column], dtype=bool)
+        if op == "$nin":
+            return np.array([v not in value for v in column], dtype=bool)
+        
+        raise ValueError(f"不支持的过滤运算符: {op}")
+
+
+class ShardedVectorStore(VectorStore):
+    """
+    按数据类型分片的向量存储
+    
+    写入按元数据 type 分组到各分片；where 中含类型等值条件的检索只访问
+    对应分片（类型条件本身不再下推）；不含类型条件时检索全部分片后按距离合并。
+    """
+    
+    def __init__(self, shard_factory: Callable[[str], VectorStore], types: Optional[List[str]] = None):
+        """
+        创建分片
+        
+        Args:
+            shard_factory: 数据类型 -> 分片存储
+            types: 预先创建的分片类型（其余类型首次写入时创建）
+        """
+        self._shard_factory = shard_factory
+        self.shards: Dict[str, VectorStore] = {}
+        for data_type in types or SHARD_TYPES:
+            self.shard(data_type)
+        self.backend = next(iter(self.shards.values())).backend if self.shards else "sharded"
+    
+    def shard(self, data_type: str) -> VectorStore:
+        """获取（或创建）数据类型的分片"""
+        store = self.shards.get(data_type)
+        if store is None:
+            store = self._shard_factory(data_type)
+            self.shards[data_type] = store
+        return store
+    
+    def upsert(self, ids, embeddings, documents, metadatas):
+        groups: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            groups.setdefault((metadata or {}).get("type", ""), []).append(i)
+        
+        for data_type, rows in groups.items():
+            self.shard(data_type).upsert(
+                ids=[ids[i] for i in rows],
+                embeddings=[embeddings[i] for i in rows],
+                documents=[documents[i] for i in rows],
+                metadatas=[metadatas[i] for i in rows]
+            )
+    
+    def flush(self):
+        for store in self.shards.values():
+            store.flush()
+    
+    def query(self, query_embeddings, n_results, where=None):
+        data_type, rest = split_type_clause(where)
+        if data_type is not None:
+            if data_type not in self.shards:
+                return {key: [[] for _ in query_embeddings] for key in ("ids", "documents", "metadatas", "distances")}
+            return self.shards[data_type].query(query_embeddings=query_embeddings, n_results=n_results, where=rest)
+        
+        # 无类型条件：各分片分别检索，按距离合并
+        partials = [
+            store.query(query_embeddings=query_embeddings, n_results=n_results, where=where)
+            for store in self.shards.values() if store.count()
+        ]
+        merged = {key: [] for key in ("ids", "documents", "metadatas", "distances")}
+        for row in range(len(query_embeddings)):
+            hits = sorted(
+                (hit for partial in partials for hit in zip(
+                    partial["ids"][row], partial["documents"][row],
+                    partial["metadatas"][row], partial["distances"][row]
+                )),
+                key=lambda hit: hit[3]
+            )[:n_results]
+            for key, column in zip(merged, zip(*hits) if hits else ([], [], [], [])):
+                merged[key].append(list(column))
+        return merged
+    
+    def get(self, ids=None, where=None, include=None):
+        data_type, rest = split_type_clause(where)
+        stores = [self.shards[data_type]] if data_type in self.shards else ([] if data_type else list(self.shards.values()))
+        
+        merged: Dict[str, list] = {"ids": [], "documents": [], "metadatas": []}
+        embeddings = []
+        for store in stores:
+            partial = store.get(ids=ids, where=rest if data_type else where, include=include)
+            for key in merged:
+                merged[key].extend(partial.get(key) or [])
+            if include and "embeddings" in include and len(partial["ids"]):
+                embeddings.append(np.asarray(partial["embeddings"], dtype=np.float32))
+        
+        if include and "embeddings" in include:
+            merged["embeddings"] = np.concatenate(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+        return merged
+    
+    def delete(self, ids):
+        # ID 不含类型信息，交给每个分片（分片忽略不存在的ID）
+        for store in self.shards.values():
+            store.delete(ids)
+    
+    def count(self):
+        return sum(store.count() for store in self.shards.values())
+    
+    def counts(self) -> Dict[str, int]:
+        """各分片的文档数量"""
+        return {data_type: store.count() for data_type, store in self.shards.items()}
+    
+    def drop(self):
+        for store in self.shards.values():
+            store.drop()
+
+
+def split_type_clause(where: Optional[Dict[str, Any]]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    从 where 中取出数据类型等值条件
+    
+    Returns:
+        (数据类型, 剩余条件)；没有顶层类型等值条件时返回 (None, where)
+    """
+    def type_value(clause: Dict[str, Any]) -> Optional[str]:
+        value = clause.get("type")
+        if isinstance(value, dict):
+            value = value.get("$eq") if set(value) == {"$eq"} else None
+        return value if isinstance(value, str) else None
+    
+    if not where:
+        return None, where
+    
+    data_type = type_value(where)
+    if data_type is not None:
+        rest = {key: value for key, value in where.items() if key != "type"}
+        return data_type, rest or None
+    
+    if set(where) == {"$and"}:
+        clauses = where["$and"]
+        for i, clause in enumerate(clauses):
+            if set(clause) == {"type"} and type_value(clause) is not None:
+                rest = clauses[:i] + clauses[i + 1:]
+                return type_value(clause), (rest[0] if len(rest) == 1 else {"$and": rest}) if rest else None
+    
+    return None, where
+
+
+def shard_collection_name(collection_name: str, data_type: str) -> str:
+    """分片集合名称"""
+    return f"{collection_name}_{data_type}"
+
+
+def _resolve_data_dir(config: dict) -> Path:
+    data_dir = Path(config.get("rag", {}).get("data_dir", DATA_DIR))
+    if not data_dir.is_absolute():
+        data_dir = Path(__file__).parent.parent / data_dir
+    return data_dir
+
+
+def _shard_params(config: dict, collection_name: str) -> Dict[str, Any]:
+    """按集合名称查找分片的索引参数（rag.shards.<类型>）"""
+    rag_config = config.get("rag", {})
+    base = rag_config.get("collection_name", "cobblemon_reference")
+    for data_type, params in (rag_config.get("shards", {}) or {}).items():
+        if collection_name == shard_collection_name(base, data_type):
+            return params or {}
+    return {}
+
+
+def create_vector_store(config: dict, collection_name: str) -> VectorStore:
+    """
+    根据配置创建向量存储
+    
+    Args:
+        config: 配置字典（读取 rag.vector_store / rag.data_dir / rag.shards）
+        collection_name: 集合名称（分片集合自动应用对应类型的索引参数）
+    
+    Returns:
+        向量存储实例
+    """
+    backend = config.get("rag", {}).get("vector_store", "chroma")
+    data_dir = _resolve_data_dir(config)
+    params = _shard_params(config, collection_name)
+    
+    if backend == "numpy":
+        return NumpyVectorStore(collection_name, data_dir=data_dir / "numpy_index", dtype=params.get("dtype", "float16"))
+    if backend == "chroma":
+        return ChromaVectorStore(collection_name, data_dir=data_dir / "chroma_db", hnsw=params.get("hnsw"))
+    
+    raise ValueError(f"未知的向量存储后端: {backend}")
+
+
+def collection_exists(config: dict, collection_name: str) -> bool:
+    """集合是否已存在（不会创建集合）"""
+    backend = config.get("rag", {}).get("vector_store", "chroma")
+    data_dir = _resolve_data_dir(config)
+    
+    if backend == "numpy":
+        return (data_dir / "numpy_index" / collection_name / "records.json").exists()
+    if backend == "chroma":
+        if not (data_dir / "chroma_db").exists():
+            return False
+        import chromadb
+        from chromadb.config import Settings
+        
+        client = chromadb.PersistentClient(path=str(data_dir / "chroma_db"), settings=Settings(anonymized_telemetry=False))
+        # chromadb 0.6 起 list_collections 返回名称列表
+        return collection_name in [getattr(c, "name", c) for c in client.list_collections()]
+    return False
+
+
+def create_sharded_vector_store(
+    config: dict,
+    collection_name: str,
+    shard_factory: Optional[Callable[[str], VectorStore]] = None
+) -> ShardedVectorStore:
+    """
+    创建按类型分片的向量存储，并迁移旧的单集合数据
+    
+    Args:
+        config: 配置字典
+        collection_name: 基础集合名称（分片为 <集合名>_<类型>）
+        shard_factory: 分片集合名称 -> 向量存储（默认 create_vector_store）
+    
+    Returns:
+        分片向量存储
+    """
+    factory = shard_factory or (lambda name: create_vector_store(config, name))
+    store = ShardedVectorStore(lambda data_type: factory(shard_collection_name(collection_name, data_type)))
+    migrate_legacy_collection(config, collection_name, store)
+    return store
+
+
+def migrate_legacy_collection(config: dict, collection_name: str, store: ShardedVectorStore, batch_size: int = 500) -> int:
+    """
+    将旧的单集合数据迁移到分片中，迁移完成后删除旧集合
+    
+    Returns:
+        迁移的文档数量（没有旧集合时为 0）
+    """
+    if not collection_exists(config, collection_name):
+        return 0
+    
+    legacy = create_vector_store(config, collection_name)
+    records = legacy.get(include=["documents", "metadatas", "embeddings"])
+    total = len(records["ids"])
+    
+    if total:
+        logger.info(f"🔄 迁移单集合 {collection_name} 到按类型分片：{total}条...")
+        embeddings = records["embeddings"]
+        for start in range(0, total, batch_size):
+            end = start + batch_size
+            store.upsert(
+                ids=records["ids"][start:end],
+                embeddings=[list(map(float, vector)) for vector in embeddings[start:end]],
+                documents=records["documents"][start:end],
+                metadatas=records["metadatas"][start:end]
+            )
+        store.flush()
+    
+    legacy.drop()
+    logger.info(f"✅ 迁移完成：{store.counts()}")
+    return total
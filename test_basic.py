@@ -123,9 +123,10 @@ async def test_search_reference():
             limit=3
         )
         
-        print(f"✅ 成功搜索，找到 {len(result)} 个结果")
-        if result:
-            print(f"   示例：{result[0].get('name', 'Unknown')}")
+        items = result.get("results", [])
+        print(f"✅ 成功搜索，找到 {len(items)} 个结果（来源：{result.get('source')}）")
+        if items:
+            print(f"   示例：{items[0].get('name', 'Unknown')}")
         return True
             
     except Exception as e:
@@ -0,0 +1,76 @@
+"""测试资源包的并发写入"""
+import asyncio
+import json
+
+from services.build_plan import BuildPlan, FolderSink
+from services.builder import Builder
+
+
+DATA = {
+    "name": "voltpup",
+    "dex": 9997,
+    "primary_type": "Electric",
+    "stats": {"hp": 60, "attack": 70, "defence": 50, "special_attack": 80, "special_defence": 50, "speed": 90}
+}
+
+
+def make_builder(tmp_path, workers=4):
+    return Builder({"builder": {"output_dir": str(tmp_path), "write_workers": workers}})
+
+
+def test_package_files_and_size(tmp_path):
+    """所有文件写入正确位置，大小等于写入的字节数"""
+    builder = make_builder(tmp_path)
+    files = builder.build_all(DATA)
+    files["data/mega_showdown/moves/voltbite.js"] = "exports.Moves = {};\n"
+    result = builder.build_package("voltpack", files)
+    
+    root = tmp_path / "voltpack"
+    written = sorted(p.relative_to(root).as_posix() for p in root.rglob("*") if p.is_file())
+    assert written == [
+        "README.md",
+        "assets/cobblemon/bedrock/pokemon/animations/voltpup/voltpup.animation.json",
+        "assets/cobblemon/bedrock/pokemon/models/voltpup/voltpup.geo.json",
+        "assets/cobblemon/bedrock/pokemon/posers/voltpup.json",
+        "assets/cobblemon/bedrock/pokemon/resolvers/0_voltpup_base.json",
+        "assets/cobblemon/lang/en_us.json",
+        "assets/cobblemon/lang/zh_cn.json",
+        "assets/cobblemon/textures/pokemon/voltpup/README.txt",
+        "data/cobblemon/spawn_pool_world/voltpup.json",
+        "data/cobblemon/species/custom/voltpup.json",
+        "data/mega_showdown/moves/voltbite.js",
+        "pack.mcmeta",
+    ]
+    total = sum(p.stat().st_size for p in root.rglob("*") if p.is_file())
+    assert result["size_mb"] == round(total / (1024 * 1024), 2)
+    assert result["dependencies"] == ["Cobblemon", "Mega Showdown"]
+    
+    species = json.loads((root / "data/cobblemon/species/custom/voltpup.json").read_text(encoding="utf-8"))
+    assert species == files["species"]
+    assert (root / "data/mega_showdown/moves/voltbite.js").read_text(encoding="utf-8") == "exports.Moves = {};\n"
+
+
+def test_folder_sink_workers(tmp_path):
+    """单线程与多线程写入结果一致"""
+    plan = BuildPlan("pack", [
+        ("a/b/one.json", Builder._encode({"名称": "一"})),
+        ("a/two.txt", Builder._encode("二\n")),
+        ("c/three.txt", b"3"),
+    ])
+    for workers in (1, 4):
+        result = FolderSink(tmp_path, workers=workers).write(plan)
+        root = tmp_path / "pack"
+        assert result == {"output_path": str(root)}
+        assert (root / "a" / "two.txt").read_text(encoding="utf-8") == "二\n"
+        assert json.loads((root / "a" / "b" / "one.json").read_text(encoding="utf-8")) == {"名称": "一"}
+        assert (root / "c" / "three.txt").read_bytes() == b"3"
+
+
+def test_build_package_async(tmp_path):
+    """异步构建在工作线程中完成，结果与同步一致"""
+    builder = make_builder(tmp_path)
+    files = builder.build_all(DATA)
+    result = asyncio.run(builder.build_package_async("asyncpack", files))
+    assert result["success"]
+    assert (tmp_path / "asyncpack" / "pack.mcmeta").is_file()
+    assert result == builder.build_package("asyncpack", files)
@@ -0,0 +1,84 @@
+"""测试资源包构建计划与输出目标"""
+import zipfile
+
+import pytest
+
+from services.build_plan import BuildPlan, DiffSink, MemorySink, ZipSink, create_sink
+from services.builder import Builder
+
+
+DATA = {
+    "name": "tidefin",
+    "dex": 9996,
+    "primary_type": "Water",
+    "stats": {"hp": 70, "attack": 60, "defence": 65, "special_attack": 90, "special_defence": 70, "speed": 85}
+}
+
+
+def make_builder(tmp_path):
+    return Builder({"builder": {"output_dir": str(tmp_path)}})
+
+
+def test_plan_is_immutable_and_pure(tmp_path):
+    """生成计划不写磁盘；计划只读，路径必须在包内"""
+    builder = make_builder(tmp_path)
+    plan = builder.plan_package("tidepack", builder.build_all(DATA))
+    
+    assert list(tmp_path.iterdir()) == []
+    assert plan.name == "tidepack" and plan.dependencies == ("Cobblemon",)
+    assert "pack.mcmeta" in plan and "data/cobblemon/species/custom/tidefin.json" in plan
+    assert plan.total_size == sum(len(data) for _, data in plan)
+    assert plan.digest() == BuildPlan("other", reversed(list(plan))).digest()
+    
+    with pytest.raises(AttributeError):
+        plan.name = "changed"
+    with pytest.raises(TypeError):
+        plan.files["pack.mcmeta"] = b""
+    with pytest.raises(ValueError):
+        BuildPlan("bad", [("../escape.txt", b"")])
+
+
+def test_zip_and_memory_sinks(tmp_path):
+    """同一个计划交给多个输出目标，内容一致"""
+    builder = make_builder(tmp_path)
+    plan = builder.plan_package("tidepack", builder.build_all(DATA))
+    
+    memory = MemorySink()
+    result = builder.write_package(plan, memory)
+    assert result["format"] == "memory" and result["file_count"] == len(plan)
+    assert dict(memory.files) == dict(plan.files)
+    
+    result = builder.write_package(plan, ZipSink(tmp_path))
+    assert result["output_path"] == str(tmp_path / "tidepack.zip")
+    with zipfile.ZipFile(result["output_path"]) as archive:
+        assert sorted(archive.namelist()) == sorted(plan.files)
+        assert archive.read("pack.mcmeta") == plan.files["pack.mcmeta"]
+    assert not (tmp_path / "tidepack.zip.tmp").exists()
+    
+    # 旧接口：第三个参数为格式名称
+    assert builder.build_package("tidepack", builder.build_all(DATA), "zip")["format"] == "zip"
+    with pytest.raises(ValueError):
+        create_sink("tar", tmp_path)
+
+
+def test_diff_sink(tmp_path):
+    """与已有目录比较：新增 / 修改 / 未变 / 多余"""
+    builder = make_builder(tmp_path)
+    files = builder.build_all(DATA)
+    plan = builder.plan_package("tidepack", files)
+    
+    diff = builder.build_package("tidepack", files, "diff")["diff"]
+    assert diff["added"] == sorted(plan.files) and diff["removed"] == []
+    
+    builder.write_package(plan, create_sink("folder", tmp_path))
+    root = tmp_path / "tidepack"
+    (root / "pack.mcmeta").write_text("{}", encoding="utf-8")
+    (root / "stale.json").write_text("{}", encoding="utf-8")
+    
+    diff = builder.write_package(plan, DiffSink(tmp_path))["diff"]
+    assert diff["added"] == []
+    assert diff["changed"] == ["pack.mcmeta"]
+    assert diff["removed"] == ["stale.json"]
+    assert len(diff["unchanged"]) == len(plan) - 1
+    # 比较不写入
+    assert (root / "pack.mcmeta").read_text(encoding="utf-8") == "{}"
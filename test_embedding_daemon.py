@@ -0,0 +1,70 @@
+"""测试共享嵌入守护进程"""
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from services.embedding_daemon import EmbeddingDaemon, pack_array, unpack_array
+from services.rag_service import RAGService
+
+
+class CountingEmbeddingModel:
+    """按关键词计数生成向量，并记录调用次数"""
+    
+    KEYWORDS = ["fire", "water", "burn", "wave"]
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def encode(self, texts):
+        self.calls += 1
+        return np.array([[text.lower().count(word) for word in self.KEYWORDS] for text in texts], dtype=np.float32)
+
+
+def test_pack_array_roundtrip():
+    vectors = np.random.default_rng(0).standard_normal((3, 5)).astype(np.float32)
+    assert np.array_equal(unpack_array(pack_array(vectors)), vectors)
+    assert pack_array(None) is None
+
+
+def test_rag_service_shares_daemon_and_falls_back(tmp_path):
+    # Unix socket 路径长度有限，使用短路径
+    socket_dir = Path(tempfile.mkdtemp(prefix="cs"))
+    config = {"rag": {
+        "vector_store": "numpy",
+        "data_dir": str(tmp_path),
+        "daemon": {"enabled": True, "socket": str(socket_dir / "e.sock"), "timeout": 5}
+    }}
+    
+    model = CountingEmbeddingModel()
+    server = EmbeddingDaemon(config, embedding_model=model).create_server(socket_dir / "e.sock")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    try:
+        first = RAGService(config)
+        second = RAGService(config)
+        assert first.daemon_client is not None
+        assert first.store.backend == "daemon:numpy"
+        
+        first.index_reference_data("move", [
+            {"name": "Ember", "content": "Ember Fire Special burn", "move_type": "Fire", "basePower": 40},
+            {"name": "Surf", "content": "Surf Water Special wave", "move_type": "Water", "basePower": 90},
+        ])
+        
+        # 第二个实例通过守护进程看到第一个实例写入的数据
+        moves = asyncio.run(second.search_moves("water wave", top_k=1))
+        assert [m["name"] for m in moves] == ["Surf"]
+        assert model.calls == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    # 守护进程停止（已有连接一并断开）后回退为进程内模式
+    second.daemon_client.close()
+    second.embedding_model._local_factory = CountingEmbeddingModel
+    moves = asyncio.run(second.search_moves("fire burn", top_k=1))
+    assert [m["name"] for m in moves] == ["Ember"]
+    assert second.store.shards["move"]._local is not None
@@ -0,0 +1,57 @@
+"""测试嵌入模型后端"""
+import numpy as np
+import pytest
+
+from services.embeddings import DEFAULT_MODEL, OnnxEmbeddingModel, mean_pool
+from services.template_library import resolve_project_path
+
+
+# export_onnx_model.py 的默认输出目录
+ONNX_MODEL_DIR = resolve_project_path("data/onnx/all-MiniLM-L6-v2")
+
+# int8 量化模型与 sentence-transformers 向量的最低余弦相似度
+PARITY_THRESHOLD = 0.98
+
+
+def test_mean_pool_ignores_padding_and_normalizes():
+    token_embeddings = np.array([
+        [[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]],
+        [[0.0, 2.0], [0.0, 2.0], [0.0, 2.0]],
+    ], dtype=np.float32)
+    attention_mask = np.array([[1, 1, 0], [1, 1, 1]])
+    
+    pooled = mean_pool(token_embeddings, attention_mask)
+    
+    assert pooled.dtype == np.float32
+    assert np.allclose(pooled, [[1.0, 0.0], [0.0, 1.0]])
+
+
+def test_onnx_int8_matches_sentence_transformers():
+    """int8 量化的 ONNX 模型与 sentence-transformers 的向量基本一致（未导出模型时跳过）"""
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    sentence_transformers = pytest.importorskip("sentence_transformers")
+    if not (ONNX_MODEL_DIR / "model_int8.onnx").exists():
+        pytest.skip(f"未导出 ONNX int8 模型：{ONNX_MODEL_DIR}（运行 export_onnx_model.py）")
+    
+    sentences = [
+        "强力火系物理攻击，威力90，命中100，PP15",
+        "A special Water move that may lower the target's Speed.",
+        "Raises the user's Attack by 2 stages.",
+        "每回合结束时回复最大HP的1/16",
+    ]
+    onnx_model = OnnxEmbeddingModel(ONNX_MODEL_DIR)
+    assert onnx_model.model_file.name == "model_int8.onnx"
+    try:
+        reference_model = sentence_transformers.SentenceTransformer(DEFAULT_MODEL)
+    except OSError as e:
+        pytest.skip(f"sentence-transformers 模型不可用：{e}")
+    
+    onnx_vectors = np.asarray(onnx_model.encode(sentences), dtype=np.float32)
+    reference_vectors = np.asarray(reference_model.encode(sentences, normalize_embeddings=True), dtype=np.float32)
+    
+    assert onnx_vectors.shape == reference_vectors.shape
+    cosine = np.sum(onnx_vectors * reference_vectors, axis=1) / (
+        np.linalg.norm(onnx_vectors, axis=1) * np.linalg.norm(reference_vectors, axis=1)
+    )
+    assert np.all(cosine >= PARITY_THRESHOLD), cosine
@@ -0,0 +1,123 @@
+"""测试特性事件处理器倒排索引"""
+from services.ai_generator import AIGenerator
+from services.handler_index import HandlerIndex, handlers_for
+from services.template_library import TemplateLibrary
+
+
+ABILITIES_JS = """export const Abilities = {
+	hugepower: {
+		onModifyAtkPriority: 5,
+		onModifyAtk(atk) {
+			return this.chainModify(2);
+		},
+		flags: {},
+		name: "Huge Power",
+		rating: 5,
+		num: 37,
+	},
+	roughskin: {
+		onDamagingHitOrder: 1,
+		onDamagingHit(damage, target, source, move) {
+			if (this.checkMoveMakesContact(move, source, target, true)) {
+				this.damage(source.baseMaxhp / 8, source, target);
+			}
+		},
+		flags: {},
+		name: "Rough Skin",
+		rating: 2.5,
+		num: 24,
+	},
+	static: {
+		onDamagingHit: function (damage, target, source, move) {
+			if (this.checkMoveMakesContact(move, source, target)) {
+				if (this.randomChance(3, 10)) source.trySetStatus('par', target);
+			}
+		},
+		flags: {},
+		name: "Static",
+		rating: 2,
+		num: 9,
+	},
+	drizzle: {
+		onStart(source) {
+			this.field.setWeather('raindance');
+		},
+		flags: {},
+		name: "Drizzle",
+		rating: 4,
+		num: 2,
+	},
+	illuminate: {
+		flags: {},
+		name: "Illuminate",
+		rating: 0,
+		num: 35,
+	},
+};
+"""
+
+
+def make_library(tmp_path):
+    (tmp_path / "abilities.js").write_text(ABILITIES_JS, encoding="utf-8")
+    return TemplateLibrary(str(tmp_path))
+
+
+def test_index_postings_and_snippets():
+    """处理器区间覆盖方法简写与 key: function 两种写法，纯数据条目不入索引"""
+    index = HandlerIndex(ABILITIES_JS)
+    
+    assert len(index) == 4
+    assert "illuminate" not in index.by_item
+    assert sorted(index.items_with("onDamagingHit")) == ["roughskin", "static"]
+    assert index.handler_counts()["onDamagingHit"] == 2
+    # 数值字段（onModifyAtkPriority）不是处理器
+    assert "onModifyAtkPriority" not in index.postings
+    
+    code = index.snippet("hugepower", "onModifyAtk")
+    assert code.startswith("onModifyAtk(atk) {") and code.endswith("}")
+    assert "chainModify(2)" in code
+    code = index.snippet("static", "onDamagingHit")
+    assert code.startswith("onDamagingHit: function") and code.endswith("}")
+    assert index.snippet("static", "onStart") is None
+
+
+def test_snippets_for_description():
+    """中英文关键词映射到处理器并取出对应代码"""
+    assert handlers_for("接触时使对手麻痹") == ["onDamagingHit", "onSetStatus"]
+    assert handlers_for("Boosts ATTACK when it enters") == ["onModifyAtk", "onSourceModifyAtk", "onStart"]
+    assert handlers_for("没有关键词") == []
+    # 描述技能自身属性的 "type" 不对应属性变化处理器
+    assert "onModifyType" not in handlers_for("Fire-type physical move, 90 power, may burn; type: Fire")
+    assert handlers_for("Changes the type of normal moves to Fire") == ["onModifyType"]
+    assert handlers_for("Normal moves become Fire; the user's type becomes Fire") == ["onModifyType"]
+    
+    index = HandlerIndex(ABILITIES_JS)
+    snippets = index.snippets_for("出场时下雨")
+    assert [(s["item"], s["handler"]) for s in snippets] == [("drizzle", "onStart")]
+    assert "setWeather('raindance')" in snippets[0]["code"]
+    
+    snippets = index.snippets_for("被接触时反伤", per_handler=1, exclude=["roughskin"])
+    assert [s["item"] for s in snippets] == ["static"]
+    assert index.snippets_for("接触", max_chars=10) == []
+
+
+def test_library_cache_and_prompt(tmp_path):
+    """索引随参考数据重载重建，特性提示词带上真实代码片段"""
+    library = make_library(tmp_path)
+    index = library.get_handler_index()
+    assert index is library.get_handler_index()
+    
+    (tmp_path / "abilities.js").write_text(ABILITIES_JS.replace("hugepower", "purepower"), encoding="utf-8")
+    library.refresh_reference("abilities")
+    rebuilt = library.get_handler_index()
+    assert rebuilt is not index
+    assert "purepower" in rebuilt.by_item
+    
+    assert TemplateLibrary(str(tmp_path / "missing")).get_handler_index() is None
+    
+    generator = AIGenerator({"ai": {"mode": "cloud"}}, template_library=library)
+    references = [{"content": "特性: Rough Skin\n描述: 受到接触攻击时反伤\n完整说明……"}]
+    prompt = generator._build_ability_prompt("受到接触攻击时使对手灼伤", references)
+    assert "相关事件处理器" in prompt
+    assert "checkMoveMakesContact" in prompt
+    assert "完整说明" not in prompt
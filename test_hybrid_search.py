@@ -0,0 +1,106 @@
+"""测试混合检索（结构化过滤 + BM25 + RRF）"""
+import asyncio
+
+import numpy as np
+
+from services.hybrid_search import (
+    BM25Index,
+    build_where,
+    parse_query_filters,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+from services.rag_service import RAGService
+
+
+class FakeEmbeddingModel:
+    """词袋哈希向量（测试用）"""
+    
+    def encode(self, texts):
+        single = isinstance(texts, str)
+        vectors = []
+        for text in [texts] if single else texts:
+            vector = np.zeros(32, dtype=np.float32)
+            for token in tokenize(text):
+                vector[hash(token) % 32] += 1.0
+            vectors.append(vector)
+        return vectors[0] if single else np.array(vectors)
+
+
+def test_parse_query_filters():
+    assert parse_query_filters("火系物理 威力90") == {
+        "move_type": "Fire", "category": "Physical", "power_min": 80, "power_max": 100
+    }
+    assert parse_query_filters("special water-type move, power 60-80") == {
+        "move_type": "Water", "category": "Special", "power_min": 60, "power_max": 80
+    }
+    assert parse_query_filters("威力120以上的龙系技能") == {"move_type": "Dragon", "power_min": 120}
+    # "剧毒"不带"系/属性"后缀，不视为属性
+    assert parse_query_filters("使对手陷入剧毒状态") == {}
+
+
+def test_build_where():
+    assert build_where("ability", {}) == {"type": "ability"}
+    assert build_where("move", {"move_type": "Fire", "power_min": 80}) == {
+        "$and": [{"type": "move"}, {"move_type": "Fire"}, {"basePower": {"$gte": 80}}]
+    }
+
+
+def test_bm25_and_rrf():
+    index = BM25Index(
+        ["a", "b", "c"],
+        ["Flamethrower Fire Special 威力90", "Surf Water Special 威力90", "Ember Fire Special 威力40"],
+        [{"move_type": "Fire"}, {"move_type": "Water"}, {"move_type": "Fire"}]
+    )
+    ranked = index.search("fire 威力90", top_k=3)
+    assert index.ids[ranked[0][0]] == "a"
+    
+    filtered = index.search("威力90", top_k=3, allowed=lambda md: md["move_type"] == "Water")
+    assert [index.ids[p] for p, _ in filtered] == ["b"]
+    
+    fused = reciprocal_rank_fusion([["a", "b"], ["b", "c"]])
+    assert fused[0][0] == "b"
+
+
+def test_search_moves_uses_structured_prefilter(tmp_path):
+    rag = RAGService({"rag": {"vector_store": "numpy", "data_dir": str(tmp_path)}})
+    rag.embedding_model = FakeEmbeddingModel()
+    rag.index_reference_data("move", [
+        {"name": "Flamethrower", "content": "Flamethrower Fire Special burn", "move_type": "Fire", "category": "Special", "basePower": 90},
+        {"name": "Fire Punch", "content": "Fire Punch Fire Physical burn", "move_type": "Fire", "category": "Physical", "basePower": 75},
+        {"name": "Flare Blitz", "content": "Flare Blitz Fire Physical recoil", "move_type": "Fire", "category": "Physical", "basePower": 120},
+        {"name": "Waterfall", "content": "Waterfall Water Physical flinch", "move_type": "Water", "category": "Physical", "basePower": 80},
+    ])
+    
+    moves = asyncio.run(rag.search_moves("火系物理 威力80", top_k=3))
+    print(f"检索结果：{[m['name'] for m in moves]}")
+    assert [m["name"] for m in moves] == ["Fire Punch"]
+    
+    # 过滤条件无结果时放宽为只按类型过滤
+    moves = asyncio.run(rag.search_moves("冰系特殊 威力200", top_k=2))
+    assert len(moves) == 2
+
+
+def test_search_moves_batch_encodes_once(tmp_path):
+    rag = RAGService({"rag": {"vector_store": "numpy", "data_dir": str(tmp_path)}})
+    rag.embedding_model = FakeEmbeddingModel()
+    rag.index_reference_data("move", [
+        {"name": "Ember", "content": "Ember Fire Special burn", "move_type": "Fire", "category": "Special", "basePower": 40},
+        {"name": "Surf", "content": "Surf Water Special wave", "move_type": "Water", "category": "Special", "basePower": 90},
+    ])
+    
+    encode_calls = []
+    query_calls = []
+    encode = rag.embedding_model.encode
+    query = rag.store.query
+    rag.embedding_model.encode = lambda texts: encode_calls.append(texts) or encode(texts)
+    rag.store.query = lambda **kwargs: query_calls.append(kwargs) or query(**kwargs)
+    
+    queries = ["Surf wave", "Ember burn", "Surf", "Ember"]
+    results = asyncio.run(rag.search_moves_batch(queries, top_k=1))
+    
+    assert [r[0]["name"] for r in results] == ["Surf", "Ember", "Surf", "Ember"]
+    assert len(encode_calls) == 1
+    # 过滤条件相同的查询合并为一次多向量检索
+    assert len(query_calls) == 1
+    assert len(query_calls[0]["query_embeddings"]) == 4
@@ -0,0 +1,190 @@
+"""测试参考库导入流程"""
+from pathlib import Path
+
+from services.ingest import ReferenceIngestor, build_document
+from services.template_library import TemplateLibrary
+
+
+SAMPLE_MOVES = '''const Moves = {
+  flamethrower: {
+    num: 53,
+    accuracy: 100,
+    basePower: 90,
+    category: "Special",
+    name: "Flamethrower",
+    pp: 15,
+    priority: 0,
+    flags: {protect: 1, mirror: 1, metronome: 1},
+    secondary: {
+      chance: 10,
+      status: "brn"
+    },
+    target: "normal",
+    type: "Fire"
+  },
+  quickattack: {
+    num: 98,
+    accuracy: 100,
+    basePower: 40,
+    category: "Physical",
+    name: "Quick Attack",
+    pp: 30,
+    priority: 1,
+    flags: {contact: 1, protect: 1, mirror: 1, metronome: 1},
+    secondary: null,
+    target: "normal",
+    type: "Normal"
+  }
+};
+'''
+
+SAMPLE_ABILITIES = '''const Abilities = {
+  blaze: {
+    onModifyAtkPriority: 5,
+    onModifyAtk(atk, attacker, defender, move) {
+      if (move.type === "Fire" && attacker.hp <= attacker.maxhp / 3) {
+        return this.chainModify(1.5);
+      }
+    },
+    flags: {},
+    name: "Blaze",
+    rating: 2,
+    num: 66
+  }
+};
+'''
+
+
+class FakeEmbeddingModel:
+    """按文本长度生成固定向量"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def encode(self, texts):
+        import numpy as np
+        self.calls += 1
+        return np.array([[float(len(t)), 1.0, 0.0] for t in texts])
+
+
+class FakeRAGService:
+    """内存版RAG服务"""
+    
+    def __init__(self):
+        self.enabled = True
+        self.embedding_model = FakeEmbeddingModel()
+        self.store = {}
+        self.flushes = 0
+    
+    def upsert_embeddings(self, ids, embeddings, documents, metadatas):
+        for doc_id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas):
+            self.store[doc_id] = (embedding, document, metadata)
+    
+    def get_document_ids(self, data_type):
+        return [doc_id for doc_id, (_, _, metadata) in self.store.items() if metadata["type"] == data_type]
+    
+    def delete_documents(self, ids):
+        for doc_id in ids:
+            del self.store[doc_id]
+    
+    def flush(self):
+        self.flushes += 1
+    
+    def get_content_hashes(self, ids):
+        return {i: self.store[i][2]["content_hash"] for i in ids if i in self.store}
+
+
+def make_library(tmp_path: Path) -> TemplateLibrary:
+    (tmp_path / "moves.js").write_text(SAMPLE_MOVES, encoding="utf-8")
+    (tmp_path / "abilities.js").write_text(SAMPLE_ABILITIES, encoding="utf-8")
+    return TemplateLibrary(str(tmp_path))
+
+
+def test_build_document_keeps_structured_fields(tmp_path):
+    library = make_library(tmp_path)
+    items = dict(library.iter_reference_items("move"))
+    
+    document, metadata = build_document("move", "flamethrower", items["flamethrower"])
+    
+    assert metadata["type"] == "move"
+    assert metadata["move_type"] == "Fire"
+    assert metadata["category"] == "Special"
+    assert metadata["basePower"] == 90
+    assert "Flamethrower" in document
+    assert 'status: "brn"' in document
+
+
+def test_ingest_is_incremental(tmp_path):
+    library = make_library(tmp_path)
+    rag = FakeRAGService()
+    ingestor = ReferenceIngestor({"rag": {}}, rag, template_library=library)
+    
+    report = ingestor.run(types=["move", "ability"], workers=1, batch_size=2)
+    print(f"首次导入：{report}")
+    assert report["parsed"] == {"move": 2, "ability": 1}
+    assert report["indexed"] == 3
+    assert set(report["timings"]) == {"parse", "build", "embed", "index", "total"}
+    assert "ability_blaze" in rag.store
+    assert rag.flushes == 1
+    
+    # 未变化的条目不会重新嵌入
+    calls = rag.embedding_model.calls
+    report = ingestor.run(types=["move", "ability"], workers=1)
+    assert report["indexed"] == 0
+    assert report["skipped"] == 3
+    assert rag.embedding_model.calls == calls
+    
+    # 强制模式重新索引全部
+    report = ingestor.run(types=["move"], force=True, workers=1)
+    assert report["indexed"] == 2
+
+
+def test_ingest_removes_stale_entries(tmp_path):
+    """参考库中已删除的条目从索引中移除；参考文件缺失时不清空索引"""
+    library = make_library(tmp_path)
+    rag = FakeRAGService()
+    ingestor = ReferenceIngestor({"rag": {}}, rag, template_library=library)
+    assert ingestor.run(types=["move", "ability"], workers=1)["removed"] == 0
+    
+    (tmp_path / "moves.js").write_text(SAMPLE_MOVES.replace("quickattack", "quickattack2"), encoding="utf-8")
+    library.moves_cache = None
+    report = ingestor.run(types=["move", "ability"], workers=1)
+    assert (report["indexed"], report["removed"]) == (1, 1)
+    assert "move_quickattack2" in rag.store and "move_quickattack" not in rag.store
+    assert "ability_blaze" in rag.store
+    
+    (tmp_path / "abilities.js").unlink()
+    assert ingestor.run(types=["ability"], workers=1)["removed"] == 0
+    assert "ability_blaze" in rag.store
+
+
+def test_ingest_streams_entries_into_batches(tmp_path):
+    """条目逐条解析后即分批嵌入写入，不先收集全部文档"""
+    library = make_library(tmp_path)
+    rag = FakeRAGService()
+    events = []
+    
+    iter_items = library.iter_reference_items
+    
+    def traced_items(data_type):
+        for item_id, item in iter_items(data_type):
+            events.append(("parse", item_id))
+            yield item_id, item
+    
+    encode = rag.embedding_model.encode
+    
+    def traced_encode(texts):
+        events.append(("embed", len(texts)))
+        return encode(texts)
+    
+    library.iter_reference_items = traced_items
+    rag.embedding_model.encode = traced_encode
+    
+    report = ReferenceIngestor({"rag": {}}, rag, template_library=library).run(
+        types=["move", "ability"], force=True, workers=1, batch_size=1
+    )
+    assert report["batches"] == 3
+    kinds = [kind for kind, _ in events]
+    assert kinds.count("embed") == 3
+    # 第一批嵌入发生在最后一个条目解析之前
+    assert kinds.index("embed") < len(kinds) - 1 - kinds[::-1].index("parse")
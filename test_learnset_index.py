@@ -0,0 +1,124 @@
+"""测试基于学习表的技能表生成"""
+from services.builder import Builder
+from services.learnset_index import LearnsetIndex, power_tier
+from services.template_library import TemplateLibrary
+
+
+MOVES_JS = """export const Moves = {
+	tackle: {num: 33, basePower: 40, category: "Physical", type: "Normal"},
+	growl: {num: 45, basePower: 0, category: "Status", type: "Normal"},
+	protect: {num: 182, basePower: 0, category: "Status", type: "Normal"},
+	ember: {num: 52, basePower: 40, category: "Special", type: "Fire"},
+	flamethrower: {num: 53, basePower: 90, category: "Special", type: "Fire"},
+	firefang: {num: 424, basePower: 65, category: "Physical", type: "Fire"},
+	overheat: {num: 315, basePower: 130, category: "Special", type: "Fire"},
+	willowisp: {num: 261, basePower: 0, category: "Status", type: "Fire"},
+	gust: {num: 16, basePower: 40, category: "Special", type: "Flying"},
+	airslash: {num: 403, basePower: 75, category: "Special", type: "Flying"},
+	tenmillionvoltthunderbolt: {num: 719, basePower: 195, category: "Special", type: "Electric", isZ: "pikaniumz"},
+};
+"""
+
+LEARNSETS_JS = """export const Learnsets = {
+	charmander: {
+		learnset: {
+			tackle: ["9L1", "8L1"],
+			growl: ["9L1"],
+			ember: ["9L4", "8L4", "7L7"],
+			firefang: ["9L17"],
+			flamethrower: ["9M", "9L24", "8L30"],
+			overheat: ["9M"],
+			willowisp: ["9L28", "8E"],
+			protect: ["9M"],
+		},
+	},
+	vulpix: {
+		learnset: {
+			tackle: ["9L1"],
+			ember: ["9L8"],
+			flamethrower: ["9L40"],
+			overheat: ["9M", "9L52"],
+			willowisp: ["9L24"],
+			protect: ["9M"],
+			tenmillionvoltthunderbolt: ["7S0"],
+		},
+	},
+	pidgey: {
+		learnset: {
+			tackle: ["9L1"],
+			gust: ["9L9"],
+			airslash: ["9L33", "8E"],
+			protect: ["9M"],
+		},
+	},
+};
+"""
+
+
+def make_library(tmp_path):
+    (tmp_path / "moves.js").write_text(MOVES_JS, encoding="utf-8")
+    (tmp_path / "learnsets.js").write_text(LEARNSETS_JS, encoding="utf-8")
+    return TemplateLibrary(str(tmp_path))
+
+
+def test_index_buckets_and_levels(tmp_path):
+    library = make_library(tmp_path)
+    index = library.get_learnset_index()
+    
+    assert index is library.get_learnset_index()
+    assert index.species_count == 3
+    assert power_tier(index.moves["overheat"]) == "ultimate"
+    assert set(index.type_tiers["Fire"]) == {"weak", "medium", "strong", "ultimate", "status"}
+    assert "Electric" not in index.type_tiers
+    # 只取每个物种最新世代的升级记录
+    assert index.level_distribution["flamethrower"].tolist() == [24, 40]
+    assert index.median_level["ember"] == 6
+    assert index.universal_tms.items[0] == "protect"
+    # 最新世代改为升级学会的技能不再算蛋技能
+    assert "Flying" not in index.egg_pools
+
+
+def test_streamed_learnsets_match_loaded(tmp_path):
+    """大型学习表流式建立索引，结果与整体加载一致，且不保留学习表"""
+    loaded = make_library(tmp_path).get_learnset_index()
+    
+    library = make_library(tmp_path)
+    library.STREAM_THRESHOLD_BYTES = 0
+    index = library.get_learnset_index()
+    assert index is library.get_learnset_index()
+    assert "learnsets" not in library.reference_data and index.learnsets is None
+    assert index.species_count == loaded.species_count and index.learners == loaded.learners
+    assert index.generate("Fire", "Flying", seed="emberwing") == loaded.generate("Fire", "Flying", seed="emberwing")
+    
+    # 流式加载的条目字典与整体解析一致；加载后改用已加载的学习表
+    learnsets = library.load_reference("learnsets")
+    assert learnsets == make_library(tmp_path).load_reference("learnsets")
+    assert library.get_learnset_index().learnsets is learnsets
+    assert LearnsetIndex(loaded.moves, iter(learnsets.items())).learners == loaded.learners
+
+
+def test_generate_is_deterministic_and_realistic(tmp_path):
+    index = make_library(tmp_path).get_learnset_index()
+    
+    moves = index.generate("Fire", "Flying", seed="emberwing")
+    assert moves == index.generate("Fire", "Flying", seed="emberwing")
+    
+    level_moves = [m for m in moves if m.split(":")[0].isdigit()]
+    levels = [int(m.split(":")[0]) for m in level_moves]
+    assert levels == sorted(levels)
+    assert "1:tackle" in moves
+    assert any(m.endswith(":airslash") for m in level_moves)
+    # 等级取自真实分布
+    overheat = next(m for m in level_moves if m.endswith(":overheat"))
+    assert overheat == "52:overheat"
+    assert "tm:protect" in moves
+
+
+def test_builder_uses_learnsets_with_fallback(tmp_path):
+    config = {"builder": {"output_dir": str(tmp_path / "output")}}
+    
+    builder = Builder(config, template_library=make_library(tmp_path))
+    assert "45:heatwave" not in builder._generate_default_moves("Fire", "Flying", seed="emberwing")
+    
+    fallback = Builder(config, template_library=TemplateLibrary(str(tmp_path / "missing")))
+    assert "45:heatwave" in fallback._generate_default_moves("Fire", "Flying", seed="emberwing")
@@ -0,0 +1,75 @@
+"""测试技能数值近邻检索"""
+import numpy as np
+
+from services.move_generator import MoveGenerator
+from services.move_neighbors import KDTree, MoveNeighbors
+from services.template_library import TemplateLibrary
+from services.validator import Validator
+from test_move_table import MOVES
+
+
+def brute_force(points, target, k):
+    distances = np.sqrt(((points - target) ** 2).sum(axis=1))
+    return sorted(zip(distances.tolist(), range(len(points))))[:k]
+
+
+def test_kdtree_matches_brute_force():
+    rng = np.random.default_rng(3)
+    points = rng.normal(size=(3000, 7))
+    # 离散取值（大量重复点），与真实技能数据相似
+    points[:, 2] = rng.choice([5.0, 10.0, 15.0], size=len(points))
+    tree = KDTree(points, leaf_size=16)
+    assert len(tree.leaves) > 1
+    
+    for _ in range(50):
+        target = points[rng.integers(len(points))] + rng.normal(size=7) * 0.2
+        expected = brute_force(points, target, 5)
+        assert [(row, round(d, 9)) for row, d in tree.query(target, 5)] == \
+            [(row, round(d, 9)) for d, row in expected]
+    
+    assert KDTree(points[:10]).query(points[0], 20)[0] == (0, 0.0)
+    assert KDTree(np.empty((0, 7))).query(points[0]) == []
+
+
+def test_nearest_with_filters():
+    neighbors = MoveNeighbors(MOVES)
+    
+    closest = neighbors.nearest({"basePower": 70, "accuracy": 100, "pp": 15}, k=2)
+    assert closest[0][0] == "firepunch"
+    assert [move_id for move_id, _ in neighbors.nearest({"basePower": 70}, k=5, type="Fire")] == ["firepunch", "ember"]
+    assert neighbors.nearest({"basePower": 70}, category="Status")[0][0] == "swordsdance"
+    # 忽略威力：只比较其余数值
+    ignored = neighbors.nearest({"basePower": 250, "accuracy": 100, "pp": 30, "priority": 1}, k=1, ignore=["basePower"])
+    assert ignored[0][0] == "machpunch"
+
+
+def test_generator_and_validator_hints(tmp_path):
+    library = TemplateLibrary(str(tmp_path))
+    library.moves_cache = MOVES
+    
+    result = MoveGenerator(template_library=library).generate("Blaze Jab", "Fire", "Physical", base_power=80, pp=15)
+    assert result["balance_hints"][0]["id"] == "firepunch"
+    assert "balance_hints" not in MoveGenerator().generate("Blaze Jab", "Fire", "Physical", base_power=80)
+    
+    validator = Validator({}, template_library=library)
+    strong = validator.validate_move_balance({"type": "Fire", "category": "Physical", "basePower": 150,
+                                             "accuracy": 100, "pp": 15})
+    assert strong["warnings"] and strong["similar_moves"][0]["id"] == "firepunch"
+    assert not validator.validate_move_balance({"type": "Fire", "category": "Physical", "basePower": 75,
+                                                "accuracy": 100, "pp": 15})["warnings"]
+    
+    code = MoveGenerator().generate("Blaze Jab", "Fire", "Physical", base_power=150, pp=15)["code"]
+    checked = validator.validate_move_code(code)
+    assert checked["valid"] and any("威力150偏高" in warning for warning in checked["warnings"])
+    
+    # 平衡检查本身出错（如参考文件读取失败）时只跳过提示，不把技能判为无效
+    def broken():
+        raise OSError("reference unavailable")
+    library.get_move_neighbors = broken
+    checked = validator.validate_move_code(code)
+    assert checked["valid"] and not checked["errors"]
+    assert any("未进行数值平衡检查" in warning for warning in checked["warnings"])
+    
+    # 代码无法解析时同样以警告说明跳过了平衡检查
+    checked = validator.validate_move_code(code.rstrip().rstrip(",") + " @@")
+    assert checked["valid"] and any("代码无法解析" in warning for warning in checked["warnings"])
@@ -0,0 +1,52 @@
+"""测试技能列式视图"""
+import numpy as np
+
+from services.move_table import MoveTable
+from services.template_library import TemplateLibrary
+
+
+MOVES = {
+    "ember": {"num": 52, "accuracy": 100, "basePower": 40, "category": "Special", "pp": 25, "priority": 0,
+              "flags": {"protect": 1, "mirror": 1}, "secondary": {"chance": 10, "status": "brn"},
+              "target": "normal", "type": "Fire"},
+    "firepunch": {"num": 7, "accuracy": 100, "basePower": 75, "category": "Physical", "pp": 15, "priority": 0,
+                  "flags": {"contact": 1, "protect": 1, "punch": 1}, "secondary": {"chance": 10, "status": "brn"},
+                  "target": "normal", "type": "Fire"},
+    "machpunch": {"num": 183, "accuracy": 100, "basePower": 40, "category": "Physical", "pp": 30, "priority": 1,
+                  "flags": {"contact": 1, "protect": 1, "punch": 1}, "secondary": None,
+                  "target": "normal", "type": "Fighting"},
+    "swift": {"num": 129, "accuracy": True, "basePower": 60, "category": "Special", "pp": 20, "priority": 0,
+              "flags": {"protect": 1}, "secondary": None, "target": "allAdjacentFoes", "type": "Normal"},
+    "swordsdance": {"num": 14, "accuracy": True, "basePower": 0, "category": "Status", "pp": 20, "priority": 0,
+                    "flags": {"snatch": 1}, "target": "self", "type": "Normal"},
+}
+
+
+def test_columns_filters_and_stats():
+    table = MoveTable(MOVES)
+    
+    assert table.basePower.dtype == np.float32
+    assert list(table.ids[table.always_hits]) == ["swift", "swordsdance"]
+    assert table.value_counts("type") == {"Fire": 2, "Normal": 2, "Fighting": 1}
+    assert table.value_counts("priority") == {0: 4, 1: 1}
+    assert table.flag_counts()["protect"] == 4
+    
+    punches = table.mask(flags=["contact", "punch"], has_priority=False)
+    assert list(table.ids[punches]) == ["firepunch"]
+    assert not table.mask(flags=["unknown"]).any()
+    assert list(table.ids[table.mask(type="Fire", power_min=50)]) == ["firepunch"]
+    
+    stats = table.power_stats()
+    assert stats["count"] == 4
+    assert stats["min"] == 40 and stats["max"] == 75
+    assert stats["bins"]["<50"] == 2
+    assert stats["percentiles"]["p50"] == 50
+
+
+def test_search_moves_with_flags(tmp_path):
+    library = TemplateLibrary(str(tmp_path))
+    library.moves_cache = MOVES
+    
+    results = library.search_moves(flags=["punch"], limit=5)
+    assert [move["id"] for move in results] == ["firepunch", "machpunch"]
+    assert [move["id"] for move in library.search_moves(flags=["punch"], has_priority=True)] == ["machpunch"]
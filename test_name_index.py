@@ -0,0 +1,107 @@
+"""测试技能 / 特性名称解析与补全"""
+import json
+
+import pytest
+
+from services.builder import Builder
+from services.name_index import NameIndex, normalize_name, trigrams
+from services.reference_search import ReferenceSearch
+from services.template_library import TemplateLibrary
+
+
+MOVES_JS = """export const Moves = {
+	thunder: {num: 87, name: "Thunder", basePower: 110, category: "Special", type: "Electric"},
+	thunderbolt: {num: 85, name: "Thunderbolt", basePower: 90, category: "Special", type: "Electric"},
+	thunderpunch: {num: 9, name: "Thunder Punch", basePower: 75, category: "Physical", type: "Electric"},
+	flamethrower: {num: 53, name: "Flamethrower", basePower: 90, category: "Special", type: "Fire"},
+	tackle: {num: 33, name: "Tackle", basePower: 40, category: "Physical", type: "Normal"},
+};
+"""
+
+ABILITIES_JS = """export const Abilities = {
+	static: {name: "Static", rating: 2, num: 9},
+	blaze: {name: "Blaze", rating: 2, num: 66},
+};
+"""
+
+LANG_ZH = {
+    "cobblemon.move.thunderbolt": "十万伏特",
+    "cobblemon.move.thunderbolt.desc": "向对手发出强力电击。",
+    "cobblemon.move.flamethrower": "喷射火焰",
+    "cobblemon.ability.static": "静电",
+    "cobblemon.species.pikachu.name": "皮卡丘",
+}
+
+
+def make_library(tmp_path):
+    (tmp_path / "moves.js").write_text(MOVES_JS, encoding="utf-8")
+    (tmp_path / "abilities.js").write_text(ABILITIES_JS, encoding="utf-8")
+    lang_dir = tmp_path / "pack" / "assets" / "cobblemon" / "lang"
+    lang_dir.mkdir(parents=True)
+    (lang_dir / "zh_cn.json").write_text(json.dumps(LANG_ZH, ensure_ascii=False), encoding="utf-8")
+    library = TemplateLibrary(str(tmp_path))
+    library.reference_files["pokemon"] = tmp_path / "pack"
+    return library
+
+
+def test_normalize_and_trigrams():
+    assert normalize_name("Thunder Punch") == "thunderpunch"
+    assert normalize_name("U-turn") == "uturn"
+    assert normalize_name("十万 伏特") == "十万伏特"
+    assert trigrams("ab") == {"  a", " ab", "ab "}
+
+
+def test_resolve_and_complete(tmp_path):
+    """拼写错误、部分输入、翻译名都能解析到正确ID"""
+    index = make_library(tmp_path).get_name_index()
+    assert len(index) == 7
+    assert index.contains("move", "thunder") and not index.contains("ability", "thunder")
+    
+    top = index.resolve("thundr")[0]
+    assert (top["id"], top["match"]) == ("thunder", "fuzzy")
+    assert index.resolve("flamethrow")[0]["id"] == "flamethrower"
+    assert index.resolve("Thunder Punch")[0] == {
+        "id": "thunderpunch", "kind": "move", "name": "Thunder Punch",
+        "matched": "thunderpunch", "score": 1.0, "match": "exact"
+    }
+    
+    top = index.resolve("十万伏特")[0]
+    assert (top["id"], top["matched"], top["match"]) == ("thunderbolt", "十万伏特", "exact")
+    assert index.resolve("静电", kind="move") == []
+    assert index.resolve("静电", kind="ability")[0]["id"] == "static"
+    assert index.resolve("zzzz") == []
+    
+    completions = index.complete("thunder")
+    assert [c["id"] for c in completions] == ["thunder", "thunderbolt", "thunderpunch"]
+    assert [c["id"] for c in index.complete("thunder", limit=2)] == ["thunder", "thunderbolt"]
+    assert [c["id"] for c in index.complete("喷射")] == ["flamethrower"]
+    assert index.complete("bl", kind="move") == []
+
+
+def test_library_cache_and_search(tmp_path):
+    """索引随技能重载重建；工具后端校验类型"""
+    library = make_library(tmp_path)
+    index = library.get_name_index()
+    assert library.get_name_index() is index
+    
+    (tmp_path / "moves.js").write_text(MOVES_JS.replace("tackle", "pound"), encoding="utf-8")
+    library.refresh_reference("moves")
+    rebuilt = library.get_name_index()
+    assert rebuilt is not index and rebuilt.contains("move", "pound")
+    
+    search = ReferenceSearch({"rag": {"enabled": False}}, template_library=library)
+    result = search.resolve_name("thunderb", kind="moves", autocomplete=True)
+    assert [r["id"] for r in result["results"]] == ["thunderbolt"]
+    with pytest.raises(ValueError):
+        search.resolve_name("pikachu", kind="pokemon")
+
+
+def test_builder_corrects_unknown_moves(tmp_path):
+    """技能表中拼错的技能ID被更正，无法解析的保留"""
+    builder = Builder({"builder": {"output_dir": str(tmp_path / "out")}}, template_library=make_library(tmp_path))
+    moves = builder._validate_moves(["1:tackle", "20:thunderbolts", "tm:notamove"])
+    assert moves == ["1:tackle", "20:thunderbolt", "tm:notamove"]
+    
+    empty = TemplateLibrary(str(tmp_path / "missing"))
+    assert Builder({}, template_library=empty)._validate_moves(["1:thundr"]) == ["1:thundr"]
+    assert NameIndex([]).resolve("thunder") == []
@@ -0,0 +1,62 @@
+"""测试结构化技能模板查询"""
+import pytest
+
+from services.reference_search import ReferenceSearch
+from services.template_library import TemplateLibrary
+from test_move_table import MOVES
+
+
+MOVES_WITH_EFFECTS = {
+    **MOVES,
+    "gigadrain": {"num": 202, "accuracy": 100, "basePower": 75, "category": "Special", "pp": 10, "priority": 0,
+                  "flags": {"protect": 1, "heal": 1}, "drain": [1, 2], "secondary": None,
+                  "target": "normal", "type": "Grass"},
+    "flareblitz": {"num": 394, "accuracy": 100, "basePower": 120, "category": "Physical", "pp": 15, "priority": 0,
+                   "flags": {"contact": 1, "protect": 1}, "recoil": [33, 100], "secondary": {"chance": 10, "status": "brn"},
+                   "target": "normal", "type": "Fire"},
+}
+
+
+@pytest.fixture
+def search(tmp_path):
+    library = TemplateLibrary(str(tmp_path))
+    library.moves_cache = MOVES_WITH_EFFECTS
+    return ReferenceSearch({}, template_library=library)
+
+
+def test_filters_sort_and_projection(search):
+    result = search.query_templates(move_type="Fire", sort="-basePower", fields=["id", "basePower"])
+    assert result["total"] == 3
+    assert result["results"] == [
+        {"id": "flareblitz", "basePower": 120},
+        {"id": "firepunch", "basePower": 75},
+        {"id": "ember", "basePower": 40},
+    ]
+    
+    burns = search.query_templates(effect="burn", flags=["contact"], sort="id")
+    assert [move["id"] for move in burns["results"]] == ["firepunch", "flareblitz"]
+    assert search.query_templates(effect="drain")["results"] == [
+        {"id": "gigadrain", "type": "Grass", "category": "Special", "basePower": 75,
+         "accuracy": 100, "pp": 10, "priority": 0}
+    ]
+    
+    # 必中技能在命中率升序中排在最后
+    by_accuracy = search.query_templates(sort="accuracy", fields=["id"])
+    assert [move["id"] for move in by_accuracy["results"]][-2:] == ["swift", "swordsdance"]
+
+
+def test_cursor_pagination(search):
+    first = search.query_templates(sort="num", fields=["id"], limit=3)
+    assert first["total"] == 7
+    second = search.query_templates(sort="num", fields=["id"], limit=3, cursor=first["next_cursor"])
+    third = search.query_templates(sort="num", fields=["id"], limit=3, cursor=second["next_cursor"])
+    assert third["next_cursor"] is None
+    ids = [move["id"] for page in (first, second, third) for move in page["results"]]
+    assert ids == sorted(MOVES_WITH_EFFECTS, key=lambda move_id: MOVES_WITH_EFFECTS[move_id]["num"])
+    
+    with pytest.raises(ValueError):
+        search.query_templates(sort="-num", fields=["id"], limit=3, cursor=first["next_cursor"])
+    with pytest.raises(ValueError):
+        search.query_templates(effect="teleport")
+    with pytest.raises(ValueError):
+        search.query_templates(sort="power")
@@ -0,0 +1,133 @@
+"""测试参考库检索（search_reference 工具后端）"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.rag_service import RAGService
+from services.reference_search import ReferenceSearch
+from services.template_library import TemplateLibrary
+from test_ingest import SAMPLE_ABILITIES, SAMPLE_MOVES
+
+
+EXTRA_MOVES = SAMPLE_MOVES.replace("};\n", '''  ember: {
+    num: 52,
+    accuracy: 100,
+    basePower: 40,
+    category: "Special",
+    name: "Ember",
+    pp: 25,
+    priority: 0,
+    flags: {protect: 1, mirror: 1, metronome: 1},
+    secondary: {
+      chance: 10,
+      status: "brn"
+    },
+    target: "normal",
+    type: "Fire"
+  }
+};
+''')
+
+
+class KeywordEmbeddingModel:
+    """按关键词计数生成向量（测试用）"""
+    
+    KEYWORDS = ["fire", "water", "burn", "wave"]
+    
+    def encode(self, texts):
+        return np.array([[text.lower().count(word) for word in self.KEYWORDS] for text in texts], dtype=np.float32)
+
+
+def make_search(tmp_path, rag_config=None):
+    (tmp_path / "moves.js").write_text(EXTRA_MOVES, encoding="utf-8")
+    (tmp_path / "abilities.js").write_text(SAMPLE_ABILITIES, encoding="utf-8")
+    config = {"rag": dict({"enabled": False}, **(rag_config or {}))}
+    return ReferenceSearch(config, RAGService(config), template_library=TemplateLibrary(str(tmp_path)))
+
+
+def test_template_fallback_filters_and_projection(tmp_path):
+    search = make_search(tmp_path)
+    
+    result = asyncio.run(search.search("fire brn", "moves", limit=5, power_min=50))
+    assert result["source"] == "templates"
+    assert [r["name"] for r in result["results"]] == ["Flamethrower"]
+    
+    item = result["results"][0]
+    assert item["move_type"] == "Fire" and item["basePower"] == 90
+    assert "content" not in item
+    assert item["summary"].startswith("Flamethrower | Fire Special")
+    
+    full = asyncio.run(search.search("blaze", "abilities", include_content=True))
+    assert "chainModify" in full["results"][0]["content"]
+
+
+def test_cursor_pagination(tmp_path):
+    search = make_search(tmp_path)
+    
+    first = asyncio.run(search.search("brn", "moves", limit=1, move_type="Fire"))
+    second = asyncio.run(search.search("brn", "moves", limit=1, move_type="Fire", cursor=first["next_cursor"]))
+    
+    names = [first["results"][0]["name"], second["results"][0]["name"]]
+    assert sorted(names) == ["Ember", "Flamethrower"]
+    assert second["next_cursor"] is None
+    
+    # 查询条件变化后旧游标失效
+    with pytest.raises(ValueError):
+        asyncio.run(search.search("brn", "moves", limit=1, cursor=first["next_cursor"]))
+
+
+def test_rag_similarity_threshold(tmp_path):
+    rag = RAGService({"rag": {"vector_store": "numpy", "data_dir": str(tmp_path)}})
+    rag.embedding_model = KeywordEmbeddingModel()
+    rag.index_reference_data("move", [
+        {"name": "Ember", "content": "Ember Fire Special burn", "move_type": "Fire", "category": "Special", "basePower": 40},
+        {"name": "Surf", "content": "Surf Water Special wave", "move_type": "Water", "category": "Special", "basePower": 90},
+    ])
+    search = ReferenceSearch({"rag": {"similarity_threshold": 0.5}}, rag)
+    
+    result = asyncio.run(search.search("Ember Fire burn", "moves", limit=5))
+    assert result["source"] == "rag"
+    assert [r["name"] for r in result["results"]] == ["Ember"]
+    assert result["results"][0]["similarity"] >= 0.5
+    
+    result = asyncio.run(search.search("Ember Fire burn", "moves", limit=5, min_similarity=-1.0))
+    assert len(result["results"]) == 2
+
+
+def test_rag_pagination_is_stable(tmp_path):
+    """翻页在同一候选列表上切片：各页不重复、不遗漏，与单页结果顺序一致"""
+    rag = RAGService({"rag": {"vector_store": "numpy", "data_dir": str(tmp_path)}})
+    rag.embedding_model = KeywordEmbeddingModel()
+    words = ["fire", "water", "burn", "wave"]
+    rag.index_reference_data("move", [
+        {
+            "name": f"Move{i}",
+            "content": f"Move{i} " + " ".join(words[j % 4] for j in range(i % 5 + 1)),
+            "move_type": "Fire" if i % 3 else "Water",
+            "category": "Special",
+            "basePower": 10 * i
+        }
+        for i in range(23)
+    ])
+    search = ReferenceSearch({"rag": {"similarity_threshold": 0.1}}, rag)
+    
+    full = asyncio.run(search.search("fire burn", "moves", limit=50, move_type="Fire"))
+    expected = [r["name"] for r in full["results"]]
+    assert full["next_cursor"] is None and len(expected) > 3
+    
+    names, cursor = [], None
+    while True:
+        page = asyncio.run(search.search("fire burn", "moves", limit=3, move_type="Fire", cursor=cursor))
+        names += [r["name"] for r in page["results"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+        assert page["results"]
+    assert names == expected
+    
+    # 候选列表缓存被淘汰后按同样的固定候选数量重新检索，排名不变
+    first = asyncio.run(search.search("fire burn", "moves", limit=3, move_type="Fire"))
+    search._ranked.clear()
+    second = asyncio.run(search.search("fire burn", "moves", limit=3, move_type="Fire", cursor=first["next_cursor"]))
+    assert [r["name"] for r in second["results"]] == expected[3:6]
@@ -0,0 +1,97 @@
+"""测试参考文件热重载"""
+import os
+import threading
+
+from services.reference_watcher import ReferenceWatcher
+from services.template_library import TemplateLibrary
+
+
+def write_moves(path, moves):
+    entries = "".join(
+        f'  {move_id}: {{name: "{move_id}", type: "{move_type}", category: "Physical", basePower: {power}}},\n'
+        for move_id, move_type, power in moves
+    )
+    path.write_text(f"exports.Moves = {{\n{entries}}};\n", encoding="utf-8")
+    # 保证修改时间变化（部分文件系统时间精度较低）
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_incremental_reload(tmp_path):
+    moves_file = tmp_path / "moves.js"
+    write_moves(moves_file, [("ember", "Fire", 40), ("surf", "Water", 90), ("tackle", "Normal", 40)])
+    library = TemplateLibrary(str(tmp_path))
+    reloads = []
+    library.reload_listeners.append(reloads.append)
+    
+    watcher = ReferenceWatcher(library, names=["moves"])
+    watcher.baseline()
+    surf = library.get_move_records()["surf"]
+    assert [m["id"] for m in library.search_moves(type="Fire")] == ["ember"]
+    
+    write_moves(moves_file, [("ember", "Fire", 60), ("surf", "Water", 90), ("flamethrower", "Fire", 90)])
+    assert watcher.check_once() == {}  # 等待写入稳定
+    report = watcher.check_once()["moves"]
+    
+    assert (report["changed"], report["added"], report["removed"], report["unchanged"]) == (1, 1, 1, 1)
+    moves = library.get_move_records()
+    assert moves["surf"] is surf  # 未变化的条目沿用原对象
+    assert moves["ember"]["basePower"] == 60
+    assert [m["id"] for m in library.search_moves(type="Fire")] == ["ember", "flamethrower"]
+    assert library.get_move_table().moves is moves
+    assert reloads == ["moves", "moves"]
+
+
+def test_queries_see_consistent_snapshots(tmp_path):
+    moves_file = tmp_path / "moves.js"
+    write_moves(moves_file, [(f"move{i}", "Fire", 10) for i in range(50)])
+    library = TemplateLibrary(str(tmp_path))
+    library.refresh_reference("moves")
+    
+    errors = []
+    stop = threading.Event()
+    
+    def reader():
+        while not stop.is_set():
+            powers = {m["basePower"] for m in library.search_moves(type="Fire", limit=50)}
+            if len(powers) != 1:
+                errors.append(powers)
+    
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for version in range(2, 12):
+        write_moves(moves_file, [(f"move{i}", "Fire", version * 10) for i in range(50)])
+        library.refresh_reference("moves")
+    stop.set()
+    thread.join()
+    
+    assert not errors
+    assert library.search_moves(type="Fire", limit=1)[0]["basePower"] == 110
+
+
+def test_first_reload_after_load_is_incremental(tmp_path):
+    """普通加载 / 缓存命中 / 预加载都记录条目哈希，首次重载即为增量"""
+    moves_file = tmp_path / "moves.js"
+    write_moves(moves_file, [("ember", "Fire", 40), ("surf", "Water", 90), ("tackle", "Normal", 40)])
+    TemplateLibrary(str(tmp_path), cache_dir=str(tmp_path / "cache")).get_move_records()
+    
+    loaders = [
+        lambda library: library.get_move_records(),
+        lambda library: library.preload(["moves"], workers=1),
+    ]
+    for power, load in zip((60, 70), loaders):
+        write_moves(moves_file, [("ember", "Fire", 40), ("surf", "Water", 90), ("tackle", "Normal", 40)])
+        library = TemplateLibrary(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+        load(library)
+        surf = library.get_move_records()["surf"]
+        
+        write_moves(moves_file, [("ember", "Fire", power), ("surf", "Water", 90), ("tackle", "Normal", 40)])
+        report = library.refresh_reference("moves")
+        
+        assert (report["changed"], report["added"], report["unchanged"]) == (1, 0, 2)
+        moves = library.get_move_records()
+        assert moves["surf"] is surf and moves["ember"]["basePower"] == power
+        # 索引与列式表引用模板库中的同一批记录
+        index = library.get_move_index()
+        assert all(index.items[i] is moves[move_id] for i, move_id in enumerate(index.ids))
+        assert library.get_move_table().moves is moves
@@ -0,0 +1,29 @@
+"""测试结构化重排序"""
+from services.reranker import StructuredReranker, parse_move_intent
+
+
+def test_parse_move_intent():
+    assert parse_move_intent("火系物理 威力90 命中95 PP10") == {
+        "move_type": "Fire", "category": "Physical", "basePower": 90, "accuracy": 95, "pp": 10
+    }
+    assert parse_move_intent("提升速度的技能") == {}
+
+
+def test_rerank_prefers_structured_match():
+    candidates = [
+        {"name": "Surf", "type": "Water", "category": "Special", "basePower": 90, "accuracy": 100, "pp": 15, "similarity": 0.82},
+        {"name": "Flamethrower", "type": "Fire", "category": "Special", "basePower": 90, "accuracy": 100, "pp": 15, "similarity": 0.80},
+        {"name": "Flare Blitz", "type": "Fire", "category": "Physical", "basePower": 120, "accuracy": 100, "pp": 15, "similarity": 0.70},
+        {"name": "Fire Punch", "type": "Fire", "category": "Physical", "basePower": 75, "accuracy": True, "pp": 15, "similarity": 0.65},
+    ]
+    reranker = StructuredReranker({"rag": {"rerank": {"pool": 50}}})
+    
+    top = reranker.rerank(candidates, parse_move_intent("火系物理攻击 威力80"), top_k=2)
+    
+    # 属性/分类相符的候选排到检索相似度更高的 Surf / Flamethrower 之前
+    assert {c["name"] for c in top} == {"Fire Punch", "Flare Blitz"}
+    assert top[0]["rerank_score"] >= top[1]["rerank_score"]
+    
+    # 没有结构化需求时保持检索顺序
+    top = reranker.rerank(candidates, {}, top_k=2)
+    assert [c["name"] for c in top] == ["Surf", "Flamethrower"]
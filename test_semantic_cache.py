@@ -0,0 +1,87 @@
+"""测试语义响应缓存"""
+import asyncio
+
+import numpy as np
+
+from services.ai_generator import AIGenerator
+from services.semantic_cache import SemanticCache, extract_signature
+
+
+class FakeRAGService:
+    """按字符集合生成向量，与词序无关（改写的描述向量相同）"""
+    
+    enabled = True
+    
+    def encode(self, texts):
+        vectors = []
+        for text in texts:
+            vector = np.zeros(64, dtype=np.float32)
+            for char in set(text) - set("的 "):
+                vector[ord(char) % 64] += 1.0
+            vectors.append(vector.tolist())
+        return vectors
+    
+    async def search_moves_batch(self, queries, top_k=None, query_embeddings=None):
+        assert query_embeddings is not None
+        return [[] for _ in queries]
+
+
+def test_signature_ignores_order_but_keeps_numbers():
+    assert extract_signature("威力90的火系物理攻击") == extract_signature("火系物理攻击 威力90")
+    assert extract_signature("火系物理攻击 威力90") != extract_signature("火系物理攻击 威力80")
+    assert extract_signature("10%几率烧伤") != extract_signature("10%几率麻痹")
+
+
+def test_generate_move_reuses_paraphrased_result():
+    generator = AIGenerator({"ai": {"mode": "none"}, "cache": {"semantic": {"enabled": True, "threshold": 0.9}}}, rag_service=FakeRAGService())
+    calls = []
+    
+    async def fake_generate(description, references):
+        calls.append(description)
+        return {"success": True, "code": f"// {description}", "name": "Flame Strike"}
+    
+    generator._generate_move_with_references = fake_generate
+    
+    first = asyncio.run(generator.generate_move("威力90的火系物理攻击"))
+    second = asyncio.run(generator.generate_move("火系物理攻击 威力90"))
+    third = asyncio.run(generator.generate_move("火系物理攻击 威力80"))
+    
+    assert len(calls) == 2
+    assert second["cache"]["hit"] is True
+    assert second["code"] == first["code"]
+    assert "cache" not in third
+    
+    stats = generator.semantic_cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert stats["guard_rejects"] == 1
+
+
+def test_cache_capacity_evicts_oldest():
+    cache = SemanticCache({"cache": {"semantic": {"enabled": True, "max_entries": 1}}})
+    cache.store("a", [1.0, 0.0], {"success": True, "code": "a"})
+    cache.store("b", [0.0, 1.0], {"success": True, "code": "b"})
+    
+    assert len(cache) == 1
+    assert cache.lookup("a", [1.0, 0.0]) is None
+    assert cache.lookup("b", [0.0, 1.0])["code"] == "b"
+
+
+def test_batch_failure_is_reported_per_description():
+    """单个描述生成出错不影响同批其他描述"""
+    generator = AIGenerator({"ai": {"mode": "none"}}, rag_service=FakeRAGService())
+    
+    async def fake_generate(description, references):
+        if "失败" in description:
+            raise RuntimeError("模型超时")
+        return {"success": True, "code": f"// {description}", "name": "Flame Strike"}
+    
+    generator._generate_move_with_references = fake_generate
+    
+    results = asyncio.run(generator.generate_moves_batch(["火系物理攻击", "必定失败的描述", "水系特殊攻击"]))
+    assert [result["success"] for result in results] == [True, False, True]
+    assert results[1]["error"] == "模型超时"
+
+
+def test_semantic_cache_disabled_by_default():
+    assert SemanticCache({}).enabled is False
+    assert SemanticCache({"cache": {"semantic": {"enabled": True}}}).enabled is True
@@ -0,0 +1,156 @@
+"""测试 Showdown JS 单遍解析器"""
+from pathlib import Path
+
+import pytest
+
+from services.showdown_parser import ShowdownParseError, iter_showdown_file, parse_showdown_source
+from services.template_library import TemplateLibrary
+
+
+SAMPLE = '''// Note: This is the list of moves
+export const Moves: import('../sim/dex-moves').MoveDataTable = {
+	// "fake" entries
+	"10000000voltthunderbolt": {
+		num: 719,
+		accuracy: true,
+		basePower: 195,
+		category: "Special",
+		isNonstandard: "Past",
+		name: "10,000,000 Volt Thunderbolt",
+		pp: 1,
+		priority: 0,
+		flags: {},
+		isZ: "pikaniumz",
+		critRatio: 3,
+		secondary: null,
+		target: "normal",
+		type: "Electric",
+	},
+	beatup: {
+		num: 251,
+		accuracy: 100,
+		basePower: 0,
+		basePowerCallback(pokemon, target, move) {
+			const setSpecies = this.dex.species.get(move.allies!.shift()!.set.species);
+			const bp = 5 + Math.floor(setSpecies.baseStats.atk / 10);
+			this.debug(`BP for ${setSpecies.name} hit: {${bp}}`);
+			return bp;
+		},
+		category: "Physical",
+		name: "Beat Up",
+		pp: 10,
+		priority: 0,
+		flags: {protect: 1, mirror: 1, allyanim: 1, metronome: 1},
+		onModifyMove(move, pokemon) {
+			move.allies = pokemon.side.pokemon.filter(ally => ally === pokemon || !ally.fainted && !ally.status);
+			move.multihit = move.allies.length; /* } stray brace */
+		},
+		secondary: null,
+		target: "normal",
+		type: "Dark",
+		contestType: "Clever",
+	},
+	ember: {
+		num: 52,
+		accuracy: 100,
+		basePower: 40,
+		category: "Special",
+		name: "Ember",
+		desc: "Has a 10% chance to burn the target. Uses { and } in text.",
+		pp: 25,
+		priority: 0,
+		flags: {protect: 1, mirror: 1, metronome: 1},
+		secondary: {
+			chance: 10,
+			status: 'brn',
+		},
+		onTry: function (source) { if (/\\}/.test(source.name)) return false; },
+		target: "normal",
+		type: "Fire",
+	},
+	doubleslap: {
+		num: 3,
+		accuracy: 85,
+		basePower: 15,
+		category: "Physical",
+		name: "Double Slap",
+		pp: 10,
+		priority: 0,
+		flags: {contact: 1, protect: 1, mirror: 1},
+		multihit: [2, 5],
+		drain: [1, 2],
+		self: {boosts: {spe: -1}},
+		target: "normal",
+		type: "Normal",
+	},
+};
+'''
+
+
+def test_parses_functions_strings_and_comments():
+    name, items = parse_showdown_source(SAMPLE, keep_source=True)
+    
+    assert name == "Moves"
+    assert list(items) == ["10000000voltthunderbolt", "beatup", "ember", "doubleslap"]
+    
+    volt = items["10000000voltthunderbolt"]
+    assert volt["accuracy"] is True
+    assert volt["secondary"] is None
+    assert volt["flags"] == {}
+    
+    beatup = items["beatup"]
+    assert beatup["handlers"] == ["basePowerCallback", "onModifyMove"]
+    assert beatup["type"] == "Dark"
+    assert beatup["contestType"] == "Clever"
+    
+    ember = items["ember"]
+    assert ember["desc"].endswith("Uses { and } in text.")
+    assert ember["secondary"] == {"chance": 10, "status": "brn"}
+    assert ember["handlers"] == ["onTry"]
+    assert ember["source"].startswith("ember: {")
+    
+    slap = items["doubleslap"]
+    assert slap["multihit"] == [2, 5]
+    assert slap["drain"] == [1, 2]
+    assert slap["self"] == {"boosts": {"spe": -1}}
+    # 自身能力变化不应被当作追加效果
+    assert "secondary" not in slap
+
+
+def test_template_library_exports_form(tmp_path):
+    moves_file = tmp_path / "moves.js"
+    moves_file.write_text(
+        "exports.Moves = {\n"
+        "  flamethrower: {num: 53, accuracy: 100, basePower: 90, category: \"Special\",\n"
+        "    name: \"Flamethrower\", pp: 15, priority: 0, flags: {protect: 1, mirror: 1},\n"
+        "    secondary: {chance: 10, status: \"brn\"}, target: \"normal\", type: \"Fire\"}\n"
+        "};\n",
+        encoding="utf-8"
+    )
+    
+    library = TemplateLibrary(str(tmp_path))
+    items = library.parse_showdown_js(moves_file)
+    legacy = library.parse_showdown_js_legacy(Path(moves_file))
+    
+    assert items["flamethrower"]["basePower"] == 90
+    assert items["flamethrower"]["secondary"] == {"chance": 10, "status": "brn"}
+    # 基础字段与旧版解析结果一致
+    for field, value in legacy["flamethrower"].items():
+        assert items["flamethrower"][field] == value
+
+
+def test_streaming_matches_full_parse(tmp_path):
+    path = tmp_path / "moves.ts"
+    path.write_text(SAMPLE, encoding="utf-8")
+    _, expected = parse_showdown_source(SAMPLE, keep_source=True)
+    
+    # 块边界落在字符串、注释、函数体中间时结果不变
+    for chunk_size in (5, 37, 256, 1 << 20):
+        assert dict(iter_showdown_file(path, keep_source=True, chunk_size=chunk_size)) == expected
+    
+    truncated = tmp_path / "truncated.ts"
+    truncated.write_text(SAMPLE[:len(SAMPLE) // 2], encoding="utf-8")
+    stream = iter_showdown_file(truncated, chunk_size=64)
+    assert next(stream)[0] == "10000000voltthunderbolt"
+    with pytest.raises(ShowdownParseError):
+        list(stream)
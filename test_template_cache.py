@@ -0,0 +1,43 @@
+"""测试模板解析结果磁盘缓存"""
+import os
+
+from services.template_library import TemplateLibrary
+
+
+MOVES_JS = '''exports.Moves = {
+  ember: {num: 52, accuracy: 100, basePower: %d, category: "Special", name: "Ember", pp: 25, type: "Fire"},
+};
+'''
+
+
+def test_parse_cache_hit_and_invalidation(tmp_path):
+    moves_file = tmp_path / "moves.js"
+    moves_file.write_text(MOVES_JS % 40, encoding="utf-8")
+    cache_dir = tmp_path / "cache"
+
+    first = TemplateLibrary(str(tmp_path), cache_dir=str(cache_dir))
+    assert first.load_moves()["ember"]["basePower"] == 40
+    assert list(cache_dir.glob("*.pkl"))
+
+    # 新实例（模拟新进程）直接命中磁盘缓存
+    second = TemplateLibrary(str(tmp_path), cache_dir=str(cache_dir))
+    assert second.load_moves()["ember"]["basePower"] == 40
+    assert second.parse_cache.stats["hits"] == 1
+
+    # 只改修改时间：校验内容哈希后仍然命中
+    stat = moves_file.stat()
+    os.utime(moves_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    third = TemplateLibrary(str(tmp_path), cache_dir=str(cache_dir))
+    assert third.load_moves()["ember"]["basePower"] == 40
+    assert third.parse_cache.stats["revalidated"] == 1
+
+    # 内容变化：缓存失效并重新解析
+    moves_file.write_text(MOVES_JS % 45, encoding="utf-8")
+    fourth = TemplateLibrary(str(tmp_path), cache_dir=str(cache_dir))
+    assert fourth.load_moves()["ember"]["basePower"] == 45
+    assert fourth.parse_cache.stats["misses"] == 1
+
+    # 保留源码的解析结果单独缓存
+    items = dict(fourth.iter_reference_items("move"))
+    assert "source" in items["ember"]
+    assert "source" not in fourth.load_moves()["ember"]
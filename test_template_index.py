@@ -0,0 +1,81 @@
+"""测试技能模板二级索引"""
+import itertools
+import random
+
+from services.template_index import MoveIndex
+
+
+TYPES = ["Fire", "Water", "Grass", "Normal"]
+CATEGORIES = ["Physical", "Special", "Status"]
+
+
+def make_moves(count=300, seed=7):
+    rng = random.Random(seed)
+    moves = {}
+    for i in range(count):
+        move = {
+            "name": f"Move {i}",
+            "type": rng.choice(TYPES),
+            "category": rng.choice(CATEGORIES),
+            "basePower": rng.choice([0, 40, 60, 80, 90, 120, 150]),
+            "priority": rng.choice([0, 0, 0, 1, -1]),
+        }
+        roll = rng.random()
+        if roll < 0.3:
+            move["secondary"] = {"chance": 10, "status": rng.choice(["brn", "par", "psn"])}
+        elif roll < 0.4:
+            move["secondary"] = {"chance": 100, "boosts": {"atk": -1}}
+        elif roll < 0.7:
+            move["secondary"] = None
+        if rng.random() < 0.1:
+            move["drain"] = [1, 2]
+        moves[f"move{i}"] = move
+    return moves
+
+
+def linear_search(moves, type=None, category=None, power_min=0, power_max=999,
+                  has_priority=None, has_secondary=None, limit=10):
+    """旧版线性扫描（对照）"""
+    results = []
+    for move_id, move_data in moves.items():
+        if type and move_data.get("type") != type:
+            continue
+        if category and move_data.get("category") != category:
+            continue
+        if not power_min <= move_data.get("basePower", 0) <= power_max:
+            continue
+        if has_priority is not None and has_priority != (move_data.get("priority", 0) != 0):
+            continue
+        if has_secondary is not None and has_secondary != (move_data.get("secondary") is not None):
+            continue
+        results.append(move_id)
+        if len(results) >= limit:
+            break
+    return results
+
+
+def test_query_matches_linear_scan():
+    moves = make_moves()
+    index = MoveIndex(moves)
+    
+    combos = itertools.product(
+        [None, "Fire"], [None, "Special"], [(0, 999), (60, 90), (150, 150)],
+        [None, True, False], [None, True, False], [3, 50]
+    )
+    for type, category, (low, high), priority, secondary, limit in combos:
+        conditions = dict(type=type, category=category, power_min=low, power_max=high,
+                          has_priority=priority, has_secondary=secondary, limit=limit)
+        expected = linear_search(moves, **conditions)
+        assert [index.ids[p] for p in index.query(**conditions)] == expected, conditions
+
+
+def test_first_with_effect():
+    moves = make_moves()
+    index = MoveIndex(moves)
+    
+    first_burn = next(m for m in moves.values() if (m.get("secondary") or {}).get("status") == "brn")
+    first_drain = next(m for m in moves.values() if "drain" in m)
+    assert index.first_with_effect("burn") is first_burn
+    assert index.first_with_effect("drain") is first_drain
+    assert index.first_with_effect("recoil") is None
+    assert index.first_with_effect("lower_atk")["secondary"]["boosts"] == {"atk": -1}
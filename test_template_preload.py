@@ -0,0 +1,63 @@
+"""测试参考文件并行预加载"""
+from services.template_library import TemplateLibrary
+from services.template_records import MoveRecord
+
+
+def write_showdown(path, name, count):
+    entries = "".join(f'  {name.lower()}{i}: {{num: {i}, name: "{name} {i}"}},\n' for i in range(count))
+    path.write_text(f"export const {name} = {{\n{entries}}};\n", encoding="utf-8")
+
+
+def test_preload_parallel_and_cached(tmp_path):
+    write_showdown(tmp_path / "moves.js", "Moves", 30)
+    write_showdown(tmp_path / "abilities.js", "Abilities", 20)
+    write_showdown(tmp_path / "learnsets.ts", "Learnsets", 10)
+    cache_dir = tmp_path / "cache"
+    
+    library = TemplateLibrary(str(tmp_path), cache_dir=str(cache_dir))
+    library.reference_files["learnsets"] = tmp_path / "learnsets.ts"
+    library.reference_files["pokemon"] = tmp_path  # 目录不参与预加载
+    library.reference_files["items"] = tmp_path / "items.js"
+    
+    report = library.preload(workers=2)
+    
+    assert {name: entry.get("items") for name, entry in report.items()} == {
+        "moves": 30, "abilities": 20, "learnsets": 10, "items": None
+    }
+    assert "error" in report["items"]
+    assert all(report[name]["source"] == "parsed" for name in ("moves", "abilities", "learnsets"))
+    assert len(library.load_moves()) == 30
+    assert library.load_reference("learnsets")["learnsets3"]["num"] == 3
+    
+    # 第二个实例全部从磁盘缓存读取
+    again = TemplateLibrary(str(tmp_path), cache_dir=str(cache_dir))
+    report = again.preload(["moves", "abilities"])
+    assert all(entry["source"] == "cache" for entry in report.values())
+    assert len(again.abilities_cache) == 20
+
+
+def test_preload_streams_large_files(tmp_path):
+    """超过阈值的文件不整体传回：技能流式建立紧凑记录，学习表只建立索引，其余文件推迟加载"""
+    write_showdown(tmp_path / "moves.js", "Moves", 30)
+    species = "".join(
+        f'  species{i}: {{learnset: {{moves{i}: ["9L{i}"], moves0: ["9M"]}}}},\n' for i in range(10)
+    )
+    (tmp_path / "learnsets.js").write_text(f"export const Learnsets = {{\n{species}}};\n", encoding="utf-8")
+    write_showdown(tmp_path / "items.js", "Items", 5)
+    
+    library = TemplateLibrary(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    library.STREAM_THRESHOLD_BYTES = 0
+    library.reference_files["learnsets"] = tmp_path / "learnsets.js"
+    library.reference_files["items"] = tmp_path / "items.js"
+    
+    report = library.preload(["learnsets", "moves", "items"], workers=2)
+    
+    assert {name: (entry["items"], entry["source"]) for name, entry in report.items()} == {
+        "moves": (30, "stream"), "learnsets": (10, "stream"), "items": (None, "deferred")
+    }
+    assert all(isinstance(move, MoveRecord) for move in library.moves_cache.values())
+    assert "learnsets" not in library.reference_data and "items" not in library.reference_data
+    assert library.get_learnset_index().learners["moves0"] == 10
+    # 流式加载的文件不写入解析缓存
+    assert not list((tmp_path / "cache").glob("*"))
+    assert library.load_reference("items")["items3"]["num"] == 3
@@ -0,0 +1,76 @@
+"""测试技能 / 特性条目的紧凑记录"""
+import json
+import pickle
+
+import pytest
+
+from services.template_library import TemplateLibrary
+from services.template_records import AbilityRecord, MoveRecord, compact_items
+from test_move_table import MOVES
+
+
+MOVES_JS = """exports.Moves = {
+  ember: {num: 52, accuracy: 100, basePower: 40, category: "Special", name: "Ember", pp: 25,
+    flags: {protect: 1, mirror: 1}, secondary: {chance: 10, status: "brn"}, type: "Fire"},
+  growl: {num: 45, accuracy: 100, basePower: 0, category: "Status", name: "Growl", pp: 40,
+    flags: {sound: 1}, boosts: {atk: -1}, secondary: null, type: "Normal"},
+};
+"""
+
+
+def test_record_behaves_like_dict():
+    data = dict(MOVES["ember"], handlers=["onHit"])
+    record = MoveRecord(data)
+    
+    assert record == data and dict(record) == data
+    assert record["flags"] == {"protect": 1, "mirror": 1}
+    assert record.get("secondary") == {"chance": 10, "status": "brn"}
+    assert record.get("critRatio", 1) == 1 and "critRatio" not in record
+    assert "handlers" in record and len(record) == len(data)
+    assert {**record} == data
+    assert record.to_dict() is not record.to_dict()
+    
+    # 显式的 null 与缺失字段区分
+    swift = MoveRecord(MOVES["swift"])
+    assert "secondary" in swift and swift["secondary"] is None
+    with pytest.raises(KeyError):
+        swift["drain"]
+    with pytest.raises(AttributeError):
+        swift.basePower = 999
+    
+    # 取值很少的字符串共用同一对象
+    assert MoveRecord(MOVES["firepunch"])["type"] is record["type"]
+    assert pickle.loads(pickle.dumps(record)) == data
+    assert AbilityRecord({"name": "Blaze", "flags": {"breakable": 2}})["flags"] == {"breakable": 2}
+
+
+def test_library_stores_records(tmp_path):
+    (tmp_path / "moves.js").write_text(MOVES_JS, encoding="utf-8")
+    library = TemplateLibrary(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    
+    moves = library.get_move_records()
+    assert all(isinstance(move, MoveRecord) for move in moves.values())
+    assert compact_items("moves", moves) is moves
+    
+    found = library.search_moves(type="Fire")
+    assert type(found[0]) is dict and found[0]["id"] == "ember"
+    assert type(library.get_move_by_effect("burn")) is dict
+    
+    # 缓存命中时同样得到记录
+    cached = TemplateLibrary(str(tmp_path), cache_dir=str(tmp_path / "cache")).get_move_records()
+    assert isinstance(cached["ember"], MoveRecord) and cached == moves
+
+
+def test_public_accessors_return_plain_dicts(tmp_path):
+    """load_moves / load_abilities / load_reference 返回普通字典，可直接 JSON 序列化"""
+    (tmp_path / "moves.js").write_text(MOVES_JS, encoding="utf-8")
+    library = TemplateLibrary(str(tmp_path))
+    
+    moves = library.load_moves()
+    assert type(moves["ember"]) is dict
+    assert json.loads(json.dumps(moves["ember"])) == dict(library.get_move_records()["ember"])
+    assert json.loads(json.dumps(library.load_reference("moves")))["growl"]["flags"] == {"sound": 1}
+    
+    # 修改返回值不影响模板库
+    moves["ember"]["basePower"] = 999
+    assert library.load_moves()["ember"]["basePower"] == 40
@@ -0,0 +1,162 @@
+"""测试 NumPy 向量存储后端"""
+import numpy as np
+
+from services.vector_store import (
+    NumpyVectorStore,
+    ShardedVectorStore,
+    collection_exists,
+    create_sharded_vector_store,
+    split_type_clause,
+)
+
+
+def make_store(tmp_path):
+    store = NumpyVectorStore("test_reference", data_dir=tmp_path)
+    store.upsert(
+        ids=["move_ember", "move_surf", "ability_blaze"],
+        embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.9, 0.1, 0.0]],
+        documents=["Ember", "Surf", "Blaze"],
+        metadatas=[
+            {"type": "move", "name": "Ember", "move_type": "Fire", "basePower": 40},
+            {"type": "move", "name": "Surf", "move_type": "Water", "basePower": 90},
+            {"type": "ability", "name": "Blaze"}
+        ]
+    )
+    store.flush()
+    return store
+
+
+def test_query_filters_by_type_and_orders_by_similarity(tmp_path):
+    store = make_store(tmp_path)
+    
+    results = store.query(query_embeddings=[[1.0, 0.05, 0.0]], n_results=5, where={"type": "move"})
+    
+    assert results["ids"][0] == ["move_ember", "move_surf"]
+    assert results["distances"][0][0] < results["distances"][0][1]
+    assert abs(results["distances"][0][0]) < 0.01
+
+
+def test_batch_query_and_structured_where(tmp_path):
+    store = make_store(tmp_path)
+    
+    results = store.query(
+        query_embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+        n_results=1,
+        where={"$and": [{"type": "move"}, {"basePower": {"$gte": 50}}]}
+    )
+    
+    assert results["ids"] == [["move_surf"], ["move_surf"]]
+
+
+def test_persistence_and_upsert_overwrite(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert(
+        ids=["move_ember"],
+        embeddings=[[0.0, 0.0, 1.0]],
+        documents=["Ember v2"],
+        metadatas=[{"type": "move", "name": "Ember", "move_type": "Fire", "basePower": 45}]
+    )
+    # 未 flush 前磁盘上仍是旧数据
+    assert NumpyVectorStore("test_reference", data_dir=tmp_path).get(["move_ember"])["documents"] == ["Ember"]
+    store.flush()
+    
+    reloaded = NumpyVectorStore("test_reference", data_dir=tmp_path)
+    assert reloaded.count() == 3
+    assert reloaded.get(["move_ember"])["documents"] == ["Ember v2"]
+    
+    results = reloaded.query(query_embeddings=[[0.0, 0.0, 1.0]], n_results=1)
+    assert results["ids"][0] == ["move_ember"]
+
+
+def test_upsert_duplicate_ids_in_batch(tmp_path):
+    """同一批中重复的ID以最后一次出现为准"""
+    store = make_store(tmp_path)
+    store.upsert(
+        ids=["move_tackle", "move_tackle", "move_surf", "move_surf"],
+        embeddings=[[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [1.0, 0.0, 0.0], [0.0, 1.0, 1.0]],
+        documents=["Tackle", "Tackle v2", "Surf v2", "Surf v3"],
+        metadatas=[{"type": "move"}, {"type": "move", "basePower": 40}, {"type": "move"}, {"type": "move", "basePower": 95}]
+    )
+    
+    assert store.count() == 4
+    assert store.get(["move_tackle", "move_surf"])["documents"] == ["Tackle v2", "Surf v3"]
+    assert store.query(query_embeddings=[[0.0, 0.0, 1.0]], n_results=1)["ids"] == [["move_tackle"]]
+    assert store.get(where={"basePower": {"$gte": 95}})["ids"] == ["move_surf"]
+
+
+def test_chunked_scoring_and_lazy_columns(tmp_path, monkeypatch):
+    """分块计算的相似度与整体计算一致；连续 upsert 只在读取时重建一次元数据列"""
+    store = NumpyVectorStore("test_chunks", data_dir=tmp_path)
+    rebuilds = []
+    rebuild = store._rebuild_columns
+    monkeypatch.setattr(store, "_rebuild_columns", lambda: (rebuilds.append(1), rebuild()))
+    
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8))
+    for start in range(0, 50, 10):
+        store.upsert(
+            ids=[f"move_{i}" for i in range(start, start + 10)],
+            embeddings=vectors[start:start + 10].tolist(),
+            documents=[str(i) for i in range(start, start + 10)],
+            metadatas=[{"type": "move" if i % 2 else "ability", "basePower": i} for i in range(start, start + 10)]
+        )
+    assert rebuilds == []
+    
+    queries = rng.normal(size=(3, 8)).tolist()
+    where = {"$and": [{"type": "move"}, {"basePower": {"$gte": 10}}]}
+    whole = store.query(queries, n_results=7, where=where)
+    store.SCORE_CHUNK_ROWS = 4
+    chunked = store.query(queries, n_results=7, where=where)
+    
+    assert chunked["ids"] == whole["ids"]
+    assert np.allclose(chunked["distances"], whole["distances"], atol=1e-6)
+    assert all(int(doc_id.split("_")[1]) % 2 == 1 for doc_id in whole["ids"][0])
+    assert len(rebuilds) == 1
+
+
+def test_delete(tmp_path):
+    store = make_store(tmp_path)
+    store.delete(["move_surf", "move_missing"])
+    
+    assert store.count() == 2
+    assert store.get(where={"type": "move"})["ids"] == ["move_ember"]
+    assert store.query(query_embeddings=[[0.0, 1.0, 0.0]], n_results=5)["ids"] == [["ability_blaze", "move_ember"]]
+    store.flush()
+    assert NumpyVectorStore("test_reference", data_dir=tmp_path).get()["ids"] == ["move_ember", "ability_blaze"]
+
+
+def test_sharded_store_routes_by_type(tmp_path):
+    store = ShardedVectorStore(lambda data_type: NumpyVectorStore(f"ref_{data_type}", data_dir=tmp_path))
+    store.upsert(
+        ids=["move_ember", "ability_blaze"],
+        embeddings=[[1.0, 0.0], [1.0, 0.1]],
+        documents=["Ember", "Blaze"],
+        metadatas=[{"type": "move", "basePower": 40}, {"type": "ability"}]
+    )
+    
+    assert store.counts() == {"move": 1, "ability": 1, "pokemon": 0}
+    assert split_type_clause({"$and": [{"type": "move"}, {"basePower": {"$gte": 30}}]}) == ("move", {"basePower": {"$gte": 30}})
+    
+    results = store.query(query_embeddings=[[1.0, 0.1]], n_results=5, where={"type": "move"})
+    assert results["ids"] == [["move_ember"]]
+    
+    # 无类型条件时合并全部分片
+    results = store.query(query_embeddings=[[1.0, 0.1]], n_results=5)
+    assert results["ids"] == [["ability_blaze", "move_ember"]]
+
+
+def test_legacy_collection_is_migrated(tmp_path):
+    config = {"rag": {
+        "vector_store": "numpy",
+        "data_dir": str(tmp_path),
+        "collection_name": "test_reference",
+        "shards": {"ability": {"dtype": "float32"}}
+    }}
+    make_store(tmp_path / "numpy_index")
+    
+    store = create_sharded_vector_store(config, "test_reference")
+    
+    assert store.counts() == {"move": 2, "ability": 1, "pokemon": 0}
+    assert store.shards["ability"].dtype == "float32"
+    assert not collection_exists(config, "test_reference")
+    assert store.get(where={"type": "move"})["ids"] == ["move_ember", "move_surf"]